@@ -7,21 +7,32 @@ from sklearn.model_selection import train_test_split
 from datetime import datetime, timedelta
 import joblib
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+IRRIGATION_FEATURES = ['temperature', 'humidity', 'soil_moisture', 'light_intensity',
+                       'hour', 'day_of_year', 'temp_humidity_ratio']
+FERTILIZER_FEATURES = ['soil_moisture', 'soil_ph', 'temperature', 'humidity',
+                       'light_intensity', 'day_of_year']
+PEST_FEATURES = ['temperature', 'humidity', 'soil_moisture', 'light_intensity',
+                 'hour', 'day_of_year', 'month']
+
 class AgriculturalAIEngine:
     def __init__(self):
         self.irrigation_model = None
         self.fertilizer_model = None
         self.pest_prediction_model = None
         self.yield_prediction_model = None
-        self.scaler = StandardScaler()
+        self.scalers = {
+            'irrigation': StandardScaler(),
+            'fertilizer': StandardScaler(),
+            'pest': StandardScaler()
+        }
         self.is_trained = False
         
-    def prepare_training_data(self, sensor_data: List[Dict]) -> pd.DataFrame:
+    def prepare_training_data(self, sensor_data: Union[List[Dict], Dict[str, np.ndarray]]) -> pd.DataFrame:
         df = pd.DataFrame(sensor_data)
         
         if df.empty:
@@ -45,8 +56,7 @@ class AgriculturalAIEngine:
         return df
     
     def train_irrigation_model(self, training_data: pd.DataFrame):
-        features = ['temperature', 'humidity', 'soil_moisture', 'light_intensity', 
-                   'hour', 'day_of_year', 'temp_humidity_ratio']
+        features = IRRIGATION_FEATURES
         
         target = self._create_irrigation_target(training_data)
         
@@ -55,8 +65,8 @@ class AgriculturalAIEngine:
         
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        X_train_scaled = self.scalers['irrigation'].fit_transform(X_train.values)
+        X_test_scaled = self.scalers['irrigation'].transform(X_test.values)
         
         self.irrigation_model = RandomForestClassifier(
             n_estimators=100,
@@ -72,8 +82,7 @@ class AgriculturalAIEngine:
         return accuracy
     
     def train_fertilizer_model(self, training_data: pd.DataFrame):
-        features = ['soil_moisture', 'soil_ph', 'temperature', 'humidity', 
-                   'light_intensity', 'day_of_year']
+        features = FERTILIZER_FEATURES
         
         target = self._create_fertilizer_target(training_data)
         
@@ -82,8 +91,8 @@ class AgriculturalAIEngine:
         
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        X_train_scaled = self.scalers['fertilizer'].fit_transform(X_train.values)
+        X_test_scaled = self.scalers['fertilizer'].transform(X_test.values)
         
         self.fertilizer_model = RandomForestClassifier(
             n_estimators=100,
@@ -99,8 +108,7 @@ class AgriculturalAIEngine:
         return accuracy
     
     def train_pest_prediction_model(self, training_data: pd.DataFrame):
-        features = ['temperature', 'humidity', 'soil_moisture', 'light_intensity',
-                   'hour', 'day_of_year', 'month']
+        features = PEST_FEATURES
         
         target = self._create_pest_target(training_data)
         
@@ -109,8 +117,8 @@ class AgriculturalAIEngine:
         
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        X_train_scaled = self.scalers['pest'].fit_transform(X_train.values)
+        X_test_scaled = self.scalers['pest'].transform(X_test.values)
         
         self.pest_prediction_model = RandomForestClassifier(
             n_estimators=100,
@@ -174,7 +182,7 @@ class AgriculturalAIEngine:
             current_data.get('temperature', 0) / (current_data.get('humidity', 1) + 1)
         ]])
         
-        features_scaled = self.scaler.transform(features)
+        features_scaled = self.scalers['irrigation'].transform(features)
         prediction = self.irrigation_model.predict(features_scaled)[0]
         confidence = self.irrigation_model.predict_proba(features_scaled)[0].max()
         
@@ -228,7 +236,7 @@ class AgriculturalAIEngine:
             datetime.now().timetuple().tm_yday
         ]])
         
-        features_scaled = self.scaler.transform(features)
+        features_scaled = self.scalers['fertilizer'].transform(features)
         prediction = self.fertilizer_model.predict(features_scaled)[0]
         confidence = self.fertilizer_model.predict_proba(features_scaled)[0].max()
         
@@ -290,7 +298,7 @@ class AgriculturalAIEngine:
             datetime.now().month
         ]])
         
-        features_scaled = self.scaler.transform(features)
+        features_scaled = self.scalers['pest'].transform(features)
         prediction = self.pest_prediction_model.predict(features_scaled)[0]
         confidence = self.pest_prediction_model.predict_proba(features_scaled)[0].max()
         
@@ -331,7 +339,36 @@ class AgriculturalAIEngine:
         
         return result
     
-    def generate_comprehensive_recommendations(self, current_data: Dict) -> List[Dict]:
+    def generate_forecast_recommendation(self, forecast: Optional[Dict]) -> Dict:
+        if not forecast or forecast.get('hours_to_critical') is None:
+            return {"error": "No critical soil moisture crossing forecast"}
+        
+        hours = forecast['hours_to_critical']
+        
+        if hours <= 24:
+            result = {
+                'title': 'Öngörülen Kritik Toprak Nemi',
+                'description': f'Mevcut kuruma hızıyla toprak nemi yaklaşık {hours:.0f} saat içinde kritik seviyeye düşecek. Sulamayı bugün planlayın.',
+                'priority': 'high',
+                'timing': f'{hours:.0f} saat içinde'
+            }
+        elif hours <= 72:
+            result = {
+                'title': 'Planlı Sulama Önerisi',
+                'description': f'Hava tahmini ve kuruma hızına göre toprak nemi yaklaşık {hours / 24:.1f} gün içinde kritik seviyeye düşecek.',
+                'priority': 'medium',
+                'timing': f'{hours / 24:.1f} gün içinde'
+            }
+        else:
+            return {"error": "Critical crossing beyond planning window"}
+        
+        confidence = min(95.0, 50.0 + forecast.get('segment_samples', 0) * 2.5)
+        result['confidence'] = round(confidence, 2)
+        result['recommendation_type'] = 'irrigation_forecast'
+        
+        return result
+    
+    def generate_comprehensive_recommendations(self, current_data: Dict, forecast: Optional[Dict] = None) -> List[Dict]:
         recommendations = []
         
         irrigation_rec = self.generate_irrigation_recommendation(current_data)
@@ -346,6 +383,10 @@ class AgriculturalAIEngine:
         if 'error' not in pest_rec:
             recommendations.append(pest_rec)
         
+        forecast_rec = self.generate_forecast_recommendation(forecast)
+        if 'error' not in forecast_rec:
+            recommendations.append(forecast_rec)
+        
         return recommendations
     
     def save_models(self, filepath: str):
@@ -353,7 +394,7 @@ class AgriculturalAIEngine:
             'irrigation_model': self.irrigation_model,
             'fertilizer_model': self.fertilizer_model,
             'pest_model': self.pest_prediction_model,
-            'scaler': self.scaler
+            'scalers': self.scalers
         }
         
         joblib.dump(models, filepath)
@@ -365,7 +406,13 @@ class AgriculturalAIEngine:
             self.irrigation_model = models['irrigation_model']
             self.fertilizer_model = models['fertilizer_model']
             self.pest_prediction_model = models['pest_model']
-            self.scaler = models['scaler']
+            if 'scalers' in models:
+                self.scalers = models['scalers']
+            else:
+                # Files saved before per-model scalers kept a single one, last fitted on the pest features;
+                # it is reused for every model until the next retraining writes the new format.
+                logger.warning(f"{filepath} uses the old single-scaler format; retrain to refresh it")
+                self.scalers = {name: models['scaler'] for name in ('irrigation', 'fertilizer', 'pest')}
             self.is_trained = True
             logger.info(f"Models loaded from {filepath}")
             return True
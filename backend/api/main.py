@@ -1,17 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import hmac
 import logging
+import os
+import time
 
-from database.database import get_db, create_tables
+from database.database import get_db, create_tables, SessionLocal, profiler
+from database.profiler import SQLProfilerMiddleware
 from database.models import Node, SensorData, Recommendation, Alert, WeatherForecast, CropData
 from services.ai_service import AIRecommendationService
 from services.data_service import DataService
 from services.weather_service import WeatherService
+from services.weather_client import AsyncWeatherClient
+from services.weather_prefetch import WeatherPrefetcher
+from services.weather_recommendation_service import WeatherRecommendationPipeline
+from services.anomaly_service import StreamingAnomalyDetector
+from services.packet_dedup import PacketDeduplicator, NEW, BETTER
+from services.frame_decoder import FrameDecoder
+from services.admission import IngestAdmission, ADMITTED, COALESCED
+from services.liveness_service import NodeLivenessTracker
+from services.metrics import REGISTRY, RequestCounterMiddleware
+from services.sampling_profiler import SamplingProfiler, SamplingProfilerMiddleware
+from services.job_queue import JobQueue, create_broker
 from api.schemas import (
-    SensorDataCreate, SensorDataResponse, NodeResponse, 
+    SensorDataCreate, SensorDataBatch, SensorDataResponse, NodeResponse, 
     RecommendationResponse, AlertResponse, WeatherForecastResponse
 )
 
@@ -32,36 +49,261 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if profiler is not None:
+    app.add_middleware(SQLProfilerMiddleware, profiler=profiler)
+
+sampling_profiler = SamplingProfiler()
+app.add_middleware(SamplingProfilerMiddleware, profiler=sampling_profiler)
+
 ai_service = AIRecommendationService()
 data_service = DataService()
 weather_service = WeatherService()
+anomaly_detector = StreamingAnomalyDetector()
+frame_decoder = FrameDecoder()
+packet_dedup = PacketDeduplicator(
+    merge_window_seconds=float(os.getenv("DEDUP_MERGE_WINDOW_SECONDS", "30")),
+    ttl_seconds=float(os.getenv("DEDUP_TTL_SECONDS", "900"))
+)
+admission = IngestAdmission(
+    node_rate_per_minute=float(os.getenv("INGEST_NODE_RATE_PER_MINUTE", "6")),
+    node_burst=float(os.getenv("INGEST_NODE_BURST", "10")),
+    gateway_rate_per_minute=float(os.getenv("INGEST_GATEWAY_RATE_PER_MINUTE", "600")),
+    gateway_burst=float(os.getenv("INGEST_GATEWAY_BURST", "100")),
+    max_concurrent=int(os.getenv("INGEST_MAX_CONCURRENT", "32")),
+    mode=os.getenv("INGEST_ADMISSION_MODE", "drop")
+)
+liveness = NodeLivenessTracker(
+    late_after=float(os.getenv("LIVENESS_LATE_AFTER_INTERVALS", "2")),
+    offline_after=float(os.getenv("LIVENESS_OFFLINE_AFTER_INTERVALS", "4"))
+)
+weather_recommendations = WeatherRecommendationPipeline(weather_service, ai_service)
+weather_service.refresh_listeners.append(weather_recommendations.on_forecast)
+
+TREND_REFRESH_MINUTES = float(os.getenv("TREND_REFRESH_MINUTES", "60"))
+ANOMALY_CHECKPOINT_SECONDS = float(os.getenv("ANOMALY_CHECKPOINT_SECONDS", "60"))
+WEATHER_PREFETCH_SECONDS = float(os.getenv("WEATHER_PREFETCH_SECONDS", "600"))
+WEATHER_RATE_LIMIT_PER_MINUTE = float(os.getenv("WEATHER_RATE_LIMIT_PER_MINUTE", "60"))
+INGEST_COALESCE_FLUSH_SECONDS = float(os.getenv("INGEST_COALESCE_FLUSH_SECONDS", "60"))
+LIVENESS_TICK_SECONDS = float(os.getenv("LIVENESS_TICK_SECONDS", "30"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL", "sqlite:///./job_queue.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+MODEL_RETRAIN_HOURS = float(os.getenv("MODEL_RETRAIN_HOURS", "24"))
+
+job_queue = JobQueue(create_broker(JOB_QUEUE_URL), SessionLocal, trace=profiler.trace if profiler else None)
+job_queue.register("check_alerts", data_service.check_alerts, priority=10)
+job_queue.register("weather_refresh", weather_service.refresh_forecast, priority=5)
+job_queue.register("generate_recommendations", ai_service.generate_recommendations, priority=0)
+job_queue.register("retrain_models", ai_service.train_models, priority=-10, max_attempts=2, visibility_timeout=3600)
+weather_service.refresh_scheduler = lambda location, days: job_queue.enqueue(
+    "weather_refresh", dedup_key=f"weather:{location}:{days}", location=location, days=days
+)
+
+weather_client = AsyncWeatherClient(
+    weather_service.api_key, weather_service.base_url,
+    requests_per_minute=WEATHER_RATE_LIMIT_PER_MINUTE
+)
+weather_prefetcher = WeatherPrefetcher(weather_service, weather_client, interval_seconds=WEATHER_PREFETCH_SECONDS)
+
+INGEST_REQUESTS = REGISTRY.counter("ingest_requests_total", "Ingest requests by endpoint and response code", ["endpoint", "code"])
+INGEST_ROWS = REGISTRY.counter("ingest_rows_total", "Readings seen by ingest, by outcome", ["outcome"])
+INGEST_LATENCY = REGISTRY.histogram(
+    "ingest_latency_seconds", "Time from request arrival until its background work finished", ["endpoint"]
+)
+BACKGROUND_QUEUED = REGISTRY.gauge("background_tasks_queued", "Background tasks waiting to run", ["task"])
+BACKGROUND_SECONDS = REGISTRY.histogram("background_task_seconds", "Background task run time", ["task"])
+
+scheduled_tasks = []
+
+def run_with_session(job):
+    db = SessionLocal()
+    try:
+        if profiler is None:
+            return job(db)
+        with profiler.trace(f"job {job.__name__}"):
+            return job(db)
+    finally:
+        db.close()
+
+async def run_periodically(name: str, interval_seconds: float, job):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(job):
+                await job()
+            else:
+                await asyncio.to_thread(run_with_session, job)
+            logger.info(f"Scheduled job {name} finished in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.error(f"Scheduled job {name} failed: {e}")
+
+def collect_service_metrics():
+    cache = weather_service.cache.stats()
+    yield "weather_cache_lookups_total", "counter", "Forecast cache lookups by result", [
+        ({"result": "hit"}, cache['hits']),
+        ({"result": "stale"}, cache['stale_hits']),
+        ({"result": "miss"}, cache['misses'])
+    ]
+    yield "weather_cache_entries", "gauge", "Forecasts held in the cache", [({}, cache['entries'])]
+    
+    ingest = admission.stats()
+    yield "ingest_in_flight", "gauge", "Ingest requests holding an admission slot", [({}, ingest['in_flight'])]
+    yield "ingest_admission_total", "counter", "Admission decisions", [
+        ({"decision": key}, ingest[key]) for key in admission.counters
+    ]
+    
+    yield "nodes_by_liveness", "gauge", "Tracked nodes by liveness status", [
+        ({"status": status}, count) for status, count in liveness.stats().items()
+        if status not in ('tracked_nodes', 'heap_entries')
+    ]
+    
+    jobs = job_queue.broker.stats()
+    yield "jobs", "gauge", "Jobs in the durable queue by status", [
+        ({"status": status}, count) for status, count in jobs['by_status'].items()
+    ]
+    yield "jobs_pending_oldest_age_seconds", "gauge", "Age of the oldest pending job", [
+        ({"job": name}, pending['oldest_age_seconds']) for name, pending in jobs['pending_by_job'].items()
+    ]
+
+REGISTRY.add_collector(collect_service_metrics)
+
+app.add_middleware(RequestCounterMiddleware, counter=INGEST_REQUESTS, method="POST", path_prefix="/api/sensor-data")
+
+def track_task(background_tasks: BackgroundTasks, fn, *args):
+    name = fn.__name__
+    BACKGROUND_QUEUED.labels(name).inc()
+    background_tasks.add_task(run_tracked, name, fn, *args)
+
+def run_tracked(name: str, fn, *args):
+    BACKGROUND_QUEUED.labels(name).dec()
+    # Starlette stops running a response's background tasks at the first exception, which would
+    # skip finish_ingest and leak the admission slot, so a failing task must not raise.
+    try:
+        with BACKGROUND_SECONDS.labels(name).time():
+            fn(*args)
+    except Exception as e:
+        logger.error(f"Background task {name} failed: {e}")
+
+def finish_ingest(endpoint: str, started: float):
+    admission.release()
+    INGEST_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
 
 @app.on_event("startup")
 async def startup_event():
     create_tables()
     logger.info("Database tables created successfully")
+    
+    run_with_session(anomaly_detector.restore)
+    run_with_session(weather_service.compact_forecasts)
+    run_with_session(liveness.restore)
+    job_queue.start(JOB_WORKERS)
+    
+    if TREND_REFRESH_MINUTES > 0:
+        scheduled_tasks.append(asyncio.create_task(run_periodically(
+            "trend_refresh", TREND_REFRESH_MINUTES * 60, ai_service.refresh_trend_suggestions
+        )))
+    
+    scheduled_tasks.append(asyncio.create_task(run_periodically(
+        "anomaly_checkpoint", ANOMALY_CHECKPOINT_SECONDS, anomaly_detector.checkpoint
+    )))
+    
+    scheduled_tasks.append(asyncio.create_task(run_periodically(
+        "liveness", LIVENESS_TICK_SECONDS, liveness.tick
+    )))
+    
+    if MODEL_RETRAIN_HOURS > 0:
+        scheduled_tasks.append(asyncio.create_task(run_periodically(
+            "model_retraining", MODEL_RETRAIN_HOURS * 3600, enqueue_retraining
+        )))
+    
+    scheduled_tasks.append(asyncio.create_task(run_periodically(
+        "job_purge", 3600, purge_finished_jobs
+    )))
+    
+    if WEATHER_PREFETCH_SECONDS > 0:
+        scheduled_tasks.append(asyncio.create_task(weather_prefetcher.run()))
+    
+    if admission.mode == 'coalesce':
+        scheduled_tasks.append(asyncio.create_task(run_periodically(
+            "coalesced_ingest", INGEST_COALESCE_FLUSH_SECONDS, flush_coalesced_readings
+        )))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in scheduled_tasks:
+        task.cancel()
+    
+    run_with_session(anomaly_detector.checkpoint)
+    await weather_client.aclose()
+    await asyncio.to_thread(job_queue.stop)
+
+async def enqueue_retraining():
+    await asyncio.to_thread(job_queue.enqueue, "retrain_models", dedup_key="retrain_models")
+
+async def purge_finished_jobs():
+    purged = await asyncio.to_thread(job_queue.broker.purge, JOB_RETENTION_HOURS * 3600)
+    if purged:
+        logger.info(f"Purged {purged} finished jobs")
 
 @app.post("/api/sensor-data", response_model=dict)
 async def receive_sensor_data(
     data: SensorDataCreate, 
+    request: Request,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
+    started = time.perf_counter()
+    if not admit_reading(data.dict(), gateway_of(request)):
+        return {
+            "status": "throttled",
+            "message": "Node is sending faster than allowed; only its latest value will be stored",
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    enter_ingest()
     try:
-        sensor_data = data_service.save_sensor_data(db, data)
-        
-        background_tasks.add_task(
-            ai_service.generate_recommendations, 
-            db, data.node_id
+        decision, data_id = packet_dedup.admit(
+            data.node_id, data.timestamp, data.gateway_rssi, data.gateway_snr, data.received_time
         )
+        if decision != NEW:
+            if decision == BETTER:
+                data_service.update_reception(db, data_id, {
+                    'gateway_rssi': data.gateway_rssi,
+                    'gateway_snr': data.gateway_snr,
+                    'received_time': data.received_time
+                })
+            INGEST_ROWS.labels("duplicate").inc()
+            background_tasks.add_task(finish_ingest, "single", started)
+            return {
+                "status": "duplicate",
+                "message": "Packet already received through another gateway",
+                "data_id": data_id,
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        try:
+            sensor_data = data_service.save_sensor_data(db, data)
+        except Exception:
+            packet_dedup.release(data.node_id, data.timestamp)
+            raise
+        INGEST_ROWS.labels("stored").inc()
+        liveness.observe(data.node_id)
+        reception = packet_dedup.bind(data.node_id, data.timestamp, sensor_data.id)
+        if reception:
+            data_service.update_reception(db, sensor_data.id, reception)
+        
+        await asyncio.to_thread(enqueue_ingest_jobs, [sensor_data])
         
-        background_tasks.add_task(
-            data_service.check_alerts,
-            db, sensor_data.id
+        track_task(
+            background_tasks, anomaly_detector.observe_reading,
+            db, sensor_data
         )
         
         logger.info(f"Data received from node {data.node_id}")
         
+        background_tasks.add_task(finish_ingest, "single", started)
         return {
             "status": "success",
             "message": "Data received and processed",
@@ -70,9 +312,186 @@ async def receive_sensor_data(
         }
         
     except Exception as e:
+        finish_ingest("single", started)
         logger.error(f"Error processing sensor data: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def gateway_of(request: Request) -> str:
+    return request.headers.get("x-gateway-id") or (request.client.host if request.client else "unknown")
+
+def admit_reading(reading: dict, gateway_id: str) -> bool:
+    decision = admission.admit(reading['node_id'], gateway_id)
+    if decision == ADMITTED:
+        return True
+    INGEST_ROWS.labels("throttled").inc()
+    if decision == COALESCED:
+        admission.coalesce(reading)
+        return False
+    raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+def enter_ingest():
+    # Released by the last background task, so the cap also covers alert and AI work.
+    if not admission.try_acquire():
+        raise HTTPException(status_code=503, detail="Ingest is at capacity, retry later")
+
+async def flush_coalesced_readings():
+    readings = admission.take_coalesced()
+    if not readings:
+        return
+    
+    background_tasks = BackgroundTasks()
+    db = SessionLocal()
+    try:
+        await ingest_readings(db, background_tasks, readings)
+        await background_tasks()
+    finally:
+        db.close()
+
+async def ingest_readings(db: Session, background_tasks: BackgroundTasks, readings: List[dict]) -> Tuple[int, int]:
+    fresh = []
+    duplicates = 0
+    for data in readings:
+        decision, data_id = packet_dedup.admit(
+            data['node_id'], data.get('timestamp'), data.get('gateway_rssi'),
+            data.get('gateway_snr'), data.get('received_time')
+        )
+        if decision == NEW:
+            fresh.append(data)
+            continue
+        duplicates += 1
+        if decision == BETTER:
+            data_service.update_reception(db, data_id, {
+                'gateway_rssi': data.get('gateway_rssi'),
+                'gateway_snr': data.get('gateway_snr'),
+                'received_time': data.get('received_time')
+            })
+    
+    try:
+        rows = data_service.save_sensor_data_batch(db, fresh)
+    except Exception:
+        for data in fresh:
+            packet_dedup.release(data['node_id'], data.get('timestamp'))
+        raise
+    for sensor_data in rows:
+        liveness.observe(sensor_data.node_id)
+        reception = packet_dedup.bind(sensor_data.node_id, sensor_data.timestamp, sensor_data.id)
+        if reception:
+            data_service.update_reception(db, sensor_data.id, reception)
+    
+    for sensor_data in rows:
+        track_task(background_tasks, anomaly_detector.observe_reading, db, sensor_data)
+    
+    nodes = await asyncio.to_thread(enqueue_ingest_jobs, rows)
+    
+    INGEST_ROWS.labels("stored").inc(len(rows))
+    INGEST_ROWS.labels("duplicate").inc(duplicates)
+    logger.info(f"Batch of {len(rows)} readings received from {nodes} nodes")
+    return len(rows), duplicates
+
+def enqueue_ingest_jobs(rows: List[SensorData]) -> int:
+    # Runs in a worker thread: the broker write is a blocking SQLite commit.
+    # A backlog only needs alerts and recommendations for the newest reading per node.
+    latest = {sensor_data.node_id: sensor_data for sensor_data in rows}
+    job_queue.enqueue_many("check_alerts", [
+        (None, {"sensor_data_id": sensor_data.id}) for sensor_data in latest.values()
+    ])
+    job_queue.enqueue_many("generate_recommendations", [
+        (f"recommendations:{node_id}", {"node_id": node_id}) for node_id in latest
+    ])
+    return len(latest)
+
+@app.post("/api/sensor-data/batch", response_model=dict)
+async def receive_sensor_data_batch(
+    batch: SensorDataBatch,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    started = time.perf_counter()
+    # Batches are relayed backlogs, so only the sending gateway is rate limited, not each node.
+    if admission.admit(None, gateway_of(request)) != ADMITTED:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    
+    enter_ingest()
+    try:
+        received, duplicates = await ingest_readings(db, background_tasks, [data.dict() for data in batch.readings])
+        
+        background_tasks.add_task(finish_ingest, "batch", started)
+        return {
+            "status": "success",
+            "message": "Batch received and processed",
+            "received": received,
+            "duplicates": duplicates,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        finish_ingest("batch", started)
+        logger.error(f"Error processing sensor data batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post("/api/sensor-data/raw", response_model=dict)
+async def receive_raw_frames(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    started = time.perf_counter()
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/octet-stream"):
+        frames = frame_decoder.decode_binary(body)
+    else:
+        frames = frame_decoder.decode_text(body)
+    
+    INGEST_ROWS.labels("rejected").inc(len(frames.errors))
+    if frames.errors and not frames.node_ids:
+        raise HTTPException(status_code=400, detail=[
+            {"line": line_no, "error": error} for line_no, error in frames.errors
+        ])
+    
+    # One upload is one request from the gateway however many frames it carries, as with /batch;
+    # each node is still limited per frame.
+    if admission.admit(None, gateway_of(request)) != ADMITTED:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    
+    readings = []
+    throttled = []
+    coalesced = []
+    rows = frames.to_rows(received_time=request.headers.get("x-received-time"))
+    for line_no, reading in zip(frames.line_numbers, rows):
+        decision = admission.admit_node(reading['node_id'])
+        if decision == ADMITTED:
+            readings.append(reading)
+            continue
+        INGEST_ROWS.labels("throttled").inc()
+        frame = {"line": line_no, "node_id": reading['node_id']}
+        if decision == COALESCED:
+            admission.coalesce(reading)
+            coalesced.append(frame)
+        else:
+            throttled.append(frame)
+    
+    enter_ingest()
+    try:
+        received, duplicates = await ingest_readings(db, background_tasks, readings)
+        
+        background_tasks.add_task(finish_ingest, "raw", started)
+        return {
+            "status": "success",
+            "message": "Frames received and processed",
+            "received": received,
+            "duplicates": duplicates,
+            "throttled": throttled,
+            "coalesced": coalesced,
+            "rejected": [{"line": line_no, "error": error} for line_no, error in frames.errors],
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        finish_ingest("raw", started)
+        logger.error(f"Error processing raw frames: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/api/nodes", response_model=List[NodeResponse])
 async def get_nodes(db: Session = Depends(get_db)):
     nodes = db.query(Node).all()
@@ -85,6 +504,76 @@ async def get_node(node_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Node not found")
     return node
 
+@app.get("/api/ingest/stats")
+async def get_ingest_stats():
+    return admission.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Collectors include the job broker's status counts, a SQLite query over the retained jobs.
+    body = await asyncio.to_thread(REGISTRY.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+def require_admin(request: Request):
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/api/debug/sql-profile", dependencies=[Depends(require_admin)])
+async def get_sql_profile(limit: int = 20, reset: bool = False):
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="SQL profiling is disabled, set SQL_PROFILE=1")
+    summary = profiler.summary(limit)
+    if reset:
+        profiler.reset()
+    return summary
+
+@app.post("/api/debug/profiler/start", dependencies=[Depends(require_admin)])
+async def start_sampling_profiler(
+    seconds: Optional[float] = None,
+    requests: Optional[int] = None,
+    interval_ms: float = 5.0
+):
+    if seconds is None and requests is None:
+        seconds = 30.0
+    if not sampling_profiler.start(seconds=seconds, requests=requests, interval_ms=interval_ms):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return sampling_profiler.status()
+
+@app.post("/api/debug/profiler/stop", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def stop_sampling_profiler():
+    await asyncio.to_thread(sampling_profiler.stop)
+    return PlainTextResponse(sampling_profiler.collapsed())
+
+@app.get("/api/debug/profiler", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def get_sampling_profile():
+    if sampling_profiler.active:
+        raise HTTPException(status_code=409, detail="Profiler is still running")
+    return PlainTextResponse(sampling_profiler.collapsed())
+
+@app.get("/api/debug/profiler/status", dependencies=[Depends(require_admin)])
+async def get_sampling_profiler_status():
+    return sampling_profiler.status()
+
+@app.get("/api/jobs/stats")
+async def get_job_stats():
+    return await asyncio.to_thread(job_queue.stats)
+
+@app.get("/api/liveness")
+async def get_liveness():
+    return liveness.stats()
+
+@app.get("/api/link-stats")
+async def get_link_stats():
+    return packet_dedup.all_stats()
+
+@app.get("/api/link-stats/{node_id}")
+async def get_node_link_stats(node_id: str):
+    stats = packet_dedup.node_stats(node_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No packets seen from this node")
+    return stats
+
 @app.get("/api/sensor-data/{node_id}", response_model=List[SensorDataResponse])
 async def get_node_sensor_data(
     node_id: str, 
@@ -143,7 +632,8 @@ async def get_weather_forecast(
     days: int = 7,
     db: Session = Depends(get_db)
 ):
-    forecast = weather_service.get_forecast(db, location, days)
+    # A cache miss waits on the upstream API (or on another request's fetch); keep that off the event loop.
+    forecast = await asyncio.to_thread(weather_service.get_forecast, db, location, days)
     return forecast
 
 @app.get("/api/analytics/dashboard")
@@ -155,11 +645,35 @@ async def get_dashboard_data(db: Session = Depends(get_db)):
 async def get_trends(
     node_id: str,
     days: int = 30,
+    interval: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    trends = data_service.get_trends(db, node_id, days)
+    try:
+        trends = data_service.get_trends(db, node_id, days, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return trends
 
+@app.get("/api/analytics/trend-analysis/{node_id}")
+async def get_trend_analysis(node_id: str, db: Session = Depends(get_db)):
+    results = ai_service.trend_engine.compute(db, node_ids=[node_id])
+    if node_id not in results:
+        raise HTTPException(status_code=404, detail="No recent data for node")
+    
+    return {"node_id": node_id, "windows": results[node_id]}
+
+@app.get("/api/irrigation-forecast")
+async def get_irrigation_forecasts(db: Session = Depends(get_db)):
+    forecasts = ai_service.irrigation_forecaster.get_forecasts(db)
+    return list(forecasts.values())
+
+@app.get("/api/irrigation-forecast/{node_id}")
+async def get_irrigation_forecast(node_id: str, db: Session = Depends(get_db)):
+    forecast = ai_service.irrigation_forecaster.get_node_forecast(db, node_id)
+    if not forecast:
+        raise HTTPException(status_code=404, detail="Not enough recent soil moisture data")
+    return forecast
+
 @app.post("/api/crops/{node_id}")
 async def register_crop(
     node_id: str,
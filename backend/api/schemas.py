@@ -22,6 +22,9 @@ class SensorDataBase(BaseModel):
 class SensorDataCreate(SensorDataBase):
     pass
 
+class SensorDataBatch(BaseModel):
+    readings: List[SensorDataCreate]
+
 class SensorDataResponse(SensorDataBase):
     id: int
     created_at: datetime
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from ai_model.ai_recommendation_engine import (
+    AgriculturalAIEngine, IRRIGATION_FEATURES, FERTILIZER_FEATURES, PEST_FEATURES
+)
+from benchmarks.synthetic_data import SyntheticSensorDataGenerator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+MODELS = {
+    'irrigation': ('train_irrigation_model', 'irrigation_model', IRRIGATION_FEATURES,
+                   'generate_irrigation_recommendation'),
+    'fertilizer': ('train_fertilizer_model', 'fertilizer_model', FERTILIZER_FEATURES,
+                   'generate_fertilizer_recommendation'),
+    'pest': ('train_pest_prediction_model', 'pest_prediction_model', PEST_FEATURES,
+             'generate_pest_recommendation')
+}
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 4),
+        'p99_ms': round(float(np.percentile(values, 99)), 4),
+        'mean_ms': round(float(values.mean()), 4),
+        'samples': len(values)
+    }
+
+def measure(fn: Callable, trace_memory: bool = True) -> Dict:
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'value': value, 'seconds': elapsed, 'peak_bytes': peak}
+
+class AIEngineBenchmark:
+    def __init__(
+        self,
+        n_nodes: int = 15,
+        seed: int = 42,
+        single_iterations: int = 200,
+        batch_size: int = 1000,
+        batch_iterations: int = 50,
+        trace_memory: bool = True
+    ):
+        self.n_nodes = n_nodes
+        self.seed = seed
+        self.single_iterations = single_iterations
+        self.batch_size = batch_size
+        self.batch_iterations = batch_iterations
+        self.trace_memory = trace_memory
+        self.generator = SyntheticSensorDataGenerator(seed=seed)
+
+    def run(self, sizes: List[int]) -> Dict:
+        results = []
+        for size in sizes:
+            logger.info(f"Benchmarking AgriculturalAIEngine with {size} rows")
+            results.append(self.run_size(size))
+
+        return {
+            'benchmark': 'ai_engine',
+            'created_at': datetime.utcnow().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'sklearn': sklearn.__version__
+            },
+            'config': {
+                'n_nodes': self.n_nodes,
+                'seed': self.seed,
+                'single_iterations': self.single_iterations,
+                'batch_size': self.batch_size,
+                'batch_iterations': self.batch_iterations
+            },
+            'results': results
+        }
+
+    def run_size(self, size: int) -> Dict:
+        raw = self.generator.generate(size, self.n_nodes)
+        training_input = {column: raw[column] for column in (
+            'temperature', 'humidity', 'soil_moisture', 'soil_ph',
+            'light_intensity', 'pressure', 'rainfall', 'timestamp'
+        )}
+
+        engine = AgriculturalAIEngine()
+        prepared = measure(lambda: engine.prepare_training_data(training_input), self.trace_memory)
+        df = prepared['value']
+
+        result = {
+            'rows': size,
+            'prepare_training_data': {
+                'seconds': round(prepared['seconds'], 4),
+                'rows_per_second': round(size / prepared['seconds'], 1) if prepared['seconds'] else None,
+                'peak_bytes': prepared['peak_bytes']
+            },
+            'models': {}
+        }
+
+        current_rows = df.sample(n=min(self.single_iterations, len(df)), random_state=self.seed, replace=True)
+        batch = df.sample(n=min(self.batch_size, len(df)), random_state=self.seed, replace=True)
+
+        for name, (train_method, model_attr, features, recommend_method) in MODELS.items():
+            trained = measure(lambda: getattr(engine, train_method)(df), self.trace_memory)
+
+            model = getattr(engine, model_attr)
+            scaler = engine.scalers[name]
+
+            single = []
+            for record in current_rows.to_dict('records'):
+                started = time.perf_counter()
+                getattr(engine, recommend_method)(record)
+                single.append(time.perf_counter() - started)
+
+            X = batch[features].fillna(batch[features].mean()).values
+            batched = []
+            for _ in range(self.batch_iterations):
+                started = time.perf_counter()
+                model.predict(scaler.transform(X))
+                batched.append(time.perf_counter() - started)
+
+            batch_stats = percentiles(batched)
+            batch_stats['batch_size'] = len(X)
+            batch_stats['rows_per_second'] = round(len(X) / np.median(batched), 1)
+
+            result['models'][name] = {
+                'train_seconds': round(trained['seconds'], 4),
+                'train_peak_bytes': trained['peak_bytes'],
+                'accuracy': round(float(trained['value']), 4),
+                'single_inference': percentiles(single),
+                'batch_inference': batch_stats
+            }
+
+        return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AgriculturalAIEngine against synthetic sensor data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--nodes', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--single-iterations', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--batch-iterations', type=int, default=50)
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc peak-memory tracking")
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    benchmark = AIEngineBenchmark(
+        n_nodes=args.nodes,
+        seed=args.seed,
+        single_iterations=args.single_iterations,
+        batch_size=args.batch_size,
+        batch_iterations=args.batch_iterations,
+        trace_memory=not args.no_memory
+    )
+    report = benchmark.run(args.sizes)
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"ai_engine_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for row in report['results']:
+        models = ', '.join(
+            f"{name}: train {m['train_seconds']}s, acc {m['accuracy']}, "
+            f"p50 {m['single_inference']['p50_ms']}ms"
+            for name, m in row['models'].items()
+        )
+        print(f"{row['rows']:>10} rows | prepare {row['prepare_training_data']['rows_per_second']} rows/s | {models}")
+
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.bulk_loader import BulkLoader, column_chunks, to_datetime_strings
+from database.models import Base, Node, SensorData, Alert
+from database.upsert import upsert_rows
+from benchmarks.synthetic_data import NODE_PROFILES, SyntheticSensorDataGenerator, node_ids_for, node_type_of
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365 * 86400
+
+SENSOR_COLUMNS = ['node_id', 'temperature', 'humidity', 'soil_moisture', 'soil_ph', 'soil_temperature',
+                  'light_intensity', 'pressure', 'altitude', 'rainfall', 'is_raining', 'timestamp',
+                  'received_time', 'gateway_rssi', 'gateway_snr', 'created_at']
+
+ALERT_TYPES = [
+    ('high_temperature', 'Yüksek sıcaklık uyarısı', 'warning'),
+    ('low_soil_moisture', 'Düşük toprak nemi uyarısı', 'critical'),
+    ('high_humidity', 'Yüksek nem uyarısı', 'warning')
+]
+
+class SyntheticDatasetBuilder:
+    def __init__(
+        self,
+        engine,
+        n_nodes: int = 50,
+        end_time: Optional[float] = None,
+        seed: int = 42,
+        chunk_size: int = 50000,
+        alert_rate: float = 0.0005
+    ):
+        self.engine = engine
+        self.node_ids = node_ids_for(n_nodes)
+        self.generator = SyntheticSensorDataGenerator(seed=seed)
+        self.loader = BulkLoader(engine, chunk_size=chunk_size)
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+        self.alert_rate = alert_rate
+
+        self.end_time = end_time or time.time()
+        # History grows backwards from end_time, so the newest data is always "now" whatever the size.
+        self.cursor = self.end_time
+        self.rows_per_second = sum(1.0 / NODE_PROFILES[node_type_of(n)]['interval_seconds'] for n in self.node_ids)
+
+    def ensure_schema(self):
+        Base.metadata.create_all(bind=self.engine)
+        db = sessionmaker(bind=self.engine)()
+        try:
+            upsert_rows(db, Node, [
+                {
+                    'node_id': node_id,
+                    'node_type': node_type_of(node_id),
+                    'location': f"Tarla {i % 8 + 1}",
+                    'last_seen': datetime.utcfromtimestamp(self.end_time),
+                    'status': 'active'
+                }
+                for i, node_id in enumerate(self.node_ids)
+            ], ['node_id'], ['node_type', 'last_seen'])
+            db.commit()
+        finally:
+            db.close()
+
+    def extend(self, n_rows: int) -> int:
+        if n_rows <= 0:
+            return 0
+
+        span = n_rows / self.rows_per_second
+        oldest = self.cursor - span
+        alerts: List[Dict[str, np.ndarray]] = []
+
+        loaded = self.loader.load_rows(
+            SensorData.__table__, SENSOR_COLUMNS, self._sensor_chunks(oldest, self.cursor, alerts), defer_indexes=True
+        )
+        self.cursor = oldest
+
+        if alerts:
+            self.loader.load_columns(Alert.__table__, {
+                name: np.concatenate([columns[name] for columns in alerts]) for name in alerts[0]
+            })
+        return loaded
+
+    def extend_years(self, years: float) -> int:
+        return self.extend(int(years * SECONDS_PER_YEAR * self.rows_per_second))
+
+    def _sensor_chunks(self, oldest: float, newest: float, alerts: List[Dict[str, np.ndarray]]) -> Iterable[List[tuple]]:
+        window = self.chunk_size / self.rows_per_second
+        window_end = newest
+        while window_end > oldest:
+            window_start = max(oldest, window_end - window)
+            columns = self.generator.generate_window(self.node_ids, window_start, window_end)
+            window_end = window_start
+            n = len(columns['epoch'])
+            if n == 0:
+                continue
+
+            received = columns['epoch'] + self.rng.uniform(0.2, 2.0, n)
+            columns['created_at'] = to_datetime_strings(received)
+            columns['received_time'] = columns['created_at']
+            columns['gateway_rssi'] = np.rint(self.rng.normal(-95, 12, n)).astype(np.int64)
+            columns['gateway_snr'] = np.round(self.rng.normal(6, 4, n), 1)
+
+            alerts.append(self._alerts_for(columns))
+            yield from column_chunks(columns, SENSOR_COLUMNS, self.chunk_size)
+
+    def _alerts_for(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        picked = np.flatnonzero(self.rng.random(len(columns['epoch'])) < self.alert_rate)
+        kinds = self.rng.integers(0, len(ALERT_TYPES), len(picked))
+        return {
+            'node_id': columns['node_id'][picked],
+            'alert_type': np.array([ALERT_TYPES[k][0] for k in kinds], dtype=object),
+            'message': np.array([ALERT_TYPES[k][1] for k in kinds], dtype=object),
+            'severity': np.array([ALERT_TYPES[k][2] for k in kinds], dtype=object),
+            # Old alerts are mostly handled; keep a realistic tail of open ones.
+            'is_active': self.rng.random(len(picked)) < 0.1,
+            'acknowledged': self.rng.random(len(picked)) < 0.5,
+            'created_at': columns['created_at'][picked]
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic multi-year sensor history into the database")
+    parser.add_argument('--db', default=os.getenv("DATABASE_URL", "sqlite:///./agricultural_monitoring.db"))
+    parser.add_argument('--nodes', type=int, default=50)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--years', type=float, default=None)
+    group.add_argument('--rows', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--alert-rate', type=float, default=0.0005, help="Fraction of readings that get an alert row")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    engine = create_engine(args.db)
+    builder = SyntheticDatasetBuilder(
+        engine, n_nodes=args.nodes, seed=args.seed, chunk_size=args.chunk_size, alert_rate=args.alert_rate
+    )
+    builder.ensure_schema()
+
+    started = time.perf_counter()
+    if args.rows is not None:
+        loaded = builder.extend(args.rows)
+    else:
+        loaded = builder.extend_years(args.years if args.years is not None else 1.0)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Loaded {loaded} readings for {args.nodes} nodes "
+        f"({datetime.utcfromtimestamp(builder.cursor).date()} .. {datetime.utcfromtimestamp(builder.end_time).date()}) "
+        f"in {elapsed:.1f}s, {loaded / max(elapsed, 1e-9):.0f} rows/s"
+    )
+
+if __name__ == "__main__":
+    main()
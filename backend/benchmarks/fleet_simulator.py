@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import os
+import platform
+import random
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.synthetic_data import NODE_PROFILES, SyntheticSensorDataGenerator, node_ids_for, node_type_of
+
+logger = logging.getLogger(__name__)
+
+TARGETS = {
+    'backend': {'url': 'http://localhost:8000', 'modes': ('single', 'batch', 'raw')},
+    'gateway': {'url': 'http://localhost:8080', 'modes': ('single',)}
+}
+
+# Field order of the canonical frame layout plus the reception fields (services/frame_decoder.py).
+RAW_FIELDS = ('temperature', 'humidity', 'soil_moisture', 'soil_ph', 'soil_temperature', 'light_intensity',
+              'pressure', 'altitude', 'rainfall', 'is_raining', 'timestamp', 'gateway_rssi', 'gateway_snr')
+
+GATEWAY_FIELDS = {
+    'temperature': 'temperature', 'humidity': 'humidity', 'soil_moisture': 'soilMoisture',
+    'soil_ph': 'soilPh', 'soil_temperature': 'soilTemperature', 'light_intensity': 'lightIntensity',
+    'pressure': 'pressure', 'altitude': 'altitude', 'rainfall': 'rainfall', 'is_raining': 'isRaining',
+    'timestamp': 'timestamp', 'received_time': 'receivedTime', 'gateway_rssi': 'gatewayRSSI',
+    'gateway_snr': 'gatewaySNR'
+}
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {'samples': 0}
+    values = np.asarray(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3),
+        'mean_ms': round(float(values.mean()), 3),
+        'samples': len(values)
+    }
+
+class DatabaseProbe:
+    def __init__(self, url: Optional[str]):
+        self.url = url
+        self.engine = None
+        if url:
+            self.engine = create_engine(url if '://' in url else f"sqlite:///{url}")
+
+    def snapshot(self) -> Optional[Dict]:
+        if self.engine is None:
+            return None
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("SELECT COUNT(*) FROM sensor_data")).scalar()
+            if self.engine.dialect.name == 'postgresql':
+                size = conn.execute(text("SELECT pg_database_size(current_database())")).scalar()
+            else:
+                path = self.engine.url.database
+                size = sum(os.path.getsize(p) for p in (path, path + '-wal') if os.path.exists(p))
+        return {'sensor_rows': rows, 'bytes': size}
+
+    def register_nodes(self, node_ids: List[str]):
+        # The backend only stores readings for known nodes (sensor_data.node_id is a foreign key).
+        from database.models import Node
+        from database.upsert import upsert_rows
+
+        db = sessionmaker(bind=self.engine)()
+        try:
+            upsert_rows(db, Node, [
+                {'node_id': node_id, 'node_type': node_type_of(node_id), 'location': 'Simülasyon', 'status': 'active'}
+                for node_id in node_ids
+            ], ['node_id'], ['node_type'])
+            db.commit()
+        finally:
+            db.close()
+
+class FleetSimulator:
+    def __init__(
+        self,
+        target: str = 'backend',
+        url: Optional[str] = None,
+        mode: str = 'single',
+        n_nodes: int = 1000,
+        duration: float = 60.0,
+        time_scale: float = 1.0,
+        rate: Optional[float] = None,
+        concurrency: int = 32,
+        batch_size: int = 100,
+        gateways: int = 0,
+        seed: int = 42,
+        samples_per_node: int = 64
+    ):
+        if mode not in TARGETS[target]['modes']:
+            raise ValueError(f"Mode {mode} is not supported by the {target} target")
+
+        self.target = target
+        self.url = (url or TARGETS[target]['url']).rstrip('/')
+        self.mode = mode
+        self.n_nodes = n_nodes
+        self.duration = duration
+        self.time_scale = time_scale
+        self.rate = rate
+        self.concurrency = concurrency
+        self.batch_size = batch_size if mode != 'single' else 1
+        self.gateways = gateways or max(1, n_nodes // 100)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.node_ids = node_ids_for(n_nodes)
+        self.intervals = self._intervals()
+        self.boot_times = [self.rng.uniform(0, 86400) for _ in range(n_nodes)]
+        self.samples_per_node = samples_per_node
+        self.readings = SyntheticSensorDataGenerator(seed=seed).generate(n_nodes * samples_per_node, n_nodes)
+
+        self.latencies: List[float] = []
+        self.lag: List[float] = []
+        self.statuses: Counter = Counter()
+        self.sent_readings = 0
+        self.accepted_readings = 0
+        self.max_queue_depth = 0
+
+    def _intervals(self) -> List[float]:
+        if self.rate:
+            # A fixed offered load overrides the firmware intervals; every node reports equally often.
+            return [self.n_nodes / self.rate] * self.n_nodes
+        return [NODE_PROFILES[node_type_of(n)]['interval_seconds'] / self.time_scale for n in self.node_ids]
+
+    def offered_rate(self) -> float:
+        return sum(1.0 / interval for interval in self.intervals)
+
+    def reading(self, index: int, sample: int, now: float) -> dict:
+        row = index + (sample % self.samples_per_node) * self.n_nodes
+        reading = {'node_id': self.node_ids[index]}
+        for field in ('temperature', 'humidity', 'soil_moisture', 'soil_ph', 'soil_temperature',
+                      'light_intensity', 'pressure', 'altitude', 'rainfall', 'is_raining'):
+            value = self.readings[field][row].item()
+            if isinstance(value, float) and np.isnan(value):
+                continue
+            reading[field] = round(value, 2) if isinstance(value, float) else value
+        reading['timestamp'] = int((now - self.started + self.boot_times[index]) * 1000)
+        reading['gateway_rssi'] = int(self.rng.gauss(-95, 12))
+        reading['gateway_snr'] = round(self.rng.gauss(6, 4), 1)
+        reading['received_time'] = datetime.utcnow().isoformat()
+        return reading
+
+    def request_for(self, readings: List[dict]):
+        if self.target == 'gateway':
+            payload = {GATEWAY_FIELDS[k]: v for k, v in readings[0].items() if k in GATEWAY_FIELDS}
+            payload['nodeId'] = readings[0]['node_id']
+            return '/api/sensor-data', {'json': payload}
+        if self.mode == 'single':
+            return '/api/sensor-data', {'json': readings[0]}
+        if self.mode == 'batch':
+            return '/api/sensor-data/batch', {'json': {'readings': readings}}
+        lines = [
+            '|'.join([r['node_id']] + [str(int(r[f]) if isinstance(r.get(f), bool) else r.get(f, 0)) for f in RAW_FIELDS])
+            for r in readings
+        ]
+        return '/api/sensor-data/raw', {
+            'content': '\n'.join(lines).encode(),
+            'headers': {'content-type': 'text/plain'}
+        }
+
+    async def produce(self, queue: asyncio.Queue):
+        # Deadline heap: each node is pushed back with its next due time, so scheduling is O(log n) per reading.
+        due = [(self.started + self.rng.uniform(0, interval), i, 0) for i, interval in enumerate(self.intervals)]
+        heapq.heapify(due)
+        end = self.started + self.duration
+
+        while due and due[0][0] < end:
+            deadline, index, sample = heapq.heappop(due)
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = time.perf_counter()
+            self.lag.append(max(0.0, now - deadline))
+            await queue.put(self.reading(index, sample, now))
+            self.max_queue_depth = max(self.max_queue_depth, queue.qsize())
+            heapq.heappush(due, (deadline + self.intervals[index], index, sample + 1))
+
+        for _ in range(self.concurrency):
+            await queue.put(None)
+
+    async def consume(self, client: httpx.AsyncClient, queue: asyncio.Queue, worker: int):
+        while True:
+            reading = await queue.get()
+            if reading is None:
+                return
+            readings = [reading]
+            while len(readings) < self.batch_size and not queue.empty():
+                extra = queue.get_nowait()
+                if extra is None:
+                    queue.put_nowait(None)
+                    break
+                readings.append(extra)
+
+            path, kwargs = self.request_for(readings)
+            headers = kwargs.pop('headers', {})
+            # Spread nodes over gateways the way a deployment would, so per-gateway limits apply realistically.
+            headers['x-gateway-id'] = f"sim-gw-{zlib.crc32(readings[0]['node_id'].encode()) % self.gateways}"
+
+            started = time.perf_counter()
+            try:
+                response = await client.post(self.url + path, headers=headers, **kwargs)
+                self.latencies.append(time.perf_counter() - started)
+                self.statuses[str(response.status_code)] += 1
+                if response.status_code == 200:
+                    body = response.json()
+                    self.accepted_readings += body.get('received', 1 if body.get('status') == 'success' else 0)
+            except httpx.HTTPError as e:
+                self.statuses[f"error:{type(e).__name__}"] += 1
+            self.sent_readings += len(readings)
+
+    async def run(self) -> Dict:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * self.batch_size * 4)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+            self.started = time.perf_counter()
+            await asyncio.gather(
+                self.produce(queue),
+                *(self.consume(client, queue, i) for i in range(self.concurrency))
+            )
+            elapsed = time.perf_counter() - self.started
+
+        requests = sum(self.statuses.values())
+        errors = requests - self.statuses.get('200', 0)
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'offered_readings_per_second': round(self.offered_rate(), 2),
+            'sent_readings': self.sent_readings,
+            'accepted_readings': self.accepted_readings,
+            'readings_per_second': round(self.accepted_readings / elapsed, 2) if elapsed else None,
+            'requests': requests,
+            'requests_per_second': round(requests / elapsed, 2) if elapsed else None,
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'status_codes': dict(self.statuses),
+            'latency': latency_stats(self.latencies),
+            'schedule_lag': latency_stats(self.lag),
+            'max_queue_depth': self.max_queue_depth
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a LoRa node fleet against the backend or gateway ingest API")
+    parser.add_argument('--target', choices=list(TARGETS), default='backend')
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--mode', choices=['single', 'batch', 'raw'], default='single')
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help="Divide firmware report intervals by this factor (600 turns 10 min into 1 s)")
+    parser.add_argument('--rate', type=float, default=None, help="Fixed total readings per second, overrides --time-scale")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--gateways', type=int, default=0, help="Distinct X-Gateway-Id values (default one per 100 nodes)")
+    parser.add_argument('--db', default=None, help="SQLite path or database URL the target writes to, for growth stats")
+    parser.add_argument('--register-nodes', action='store_true', help="Upsert simulated nodes into --db before the run")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    simulator = FleetSimulator(
+        target=args.target,
+        url=args.url,
+        mode=args.mode,
+        n_nodes=args.nodes,
+        duration=args.duration,
+        time_scale=args.time_scale,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        gateways=args.gateways,
+        seed=args.seed
+    )
+    probe = DatabaseProbe(args.db)
+    if args.register_nodes:
+        if probe.engine is None:
+            parser.error("--register-nodes needs --db")
+        probe.register_nodes(simulator.node_ids)
+
+    logger.info(
+        f"Simulating {args.nodes} nodes against {simulator.url} ({args.mode}) "
+        f"at {simulator.offered_rate():.1f} readings/s for {args.duration}s"
+    )
+    before = probe.snapshot()
+    result = asyncio.run(simulator.run())
+    after = probe.snapshot()
+
+    if before and after:
+        added_rows = after['sensor_rows'] - before['sensor_rows']
+        result['db_growth'] = {
+            'before': before,
+            'after': after,
+            'rows_added': added_rows,
+            'bytes_added': after['bytes'] - before['bytes'],
+            'bytes_per_row': round((after['bytes'] - before['bytes']) / added_rows, 1) if added_rows else None
+        }
+
+    report = {
+        'benchmark': 'fleet_simulator',
+        'created_at': datetime.utcnow().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'result': result
+    }
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"fleet_{args.target}_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    latency = result['latency']
+    print(
+        f"{result['readings_per_second']} readings/s accepted of {result['offered_readings_per_second']} offered | "
+        f"{result['requests_per_second']} req/s | p50 {latency.get('p50_ms')}ms p95 {latency.get('p95_ms')}ms "
+        f"p99 {latency.get('p99_ms')}ms | errors {result['error_rate']:.2%} {result['status_codes']}"
+    )
+    if 'db_growth' in result:
+        growth = result['db_growth']
+        print(f"DB grew by {growth['rows_added']} rows, {growth['bytes_added']} bytes ({growth['bytes_per_row']} B/row)")
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
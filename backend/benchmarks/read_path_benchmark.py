@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import sqlalchemy
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.ai_engine_benchmark import percentiles
+from benchmarks.dataset_builder import SyntheticDatasetBuilder
+from services.data_service import DataService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+class ReadPathBenchmark:
+    def __init__(self, db_url: str, n_nodes: int = 50, seed: int = 42, repeat: int = 20, endpoints: bool = True):
+        self.db_url = db_url
+        self.engine = create_engine(db_url)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.builder = SyntheticDatasetBuilder(self.engine, n_nodes=n_nodes, seed=seed)
+        self.n_nodes = n_nodes
+        self.seed = seed
+        self.repeat = repeat
+        self.endpoints = endpoints
+        self.data_service = DataService()
+        self.node_id = self.builder.node_ids[0]
+        self.client = self._client() if endpoints else None
+
+    def _client(self):
+        from fastapi.testclient import TestClient
+        from api.main import app
+        from database.database import get_db
+
+        def get_benchmark_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # Without a context manager the app's startup jobs (weather prefetch, schedulers) never run.
+        app.dependency_overrides[get_db] = get_benchmark_db
+        return TestClient(app)
+
+    def service_cases(self) -> Dict[str, Callable]:
+        ds, node_id = self.data_service, self.node_id
+        return {
+            'get_node_data': lambda db: ds.get_node_data(db, node_id, limit=100),
+            'get_node_data_24h': lambda db: ds.get_node_data(db, node_id, limit=1000, hours=24),
+            'get_latest_data': lambda db: ds.get_latest_data(db),
+            'get_trends_30d': lambda db: ds.get_trends(db, node_id, days=30),
+            'get_trends_365d_1d': lambda db: ds.get_trends(db, node_id, days=365, interval='1d'),
+            'get_dashboard_analytics': lambda db: ds.get_dashboard_analytics(db),
+            'get_alerts': lambda db: ds.get_alerts(db)
+        }
+
+    def endpoint_cases(self) -> Dict[str, str]:
+        return {
+            'GET /api/sensor-data/{node_id}': f"/api/sensor-data/{self.node_id}",
+            'GET /api/latest-data': "/api/latest-data",
+            'GET /api/analytics/trends/{node_id}': f"/api/analytics/trends/{self.node_id}",
+            'GET /api/analytics/dashboard': "/api/analytics/dashboard",
+            'GET /api/alerts': "/api/alerts"
+        }
+
+    def time_case(self, fn: Callable) -> Dict:
+        fn()
+        samples = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+        return percentiles(samples)
+
+    def run(self, sizes: List[int]) -> Dict:
+        self.builder.ensure_schema()
+        results = []
+        for size in sorted(sizes):
+            current = self.row_count()
+            logger.info(f"Growing dataset from {current} to {size} rows")
+            load_started = time.perf_counter()
+            loaded = self.builder.extend(size - current)
+            load_seconds = time.perf_counter() - load_started
+            results.append(self.run_size(size, loaded, load_seconds))
+
+        return {
+            'benchmark': 'read_path',
+            'created_at': datetime.utcnow().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'sqlalchemy': sqlalchemy.__version__,
+                'database': self.engine.dialect.name
+            },
+            'config': {
+                'n_nodes': self.n_nodes,
+                'seed': self.seed,
+                'repeat': self.repeat
+            },
+            'results': results
+        }
+
+    def run_size(self, size: int, loaded: int, load_seconds: float) -> Dict:
+        if self.engine.dialect.name == 'sqlite':
+            with self.engine.connect() as conn:
+                conn.execute(text("ANALYZE"))
+
+        result = {
+            'rows': self.row_count(),
+            'target_rows': size,
+            'load': {
+                'rows': loaded,
+                'seconds': round(load_seconds, 3),
+                'rows_per_second': round(loaded / load_seconds, 1) if load_seconds else None
+            },
+            'service': {},
+            'endpoints': {}
+        }
+
+        for name, case in self.service_cases().items():
+            db = self.SessionLocal()
+            try:
+                result['service'][name] = self.time_case(lambda: case(db))
+            finally:
+                db.close()
+
+        if self.client is not None:
+            for name, path in self.endpoint_cases().items():
+                def request(path=path):
+                    response = self.client.get(path)
+                    response.raise_for_status()
+                result['endpoints'][name] = self.time_case(request)
+
+        return result
+
+    def row_count(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text("SELECT COUNT(*) FROM sensor_data")).scalar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Time read endpoints and DataService methods at growing data sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--db', default=None, help="Database URL; defaults to a fresh SQLite file under benchmarks/results")
+    parser.add_argument('--nodes', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--no-endpoints', action='store_true', help="Only time DataService methods")
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    db_url = args.db
+    if db_url is None:
+        path = os.path.join('benchmarks', 'results', f"read_path_{stamp}.db")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        db_url = f"sqlite:///{path}"
+
+    benchmark = ReadPathBenchmark(
+        db_url, n_nodes=args.nodes, seed=args.seed, repeat=args.repeat, endpoints=not args.no_endpoints
+    )
+    report = benchmark.run(args.sizes)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"read_path_{stamp}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for row in report['results']:
+        timings = ', '.join(f"{name} {stats['p50_ms']}ms" for name, stats in {**row['service'], **row['endpoints']}.items())
+        print(f"{row['rows']:>12} rows | load {row['load']['rows_per_second']} rows/s | {timings}")
+
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
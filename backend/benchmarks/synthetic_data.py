@@ -0,0 +1,132 @@
+import numpy as np
+from typing import Dict, List, Optional
+
+# Per node-type profiles, calibrated against the firmware under sensor-nodes/:
+# reporting interval (the loop() delay) and which fields each payload carries.
+NODE_PROFILES = {
+    'BASE_19007': {
+        'interval_seconds': 600,
+        'fields': ['temperature', 'humidity', 'soil_moisture', 'light_intensity']
+    },
+    'CORE_11300': {
+        'interval_seconds': 900,
+        'fields': ['temperature', 'humidity', 'soil_moisture', 'soil_ph',
+                   'light_intensity', 'pressure', 'altitude']
+    },
+    'SENSOR_12005': {
+        'interval_seconds': 300,
+        'fields': ['temperature', 'humidity', 'soil_temperature', 'soil_moisture',
+                   'light_intensity', 'rainfall', 'is_raining']
+    }
+}
+
+SENSOR_FIELDS = [
+    'temperature', 'humidity', 'soil_moisture', 'soil_ph', 'soil_temperature',
+    'light_intensity', 'pressure', 'altitude', 'rainfall', 'is_raining'
+]
+
+def node_ids_for(n_nodes: int) -> List[str]:
+    node_types = list(NODE_PROFILES)
+    return [f"{node_types[i % len(node_types)]}_{i // len(node_types) + 1}" for i in range(n_nodes)]
+
+def node_type_of(node_id: str) -> Optional[str]:
+    for node_type in NODE_PROFILES:
+        if node_id.startswith(node_type):
+            return node_type
+    return None
+
+class SyntheticSensorDataGenerator:
+    def __init__(self, seed: int = 42, start_time: float = 1_700_000_000.0):
+        self.seed = seed
+        self.start_time = start_time
+
+    def generate(self, n_rows: int, n_nodes: int = 5) -> Dict[str, np.ndarray]:
+        rng = np.random.default_rng(self.seed)
+        node_ids = node_ids_for(n_nodes)
+
+        node_index = np.arange(n_rows) % n_nodes
+        sample_index = np.arange(n_rows) // n_nodes
+        intervals = np.array([NODE_PROFILES[node_type_of(n)]['interval_seconds'] for n in node_ids])
+        jitter = rng.normal(0, 15, n_rows)
+        epoch = self.start_time + sample_index * intervals[node_index] + jitter
+
+        columns = self.readings_at(epoch, node_index, rng)
+        columns['node_id'] = np.array(node_ids, dtype=object)[node_index]
+        columns['epoch'] = epoch
+        columns['timestamp'] = (epoch * 1000).astype(np.int64)
+
+        self._mask_missing_fields(columns, node_ids, node_index)
+        return columns
+
+    def generate_window(self, node_ids: List[str], window_start: float, window_end: float) -> Dict[str, np.ndarray]:
+        # Each node reports on a fixed grid anchored at epoch 0, so adjacent windows tile without gaps or overlap.
+        rng = np.random.default_rng([self.seed, int(window_start)])
+        intervals = np.array([NODE_PROFILES[node_type_of(n)]['interval_seconds'] for n in node_ids], dtype=np.float64)
+        phases = (np.arange(len(node_ids)) * 37.0) % intervals
+
+        first = np.ceil((window_start - phases) / intervals).astype(np.int64)
+        last = np.ceil((window_end - phases) / intervals).astype(np.int64)
+        counts = np.maximum(last - first, 0)
+        node_index = np.repeat(np.arange(len(node_ids)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        epoch = phases[node_index] + (first[node_index] + offsets) * intervals[node_index]
+        epoch = epoch + np.clip(rng.normal(0, 15, len(epoch)), -60, 60)
+
+        order = np.argsort(epoch, kind='stable')
+        epoch = epoch[order]
+        node_index = node_index[order]
+
+        columns = self.readings_at(epoch, node_index, rng)
+        columns['node_id'] = np.array(node_ids, dtype=object)[node_index]
+        columns['epoch'] = epoch
+        # millis() since boot; kept below 2**31 so it fits a 32-bit INTEGER column like a freshly booted node.
+        columns['timestamp'] = ((epoch - phases[node_index]) * 1000).astype(np.int64) % (2 ** 31)
+
+        self._mask_missing_fields(columns, node_ids, node_index)
+        return columns
+
+    def readings_at(self, epoch: np.ndarray, node_index: np.ndarray, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        n = len(epoch)
+        hour = (epoch / 3600.0) % 24
+        day_of_year = (epoch / 86400.0) % 365
+        diurnal = np.sin((hour - 9) / 24 * 2 * np.pi)
+        seasonal = np.sin((day_of_year - 80) / 365 * 2 * np.pi)
+        node_offset = (node_index % 7) * 0.4
+
+        temperature = 18 + 8 * seasonal + 6 * diurnal + node_offset + rng.normal(0, 1.2, n)
+        humidity = np.clip(65 - 2.2 * (temperature - 18) + rng.normal(0, 6, n), 15, 100)
+
+        # Soil moisture follows a sawtooth: slow drying between irrigation/rain events.
+        cycle_hours = 72 + (node_index % 5) * 12
+        phase = ((epoch / 3600.0) % cycle_hours) / cycle_hours
+        soil_moisture = np.clip(820 - 600 * phase + rng.normal(0, 25, n), 0, 1023)
+
+        light = np.clip(np.where(diurnal > -0.3, 55000 * (diurnal + 0.3) / 1.3, 0)
+                        * rng.uniform(0.6, 1.0, n), 0, None)
+
+        rain_event = rng.random(n) < 0.04 * (1 - seasonal) / 2
+        rainfall = np.where(rain_event, rng.gamma(1.5, 4.0, n), 0.0)
+
+        return {
+            'temperature': temperature,
+            'humidity': humidity,
+            'soil_moisture': np.rint(soil_moisture).astype(np.int64),
+            'soil_ph': np.clip(rng.normal(6.6, 0.6, n), 3.5, 9.5),
+            'soil_temperature': temperature - 3 - 2 * diurnal + rng.normal(0, 0.5, n),
+            'light_intensity': light,
+            'pressure': 1013 + rng.normal(0, 6, n),
+            'altitude': 110 + rng.normal(0, 1.5, n),
+            'rainfall': rainfall,
+            'is_raining': rain_event
+        }
+
+    def _mask_missing_fields(self, columns: Dict[str, np.ndarray], node_ids: List[str], node_index: np.ndarray):
+        for field in SENSOR_FIELDS:
+            carried = np.array([field in NODE_PROFILES[node_type_of(n)]['fields'] for n in node_ids])
+            missing = ~carried[node_index]
+            if not missing.any():
+                continue
+            if field == 'is_raining':
+                columns[field] = np.where(missing, False, columns[field])
+            else:
+                columns[field] = np.where(missing, np.nan, columns[field].astype(np.float64))
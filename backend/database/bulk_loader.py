@@ -0,0 +1,151 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence
+import csv
+import io
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import Table
+
+logger = logging.getLogger(__name__)
+
+# Durability is traded for speed while loading; the previous settings are restored afterwards.
+SQLITE_LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144'
+}
+
+def to_datetime_strings(epoch: np.ndarray) -> np.ndarray:
+    # SQLAlchemy stores SQLite DATETIME as 'YYYY-MM-DD HH:MM:SS.ffffff'; range filters compare those strings.
+    if len(epoch) == 0:
+        # np.char sizes its output from the longest input string, which fails on an empty array.
+        return np.empty(0, dtype='<U26')
+    micros = np.rint(epoch * 1e6).astype(np.int64).astype('datetime64[us]')
+    return np.char.replace(micros.astype(str), 'T', ' ')
+
+def _as_list(values) -> list:
+    if not hasattr(values, 'tolist'):
+        return list(values)
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            values = values.astype(object)
+            values[missing] = None
+    # tolist() converts a whole numpy slice to Python scalars in C instead of one call per cell.
+    return values.tolist()
+
+def column_chunks(columns: Dict[str, Sequence], names: List[str], chunk_size: int) -> Iterable[List[tuple]]:
+    n = len(columns[names[0]])
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        yield list(zip(*(_as_list(columns[name][start:end]) for name in names)))
+
+class BulkLoader:
+    def __init__(self, engine, chunk_size: int = 50000):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.chunk_size = chunk_size
+
+    def load_columns(self, table: Table, columns: Dict[str, Sequence], defer_indexes: bool = False) -> int:
+        names = [c.name for c in table.columns if c.name in columns]
+        return self.load_rows(table, names, column_chunks(columns, names, self.chunk_size), defer_indexes)
+
+    def load_rows(self, table: Table, names: List[str], chunks: Iterable[List[tuple]], defer_indexes: bool = False) -> int:
+        started = time.perf_counter()
+        indexes = [index for index in table.indexes if not index.unique] if defer_indexes else []
+        for index in indexes:
+            index.drop(self.engine, checkfirst=True)
+
+        try:
+            if self.dialect == 'postgresql':
+                loaded = self._copy_postgres(table, names, chunks)
+            elif self.dialect == 'sqlite':
+                loaded = self._executemany_sqlite(table, names, chunks)
+            else:
+                loaded = self._insert_generic(table, names, chunks)
+        finally:
+            # Building an index once over the loaded table is far cheaper than maintaining it per row.
+            for index in indexes:
+                index.create(self.engine, checkfirst=True)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Bulk loaded {loaded} rows into {table.name} in {elapsed:.2f}s ({loaded / max(elapsed, 1e-9):.0f} rows/s)")
+        return loaded
+
+    def write_chunk(self, cursor, table_name: str, names: List[str], rows: List[tuple]):
+        # Writes through a raw DB-API cursor without committing, so callers can make the chunk part of a larger transaction.
+        if self.dialect == 'postgresql':
+            statement = f"COPY {table_name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['\\N' if v is None else v for v in row])
+            buffer.seek(0)
+            if hasattr(cursor, 'copy_expert'):
+                cursor.copy_expert(statement, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(statement) as copy:
+                    copy.write(buffer.getvalue())
+        elif self.dialect == 'sqlite':
+            statement = f"INSERT INTO {table_name} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})"
+            cursor.executemany(statement, rows)
+        else:
+            raise NotImplementedError(f"Raw chunk loading is not supported for dialect {self.dialect}")
+
+    @contextmanager
+    def load_pragmas(self, cursor):
+        if self.dialect != 'sqlite':
+            yield
+            return
+        previous = {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in SQLITE_LOAD_PRAGMAS}
+        for name, value in SQLITE_LOAD_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+
+    def _copy_postgres(self, table: Table, names: List[str], chunks: Iterable[List[tuple]]) -> int:
+        raw = self.engine.raw_connection()
+        loaded = 0
+        try:
+            cursor = raw.cursor()
+            for rows in chunks:
+                self.write_chunk(cursor, table.name, names, rows)
+                loaded += len(rows)
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return loaded
+
+    def _executemany_sqlite(self, table: Table, names: List[str], chunks: Iterable[List[tuple]]) -> int:
+        raw = self.engine.raw_connection()
+        loaded = 0
+        try:
+            cursor = raw.cursor()
+            with self.load_pragmas(cursor):
+                for rows in chunks:
+                    self.write_chunk(cursor, table.name, names, rows)
+                    raw.commit()
+                    loaded += len(rows)
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return loaded
+
+    def _insert_generic(self, table: Table, names: List[str], chunks: Iterable[List[tuple]]) -> int:
+        loaded = 0
+        with self.engine.begin() as conn:
+            for rows in chunks:
+                conn.execute(table.insert(), [dict(zip(names, row)) for row in rows])
+                loaded += len(rows)
+        return loaded
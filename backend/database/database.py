@@ -16,6 +16,16 @@ if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
 else:
     engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
+# Opt-in: event hooks add a few microseconds to every query.
+profiler = None
+if os.getenv("SQL_PROFILE", "").lower() in ("1", "true", "yes"):
+    from .profiler import QueryProfiler
+    profiler = QueryProfiler(
+        slow_query_ms=float(os.getenv("SQL_SLOW_QUERY_MS", "100")),
+        n_plus_one_threshold=int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    )
+    profiler.install(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
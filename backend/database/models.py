@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Boolean, DateTime, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -43,6 +43,10 @@ class SensorData(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     node = relationship("Node", back_populates="sensor_data")
+    
+    __table_args__ = (
+        Index('ix_sensor_data_node_timestamp', 'node_id', 'timestamp'),
+    )
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
@@ -90,6 +94,10 @@ class WeatherForecast(Base):
     wind_speed = Column(Float)
     description = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_weather_forecast_location_date', 'location', 'date', unique=True),
+    )
 
 class CropData(Base):
     __tablename__ = "crop_data"
@@ -121,3 +129,33 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_login = Column(DateTime)
+
+class AnomalyDetectorState(Base):
+    __tablename__ = "anomaly_detector_state"
+    __table_args__ = (UniqueConstraint("node_id", "metric", name="uq_anomaly_state_node_metric"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    node_id = Column(String(50), nullable=False)
+    metric = Column(String(50), nullable=False)
+    count = Column(Integer, default=0)
+    mean = Column(Float)
+    variance = Column(Float)
+    slow_mean = Column(Float)
+    last_value = Column(Float)
+    last_time = Column(Float)
+    rate = Column(Float)
+    stuck_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), unique=True, nullable=False)
+    source = Column(String(500))
+    byte_offset = Column(BigInteger, default=0)
+    line_offset = Column(BigInteger, default=1)
+    rows_loaded = Column(Integer, default=0)
+    rows_duplicate = Column(Integer, default=0)
+    rows_rejected = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,208 @@
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\([^)]+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\([^)]+\)s|%s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current: ContextVar[Optional["QueryTrace"]] = ContextVar("sql_profile_trace", default=None)
+
+class QueryTrace:
+    __slots__ = ('name', 'queries', 'db_seconds', 'fingerprints')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+class _Aggregate:
+    __slots__ = ('calls', 'total_seconds', 'max_seconds', 'queries', 'max_queries', 'n_plus_one')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.n_plus_one: Counter = Counter()
+
+class QueryProfiler:
+    def __init__(
+        self,
+        slow_query_ms: float = 100.0,
+        n_plus_one_threshold: int = 5,
+        max_fingerprints: int = 2000,
+        max_param_chars: int = 500
+    ):
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_fingerprints = max_fingerprints
+        self.max_param_chars = max_param_chars
+
+        self._fingerprint_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._statements: Dict[str, _Aggregate] = {}
+        self._traces: Dict[str, _Aggregate] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    def fingerprint(self, statement: str) -> str:
+        cached = self._fingerprint_cache.get(statement)
+        if cached is not None:
+            return cached
+
+        normalized = _STRING_LITERAL.sub("?", statement)
+        normalized = _NUMBER.sub("?", normalized)
+        normalized = _PLACEHOLDER_LIST.sub("(?+)", normalized)
+        normalized = _WHITESPACE.sub(" ", normalized).strip()
+
+        with self._lock:
+            self._fingerprint_cache[statement] = normalized
+            if len(self._fingerprint_cache) > self.max_fingerprints:
+                self._fingerprint_cache.popitem(last=False)
+        return normalized
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _on_error(self, context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        fingerprint = self.fingerprint(statement)
+
+        trace = _current.get()
+        if trace is not None:
+            trace.queries += 1
+            trace.db_seconds += elapsed
+            trace.fingerprints[fingerprint] += 1
+
+        with self._lock:
+            stats = self._statements.get(fingerprint)
+            if stats is None:
+                if len(self._statements) >= self.max_fingerprints:
+                    stats = self._statements.setdefault("(other)", _Aggregate())
+                else:
+                    stats = self._statements[fingerprint] = _Aggregate()
+            stats.calls += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+
+        if elapsed >= self.slow_query_seconds:
+            params = repr(parameters)
+            if len(params) > self.max_param_chars:
+                params = params[:self.max_param_chars] + "..."
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms) in {trace.name if trace else 'no request'}: "
+                f"{_WHITESPACE.sub(' ', statement)} params={params}"
+            )
+
+    @contextmanager
+    def trace(self, name: str):
+        trace = QueryTrace(name)
+        token = _current.set(trace)
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+            self._finish(trace)
+
+    def _finish(self, trace: QueryTrace):
+        repeated = [
+            (fingerprint, count) for fingerprint, count in trace.fingerprints.items()
+            if count >= self.n_plus_one_threshold
+        ]
+        for fingerprint, count in repeated:
+            logger.warning(f"Possible N+1 in {trace.name}: {count}x {fingerprint}")
+
+        with self._lock:
+            stats = self._traces.get(trace.name)
+            if stats is None:
+                stats = self._traces[trace.name] = _Aggregate()
+            stats.calls += 1
+            stats.total_seconds += trace.db_seconds
+            stats.max_seconds = max(stats.max_seconds, trace.db_seconds)
+            stats.queries += trace.queries
+            stats.max_queries = max(stats.max_queries, trace.queries)
+            for fingerprint, count in repeated:
+                stats.n_plus_one[fingerprint] += 1
+
+    def summary(self, limit: int = 20) -> dict:
+        with self._lock:
+            traces = [
+                {
+                    'name': name,
+                    'requests': stats.calls,
+                    'avg_queries': round(stats.queries / stats.calls, 2),
+                    'max_queries': stats.max_queries,
+                    'total_db_ms': round(stats.total_seconds * 1000, 2),
+                    'avg_db_ms': round(stats.total_seconds * 1000 / stats.calls, 3),
+                    'max_db_ms': round(stats.max_seconds * 1000, 3),
+                    'n_plus_one': [
+                        {'fingerprint': fingerprint, 'requests': count}
+                        for fingerprint, count in stats.n_plus_one.most_common(5)
+                    ]
+                }
+                for name, stats in self._traces.items()
+            ]
+            statements = [
+                {
+                    'fingerprint': fingerprint,
+                    'calls': stats.calls,
+                    'total_ms': round(stats.total_seconds * 1000, 2),
+                    'avg_ms': round(stats.total_seconds * 1000 / stats.calls, 3),
+                    'max_ms': round(stats.max_seconds * 1000, 3)
+                }
+                for fingerprint, stats in self._statements.items()
+            ]
+
+        traces.sort(key=lambda t: t['total_db_ms'], reverse=True)
+        statements.sort(key=lambda s: s['total_ms'], reverse=True)
+        return {
+            'slow_query_ms': self.slow_query_seconds * 1000,
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            'endpoints': traces[:limit],
+            'statements': statements[:limit]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._traces.clear()
+
+class SQLProfilerMiddleware:
+    # Plain ASGI middleware: unlike @app.middleware it only returns after background tasks ran,
+    # so their queries are charged to the request that queued them.
+    def __init__(self, app, profiler: QueryProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Unmatched paths share one name so scanners cannot blow up the summary.
+        with self.profiler.trace(f"{scope['method']} (unmatched)") as trace:
+            await self.app(scope, receive, send)
+            route = scope.get("route")
+            if route is not None:
+                trace.name = f"{scope['method']} {route.path}"
@@ -0,0 +1,53 @@
+from sqlalchemy import and_, bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import List
+
+def upsert_rows(db: Session, model, rows: List[dict], index_elements: List[str], update_columns: List[str]):
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(model)
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(model)
+    else:
+        _select_then_update(db, model.__table__, rows, index_elements, update_columns)
+        return
+
+    statement = statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
+    db.execute(statement, rows)
+
+def _select_then_update(db: Session, table, rows: List[dict], index_elements: List[str], update_columns: List[str],
+                        chunk_size: int = 500):
+    # Unlike ON CONFLICT this is not atomic against a concurrent insert of the same key;
+    # the unique index still turns that race into an error instead of a duplicate.
+    latest = {tuple(row[column] for column in index_elements): row for row in rows}
+    keys = [table.c[column] for column in index_elements]
+
+    existing = set()
+    pending = list(latest)
+    for start in range(0, len(pending), chunk_size):
+        condition = or_(*(
+            and_(*(column == value for column, value in zip(keys, key))) for key in pending[start:start + chunk_size]
+        ))
+        existing.update(tuple(found) for found in db.execute(select(*keys).where(condition)))
+
+    updates = [row for key, row in latest.items() if key in existing]
+    inserts = [row for key, row in latest.items() if key not in existing]
+
+    if updates and update_columns:
+        statement = update(table).where(
+            and_(*(column == bindparam(f"key_{column.name}") for column in keys))
+        ).values({column: bindparam(f"new_{column}") for column in update_columns})
+        db.execute(statement, [
+            {**{f"key_{column}": row[column] for column in index_elements},
+             **{f"new_{column}": row[column] for column in update_columns}}
+            for row in updates
+        ])
+    if inserts:
+        db.execute(insert(table), inserts)
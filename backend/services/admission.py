@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+ADMITTED = 'admitted'
+COALESCED = 'coalesced'
+DROPPED = 'dropped'
+
+ADMISSION_MODES = ('drop', 'coalesce')
+
+class TokenBucketTable:
+    def __init__(self, rate_per_minute: float, burst: float, max_keys: int = 10000):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> [tokens, last refill]; least recently seen keys are evicted first.
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def take(self, key: str, now: float) -> bool:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return True
+        return False
+
+    def refund(self, key: str):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst, bucket[0] + 1.0)
+
+    def __len__(self):
+        return len(self._buckets)
+
+class IngestAdmission:
+    def __init__(
+        self,
+        node_rate_per_minute: float = 6.0,
+        node_burst: float = 10.0,
+        gateway_rate_per_minute: float = 600.0,
+        gateway_burst: float = 100.0,
+        max_concurrent: int = 32,
+        mode: str = 'drop',
+        max_keys: int = 10000
+    ):
+        if mode not in ADMISSION_MODES:
+            raise ValueError(f"Unknown admission mode: {mode}")
+
+        self.mode = mode
+        self.max_concurrent = max_concurrent
+        self.max_keys = max_keys
+
+        self.node_buckets = TokenBucketTable(node_rate_per_minute, node_burst, max_keys)
+        self.gateway_buckets = TokenBucketTable(gateway_rate_per_minute, gateway_burst, max_keys)
+
+        self.counters: Dict[str, int] = {
+            'admitted': 0,
+            'dropped_node_rate': 0,
+            'dropped_gateway_rate': 0,
+            'dropped_busy': 0,
+            'coalesced': 0,
+            'coalesced_replaced': 0
+        }
+
+        self._coalesced: "OrderedDict[str, dict]" = OrderedDict()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def admit(self, node_id: Optional[str], gateway_id: str) -> str:
+        now = time.monotonic()
+        with self._lock:
+            if not self.gateway_buckets.take(gateway_id, now):
+                self.counters['dropped_gateway_rate'] += 1
+                return DROPPED
+
+            decision = self._admit_node(node_id, now) if node_id is not None else ADMITTED
+            if decision == ADMITTED and node_id is None:
+                self.counters['admitted'] += 1
+            elif decision != ADMITTED:
+                # The gateway did not cause this one, so give its token back.
+                self.gateway_buckets.refund(gateway_id)
+            return decision
+
+    def admit_node(self, node_id: str) -> str:
+        # For frames of a request whose gateway was already charged once.
+        with self._lock:
+            return self._admit_node(node_id, time.monotonic())
+
+    def _admit_node(self, node_id: str, now: float) -> str:
+        if not self.node_buckets.take(node_id, now):
+            if self.mode == 'coalesce':
+                return COALESCED
+            self.counters['dropped_node_rate'] += 1
+            return DROPPED
+
+        self.counters['admitted'] += 1
+        return ADMITTED
+
+    def coalesce(self, reading: dict):
+        node_id = reading['node_id']
+        with self._lock:
+            if node_id in self._coalesced:
+                self.counters['coalesced_replaced'] += 1
+                self._coalesced.move_to_end(node_id)
+            self._coalesced[node_id] = reading
+            self.counters['coalesced'] += 1
+            if len(self._coalesced) > self.max_keys:
+                self._coalesced.popitem(last=False)
+
+    def take_coalesced(self) -> List[dict]:
+        with self._lock:
+            readings = list(self._coalesced.values())
+            self._coalesced.clear()
+            return readings
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._in_flight >= self.max_concurrent:
+                self.counters['dropped_busy'] += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'in_flight': self._in_flight,
+                'max_concurrent': self.max_concurrent,
+                'tracked_nodes': len(self.node_buckets),
+                'tracked_gateways': len(self.gateway_buckets),
+                'pending_coalesced': len(self._coalesced),
+                **self.counters
+            }
@@ -1,19 +1,39 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List, Optional
+from sqlalchemy import desc, func, insert
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
+import threading
 import logging
 
 from database.models import Node, SensorData, Recommendation
 from ai_model.ai_recommendation_engine import AgriculturalAIEngine
+from services.training_data_loader import TrainingDataLoader
+from services.recommendation_index import OpenRecommendationIndex
+from services.trend_engine import TrendAnalysisEngine
+from services.irrigation_forecast_service import SoilMoistureForecaster
+from services.metrics import REGISTRY
 from api.schemas import RecommendationResponse
 
 logger = logging.getLogger(__name__)
 
+MODEL_TRAINING_SECONDS = REGISTRY.histogram(
+    "model_training_seconds", "Time to load history and train the recommendation models",
+    buckets=(.1, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+MODEL_INFERENCE_SECONDS = REGISTRY.histogram(
+    "model_inference_seconds", "Time to produce AI recommendations for one reading"
+)
+
 class AIRecommendationService:
     def __init__(self):
         self.ai_engine = AgriculturalAIEngine()
+        self.training_loader = TrainingDataLoader()
+        self.open_index = OpenRecommendationIndex()
+        self.trend_engine = TrendAnalysisEngine()
+        self.irrigation_forecaster = SoilMoistureForecaster()
         self.model_trained = False
+        # Job workers share this service; only one of them trains at a time.
+        self._training_lock = threading.RLock()
         
     def generate_recommendations(self, db: Session, node_id: str):
         try:
@@ -26,33 +46,18 @@ class AIRecommendationService:
                 self._generate_rule_based_recommendations(db, node_id, recent_data[-1] if recent_data else None)
                 return
             
-            training_data = []
-            for data in recent_data:
-                training_data.append({
-                    'temperature': data.temperature,
-                    'humidity': data.humidity,
-                    'soil_moisture': data.soil_moisture,
-                    'soil_ph': data.soil_ph,
-                    'light_intensity': data.light_intensity,
-                    'pressure': data.pressure,
-                    'rainfall': data.rainfall,
-                    'timestamp': data.timestamp
-                })
-            
             if not self.model_trained:
-                df = self.ai_engine.prepare_training_data(training_data)
-                if len(df) > 20:
-                    self.ai_engine.train_irrigation_model(df)
-                    self.ai_engine.train_fertilizer_model(df)
-                    self.ai_engine.train_pest_prediction_model(df)
-                    self.model_trained = True
-                    logger.info("AI models trained successfully")
+                with self._training_lock:
+                    # Another worker may have finished training while this one waited.
+                    if not self.model_trained:
+                        self.train_models(db)
             
-            current_data = training_data[-1] if training_data else {}
-            ai_recommendations = self.ai_engine.generate_comprehensive_recommendations(current_data)
+            current_data = self._to_feature_dict(recent_data[-1])
+            forecast = self.irrigation_forecaster.get_node_forecast(db, node_id)
+            with MODEL_INFERENCE_SECONDS.time():
+                ai_recommendations = self.ai_engine.generate_comprehensive_recommendations(current_data, forecast)
             
-            for rec in ai_recommendations:
-                self._save_recommendation(db, node_id, rec)
+            self._save_recommendations(db, node_id, ai_recommendations)
             
             logger.info(f"Generated {len(ai_recommendations)} AI recommendations for node {node_id}")
             
@@ -60,6 +65,41 @@ class AIRecommendationService:
             logger.error(f"Error generating AI recommendations for node {node_id}: {e}")
             self._generate_rule_based_recommendations(db, node_id, None)
     
+    def train_models(self, db: Session, node_ids: Optional[List[str]] = None) -> bool:
+        with self._training_lock, MODEL_TRAINING_SECONDS.time():
+            return self._train_models(db, node_ids)
+    
+    def _train_models(self, db: Session, node_ids: Optional[List[str]] = None) -> bool:
+        training_data = self.training_loader.load(db, node_ids=node_ids)
+        # Trained on the side and swapped in whole, so recommendations never see half-fitted models or scalers.
+        engine = AgriculturalAIEngine()
+        df = engine.prepare_training_data(training_data)
+        
+        if len(df) <= 20:
+            logger.info(f"Insufficient history for AI model training ({len(df)} rows)")
+            return False
+        
+        engine.train_irrigation_model(df)
+        engine.train_fertilizer_model(df)
+        engine.train_pest_prediction_model(df)
+        engine.is_trained = True
+        self.ai_engine = engine
+        self.model_trained = True
+        logger.info(f"AI models trained successfully on {len(df)} rows")
+        return True
+    
+    def _to_feature_dict(self, data: SensorData) -> dict:
+        return {
+            'temperature': data.temperature,
+            'humidity': data.humidity,
+            'soil_moisture': data.soil_moisture,
+            'soil_ph': data.soil_ph,
+            'light_intensity': data.light_intensity,
+            'pressure': data.pressure,
+            'rainfall': data.rainfall,
+            'timestamp': data.timestamp
+        }
+    
     def _generate_rule_based_recommendations(self, db: Session, node_id: str, latest_data: Optional[SensorData]):
         if not latest_data:
             return
@@ -136,36 +176,52 @@ class AIRecommendationService:
                 'confidence': 85.0
             })
         
-        for rec in recommendations:
-            self._save_recommendation(db, node_id, rec)
+        self._save_recommendations(db, node_id, recommendations)
         
         logger.info(f"Generated {len(recommendations)} rule-based recommendations for node {node_id}")
     
-    def _save_recommendation(self, db: Session, node_id: str, rec_data: dict):
-        existing_rec = db.query(Recommendation).filter(
-            Recommendation.node_id == node_id,
-            Recommendation.recommendation_type == rec_data['recommendation_type'],
-            Recommendation.is_completed == False
-        ).order_by(desc(Recommendation.created_at)).first()
-        
-        if existing_rec:
-            time_diff = datetime.utcnow() - existing_rec.created_at
-            if time_diff < timedelta(hours=6):
-                return
+    def _save_recommendations(self, db: Session, node_id: str, recommendations: List[dict]) -> List[dict]:
+        return self.save_recommendation_batch(db, [(node_id, rec) for rec in recommendations])
+    
+    def save_recommendation_batch(self, db: Session, items: List[Tuple[str, dict]]) -> List[dict]:
+        now = datetime.utcnow()
+        # One lookup for the whole batch; the database is shared with other worker processes.
+        latest = self.open_index.latest_open(db, ((node_id, rec['recommendation_type']) for node_id, rec in items), now)
+        rows = []
+        claims = []
+        
+        for node_id, rec_data in items:
+            recommendation_type = rec_data['recommendation_type']
+            if not self.open_index.claim(node_id, recommendation_type, latest.get((node_id, recommendation_type)), now):
+                continue
+            
+            claims.append((node_id, recommendation_type))
+            rows.append({
+                'node_id': node_id,
+                'recommendation_type': recommendation_type,
+                'title': rec_data['title'],
+                'description': rec_data['description'],
+                'priority': rec_data.get('priority', 'medium'),
+                'confidence_score': rec_data.get('confidence', 70.0),
+                'action_required': True,
+                'is_completed': False,
+                'valid_until': now + timedelta(days=7),
+                'created_at': now
+            })
         
-        recommendation = Recommendation(
-            node_id=node_id,
-            recommendation_type=rec_data['recommendation_type'],
-            title=rec_data['title'],
-            description=rec_data['description'],
-            priority=rec_data.get('priority', 'medium'),
-            confidence_score=rec_data.get('confidence', 70.0),
-            action_required=True,
-            valid_until=datetime.utcnow() + timedelta(days=7)
-        )
-        
-        db.add(recommendation)
-        db.commit()
+        try:
+            if rows:
+                db.execute(insert(Recommendation), rows)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            # Committed rows are visible to the next lookup, so the claims are no longer needed either way.
+            for claim in claims:
+                self.open_index.release(*claim)
+        
+        return rows
     
     def get_recommendations(
         self, 
@@ -211,42 +267,47 @@ class AIRecommendationService:
         return critical_recommendations
     
     def analyze_trends_and_suggest(self, db: Session, node_id: str, days: int = 7):
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        window = f"{days}d"
+        engine = self.trend_engine
+        if window not in engine.windows:
+            engine = TrendAnalysisEngine(windows={window: timedelta(days=days)})
         
-        data = db.query(SensorData).filter(
-            SensorData.node_id == node_id,
-            SensorData.created_at >= cutoff_date
-        ).order_by(SensorData.created_at).all()
+        window_stats = engine.compute(db, node_ids=[node_id]).get(node_id, {}).get(window)
         
-        if len(data) < 5:
+        if not window_stats or window_stats['rows'] < 5:
             return []
         
-        trends = self._analyze_trends(data)
+        trends = self._analyze_trends(window_stats)
         suggestions = self._generate_trend_suggestions(trends, node_id)
         
-        for suggestion in suggestions:
-            self._save_recommendation(db, node_id, suggestion)
+        self._save_recommendations(db, node_id, suggestions)
         
         return suggestions
     
-    def _analyze_trends(self, data: List[SensorData]) -> dict:
-        temperatures = [d.temperature for d in data if d.temperature is not None]
-        humidities = [d.humidity for d in data if d.humidity is not None]
-        soil_moistures = [d.soil_moisture for d in data if d.soil_moisture is not None]
-        
-        trends = {}
+    def refresh_trend_suggestions(self, db: Session, window: str = '7d') -> int:
+        results = self.trend_engine.compute(db)
+        
+        items = []
+        for node_id, windows in results.items():
+            window_stats = windows.get(window)
+            if not window_stats or window_stats['rows'] < 5:
+                continue
+            
+            trends = self._analyze_trends(window_stats)
+            items.extend((node_id, suggestion) for suggestion in self._generate_trend_suggestions(trends, node_id))
         
-        if len(temperatures) > 1:
-            temp_trend = temperatures[-1] - temperatures[0]
-            trends['temperature'] = 'increasing' if temp_trend > 2 else 'decreasing' if temp_trend < -2 else 'stable'
+        saved = self.save_recommendation_batch(db, items)
+        logger.info(f"Fleet trend refresh: {len(results)} nodes, {len(items)} suggestions, {len(saved)} saved")
         
-        if len(humidities) > 1:
-            humidity_trend = humidities[-1] - humidities[0]
-            trends['humidity'] = 'increasing' if humidity_trend > 10 else 'decreasing' if humidity_trend < -10 else 'stable'
+        return len(saved)
+    
+    def _analyze_trends(self, window_stats: dict) -> dict:
+        trends = {}
         
-        if len(soil_moistures) > 1:
-            moisture_trend = soil_moistures[-1] - soil_moistures[0]
-            trends['soil_moisture'] = 'increasing' if moisture_trend > 50 else 'decreasing' if moisture_trend < -50 else 'stable'
+        for metric in ('temperature', 'humidity', 'soil_moisture'):
+            metric_stats = window_stats.get(metric)
+            if metric_stats and metric_stats['trend']:
+                trends[metric] = metric_stats['trend']
         
         return trends
     
@@ -0,0 +1,212 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import math
+import threading
+import logging
+
+from database.models import Alert, AnomalyDetectorState, SensorData
+from database.upsert import upsert_rows
+
+logger = logging.getLogger(__name__)
+
+# Per-metric tuning: minimum absolute jump for a spike, and how many identical
+# consecutive readings count as a stuck sensor (None disables the stuck check).
+ANOMALY_METRICS = {
+    'temperature': {'min_delta': 3.0, 'stuck_after': 12},
+    'humidity': {'min_delta': 10.0, 'stuck_after': 12},
+    'soil_moisture': {'min_delta': 80.0, 'stuck_after': 24},
+    'soil_ph': {'min_delta': 0.8, 'stuck_after': None},
+    'soil_temperature': {'min_delta': 3.0, 'stuck_after': 12},
+    'light_intensity': {'min_delta': 20000.0, 'stuck_after': None},
+    'pressure': {'min_delta': 8.0, 'stuck_after': 24}
+}
+
+class MetricState:
+    __slots__ = ('count', 'mean', 'variance', 'slow_mean', 'last_value', 'last_time', 'rate', 'stuck_count')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+        self.slow_mean = 0.0
+        self.last_value = 0.0
+        self.last_time = 0.0
+        self.rate = 0.0
+        self.stuck_count = 0
+
+class StreamingAnomalyDetector:
+    def __init__(
+        self,
+        alpha: float = 0.1,
+        slow_alpha: float = 0.01,
+        spike_z: float = 4.0,
+        drift_z: float = 2.5,
+        warmup: int = 20,
+        alert_cooldown: timedelta = timedelta(hours=6)
+    ):
+        self.alpha = alpha
+        self.slow_alpha = slow_alpha
+        self.spike_z = spike_z
+        self.drift_z = drift_z
+        self.warmup = warmup
+        self.alert_cooldown = alert_cooldown
+
+        self._states: Dict[Tuple[str, str], MetricState] = {}
+        self._dirty = set()
+        self._last_alert: Dict[Tuple[str, str, str], datetime] = {}
+        self._lock = threading.Lock()
+
+    def observe_reading(self, db: Session, sensor_data: SensorData) -> List[Alert]:
+        observed_at = sensor_data.created_at or datetime.utcnow()
+        epoch = (observed_at - datetime(1970, 1, 1)).total_seconds()
+
+        findings = []
+        with self._lock:
+            for metric, config in ANOMALY_METRICS.items():
+                value = getattr(sensor_data, metric, None)
+                if value is None:
+                    continue
+                finding = self._update(sensor_data.node_id, metric, float(value), epoch, config)
+                if finding:
+                    findings.append(finding)
+
+        if not findings:
+            return []
+
+        alerts = self._raise_alerts(db, sensor_data.node_id, findings, observed_at)
+        return alerts
+
+    def _update(self, node_id: str, metric: str, value: float, epoch: float, config: dict) -> Optional[tuple]:
+        key = (node_id, metric)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = MetricState()
+        self._dirty.add(key)
+
+        if state.count == 0:
+            state.count = 1
+            state.mean = state.slow_mean = state.last_value = value
+            state.last_time = epoch
+            return None
+
+        finding = None
+        std = math.sqrt(state.variance)
+        delta = value - state.last_value
+        elapsed_hours = max(epoch - state.last_time, 1.0) / 3600.0
+        state.rate = delta / elapsed_hours
+
+        if state.count >= self.warmup:
+            deviation = value - state.mean
+            if abs(deviation) > self.spike_z * std and abs(deviation) >= config['min_delta']:
+                finding = ('spike', metric, value, f"ortalama {state.mean:.2f}, değişim hızı {state.rate:.2f}/saat")
+
+        stuck_after = config['stuck_after']
+        if delta == 0:
+            state.stuck_count += 1
+            if stuck_after and state.stuck_count == stuck_after and finding is None:
+                finding = ('stuck', metric, value, f"{state.stuck_count} ardışık aynı okuma")
+        else:
+            state.stuck_count = 0
+
+        diff = value - state.mean
+        increment = self.alpha * diff
+        state.mean += increment
+        state.variance = (1 - self.alpha) * (state.variance + diff * increment)
+        state.slow_mean += self.slow_alpha * (value - state.slow_mean)
+        state.last_value = value
+        state.last_time = epoch
+        state.count += 1
+
+        if finding is None and state.count >= self.warmup * 3:
+            drift = state.mean - state.slow_mean
+            if abs(drift) > self.drift_z * math.sqrt(state.variance) and abs(drift) >= config['min_delta']:
+                finding = ('drift', metric, value, f"kısa dönem ortalama {state.mean:.2f}, uzun dönem {state.slow_mean:.2f}")
+
+        return finding
+
+    def _raise_alerts(self, db: Session, node_id: str, findings: List[tuple], now: datetime) -> List[Alert]:
+        alerts = []
+        for kind, metric, value, detail in findings:
+            alert_key = (node_id, metric, kind)
+            last = self._last_alert.get(alert_key)
+            if last and now - last < self.alert_cooldown:
+                continue
+            self._last_alert[alert_key] = now
+
+            messages = {
+                'spike': f"Ani sıçrama: {metric} = {value} ({detail})",
+                'stuck': f"Sensör takılı olabilir: {metric} = {value} ({detail})",
+                'drift': f"Sensör kayması: {metric} ({detail})"
+            }
+            alerts.append(Alert(
+                node_id=node_id,
+                alert_type=f"sensor_{kind}",
+                message=messages[kind],
+                severity="warning"
+            ))
+
+        if alerts:
+            db.add_all(alerts)
+            db.commit()
+            logger.info(f"Anomaly detector raised {len(alerts)} alerts for node {node_id}")
+
+        return alerts
+
+    def checkpoint(self, db: Session) -> int:
+        with self._lock:
+            keys = list(self._dirty)
+            self._dirty.clear()
+            now = datetime.utcnow()
+            rows = []
+            for node_id, metric in keys:
+                state = self._states[(node_id, metric)]
+                rows.append({
+                    'node_id': node_id,
+                    'metric': metric,
+                    'count': state.count,
+                    'mean': state.mean,
+                    'variance': state.variance,
+                    'slow_mean': state.slow_mean,
+                    'last_value': state.last_value,
+                    'last_time': state.last_time,
+                    'rate': state.rate,
+                    'stuck_count': state.stuck_count,
+                    'updated_at': now
+                })
+
+        try:
+            upsert_rows(
+                db, AnomalyDetectorState, rows,
+                index_elements=['node_id', 'metric'],
+                update_columns=[c for c in rows[0] if c not in ('node_id', 'metric')] if rows else []
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty.update(keys)
+            raise
+
+        if rows:
+            logger.info(f"Anomaly detector checkpointed {len(rows)} states")
+        return len(rows)
+
+    def restore(self, db: Session) -> int:
+        rows = db.query(AnomalyDetectorState).all()
+
+        with self._lock:
+            for row in rows:
+                state = MetricState()
+                state.count = row.count or 0
+                state.mean = row.mean or 0.0
+                state.variance = row.variance or 0.0
+                state.slow_mean = row.slow_mean or 0.0
+                state.last_value = row.last_value or 0.0
+                state.last_time = row.last_time or 0.0
+                state.rate = row.rate or 0.0
+                state.stuck_count = row.stuck_count or 0
+                self._states[(row.node_id, row.metric)] = state
+
+        logger.info(f"Anomaly detector restored {len(rows)} states")
+        return len(rows)
@@ -1,16 +1,26 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, insert
+from sqlalchemy.engine import Row
 from typing import List, Optional
 from datetime import datetime, timedelta
+import numpy as np
 
 from database.models import Node, SensorData, Alert, CropData
+from services.sensor_arrays import load_sensor_arrays
+from services.resampling import TimeGridResampler, parse_interval
+from services.metrics import REGISTRY, timed
 from api.schemas import (
     SensorDataCreate, SensorDataResponse, NodeResponse, 
     AlertResponse, DashboardAnalytics, TrendData, NodeTrends
 )
 
+DB_SECONDS = REGISTRY.histogram(
+    "data_service_seconds", "Time spent in DataService methods, dominated by database work", ["method"]
+)
+
 class DataService:
     
+    @timed(DB_SECONDS)
     def save_sensor_data(self, db: Session, data: SensorDataCreate) -> SensorData:
         sensor_data = SensorData(**data.dict())
         
@@ -24,6 +34,34 @@ class DataService:
         
         return sensor_data
     
+    @timed(DB_SECONDS)
+    def update_reception(self, db: Session, data_id: int, reception: dict):
+        db.query(SensorData).filter(SensorData.id == data_id).update(reception, synchronize_session=False)
+        db.commit()
+    
+    @timed(DB_SECONDS)
+    def save_sensor_data_batch(self, db: Session, readings: List[dict]) -> List[Row]:
+        if not readings:
+            return []
+        
+        now = datetime.utcnow()
+        db.query(Node).filter(
+            Node.node_id.in_({data['node_id'] for data in readings})
+        ).update({Node.last_seen: now}, synchronize_session=False)
+        
+        # A core executemany with RETURNING skips building and flushing one ORM object per reading;
+        # the returned rows expose the same attributes callers read from SensorData.
+        table = SensorData.__table__
+        names = {name for data in readings for name in data if name in table.c and name != 'id'}
+        rows = db.execute(
+            insert(table).returning(*table.c, sort_by_parameter_order=True),
+            [{**{name: data.get(name) for name in names}, 'created_at': now} for data in readings]
+        ).all()
+        db.commit()
+        
+        return rows
+    
+    @timed(DB_SECONDS)
     def get_node_data(
         self, 
         db: Session, 
@@ -40,6 +78,7 @@ class DataService:
         data = query.order_by(desc(SensorData.created_at)).limit(limit).all()
         return data
     
+    @timed(DB_SECONDS)
     def get_latest_data(self, db: Session) -> List[SensorDataResponse]:
         subquery = db.query(
             SensorData.node_id,
@@ -54,6 +93,7 @@ class DataService:
         
         return latest_data
     
+    @timed(DB_SECONDS)
     def get_alerts(
         self, 
         db: Session, 
@@ -71,6 +111,7 @@ class DataService:
         alerts = query.order_by(desc(Alert.created_at)).all()
         return alerts
     
+    @timed(DB_SECONDS)
     def acknowledge_alert(self, db: Session, alert_id: int) -> bool:
         alert = db.query(Alert).filter(Alert.id == alert_id).first()
         if alert:
@@ -79,6 +120,7 @@ class DataService:
             return True
         return False
     
+    @timed(DB_SECONDS)
     def check_alerts(self, db: Session, sensor_data_id: int):
         sensor_data = db.query(SensorData).filter(SensorData.id == sensor_data_id).first()
         if not sensor_data:
@@ -137,6 +179,7 @@ class DataService:
         
         db.commit()
     
+    @timed(DB_SECONDS)
     def register_crop(self, db: Session, node_id: str, crop_data: dict) -> CropData:
         crop = CropData(
             node_id=node_id,
@@ -153,6 +196,7 @@ class DataService:
         
         return crop
     
+    @timed(DB_SECONDS)
     def get_dashboard_analytics(self, db: Session) -> DashboardAnalytics:
         total_nodes = db.query(Node).count()
         active_nodes = db.query(Node).filter(Node.status == "active").count()
@@ -188,9 +232,13 @@ class DataService:
             average_soil_moisture=round(avg_soil_moisture, 2)
         )
     
-    def get_trends(self, db: Session, node_id: str, days: int = 30) -> NodeTrends:
+    @timed(DB_SECONDS)
+    def get_trends(self, db: Session, node_id: str, days: int = 30, interval: Optional[str] = None) -> NodeTrends:
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
+        if interval:
+            return self._get_resampled_trends(db, node_id, cutoff_date, parse_interval(interval))
+        
         data = db.query(SensorData).filter(
             SensorData.node_id == node_id,
             SensorData.created_at >= cutoff_date
@@ -208,3 +256,25 @@ class DataService:
             ))
         
         return NodeTrends(node_id=node_id, trends=trends)
+    
+    def _get_resampled_trends(self, db: Session, node_id: str, cutoff_date: datetime, step_seconds: int) -> NodeTrends:
+        columns = ['temperature', 'humidity', 'soil_moisture', 'light_intensity', 'rainfall']
+        _, times, values = load_sensor_arrays(db, columns, since=cutoff_date, node_ids=[node_id])
+        
+        resampler = TimeGridResampler(
+            step_seconds=step_seconds,
+            aggregation=['mean', 'mean', 'mean', 'mean', 'sum'],
+            max_gap_steps=max(1, 3 * 3600 // step_seconds)
+        )
+        grid_times, grid = resampler.resample(times, values)
+        
+        trends = []
+        for t, row in zip(grid_times, grid):
+            if np.isnan(row[:4]).all():
+                continue
+            values_by_column = dict(zip(columns, (None if np.isnan(v) else float(v) for v in row)))
+            if values_by_column['soil_moisture'] is not None:
+                values_by_column['soil_moisture'] = int(round(values_by_column['soil_moisture']))
+            trends.append(TrendData(date=datetime.utcfromtimestamp(t), **values_by_column))
+        
+        return NodeTrends(node_id=node_id, trends=trends)
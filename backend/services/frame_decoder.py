@@ -0,0 +1,181 @@
+from typing import Dict, List, Optional, Tuple
+import warnings
+import numpy as np
+
+from services.node_profiles import node_type_of
+
+# Field order after the node id in each sketch's LoRa payload.
+NODE_FRAME_LAYOUTS = {
+    'BASE_19007': ('temperature', 'humidity', 'soil_moisture', 'light_intensity', 'timestamp'),
+    'CORE_11300': ('temperature', 'humidity', 'soil_moisture', 'soil_ph', 'light_intensity',
+                   'pressure', 'altitude', 'timestamp'),
+    'SENSOR_12005': ('temperature', 'humidity', 'soil_temperature', 'soil_moisture', 'light_intensity',
+                     'rainfall', 'is_raining', 'timestamp')
+}
+
+# The layout lora_gateway.ino parses, 11 fields after the node id: every sensor, zero-filled when a node lacks it.
+CANONICAL_LAYOUT = ('temperature', 'humidity', 'soil_moisture', 'soil_ph', 'soil_temperature',
+                    'light_intensity', 'pressure', 'altitude', 'rainfall', 'is_raining', 'timestamp')
+
+# A gateway may append the packet's RSSI and SNR to any layout.
+RECEPTION_FIELDS = ('gateway_rssi', 'gateway_snr')
+
+READING_FIELDS = ('temperature', 'humidity', 'soil_moisture', 'soil_ph', 'soil_temperature',
+                  'light_intensity', 'pressure', 'altitude', 'rainfall', 'is_raining', 'timestamp',
+                  'gateway_rssi', 'gateway_snr')
+
+INTEGER_FIELDS = ('soil_moisture', 'timestamp', 'gateway_rssi')
+
+# Fixed 64-byte little-endian record for gateways that can send binary. NaN marks a missing float.
+BINARY_RECORD = np.dtype([
+    ('node_id', 'S16'),
+    ('temperature', '<f4'),
+    ('humidity', '<f4'),
+    ('soil_moisture', '<i4'),
+    ('soil_ph', '<f4'),
+    ('soil_temperature', '<f4'),
+    ('light_intensity', '<f4'),
+    ('pressure', '<f4'),
+    ('altitude', '<f4'),
+    ('rainfall', '<f4'),
+    ('timestamp', '<u4'),
+    ('gateway_snr', '<f4'),
+    ('gateway_rssi', '<i2'),
+    ('is_raining', 'u1'),
+    ('reserved', 'u1')
+])
+
+class FrameBatch:
+    __slots__ = ('node_ids', 'line_numbers', 'columns', 'errors')
+
+    def __init__(self):
+        self.node_ids: List[str] = []
+        # Frames are grouped by layout while decoding; this maps each decoded frame back to its input line.
+        self.line_numbers: List[int] = []
+        self.columns: Dict[str, List[Tuple[int, np.ndarray]]] = {}
+        self.errors: List[Tuple[int, str]] = []
+
+    def add(self, node_ids: List[str], fields: Tuple[str, ...], values: np.ndarray, line_numbers: List[int]):
+        offset = len(self.node_ids)
+        self.node_ids.extend(node_ids)
+        self.line_numbers.extend(line_numbers)
+        for i, field in enumerate(fields):
+            self.columns.setdefault(field, []).append((offset, values[:, i]))
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        n = len(self.node_ids)
+        columns = {}
+        for field in READING_FIELDS:
+            column = np.full(n, np.nan)
+            for offset, values in self.columns.get(field, []):
+                column[offset:offset + len(values)] = values
+            columns[field] = column
+        return columns
+
+    def to_rows(self, received_time: Optional[str] = None) -> List[dict]:
+        n = len(self.node_ids)
+        if n == 0:
+            return []
+
+        names = ['node_id']
+        columns = [self.node_ids]
+        for field, column in self.to_columns().items():
+            missing = np.isnan(column)
+            if field == 'is_raining':
+                converted = (np.nan_to_num(column) != 0).tolist()
+            elif field in INTEGER_FIELDS:
+                converted = np.nan_to_num(column).astype(np.int64).tolist()
+            else:
+                converted = column.tolist()
+            if missing.any() and field != 'is_raining':
+                for i in np.flatnonzero(missing).tolist():
+                    converted[i] = None
+            names.append(field)
+            columns.append(converted)
+
+        if received_time is not None:
+            names.append('received_time')
+            columns.append([received_time] * n)
+
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+class FrameDecoder:
+    def decode_text(self, body: bytes) -> FrameBatch:
+        batch = FrameBatch()
+        groups: Dict[Tuple[str, ...], Tuple[List[int], List[str], List[str]]] = {}
+
+        layouts: Dict[Tuple[str, int], Optional[Tuple[str, ...]]] = {}
+        lines = body.decode('utf-8', errors='replace').splitlines()
+        for line_no, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            node_id, _, rest = line.partition('|')
+            shape = (node_id, line.count('|'))
+            fields = layouts.get(shape, False)
+            if fields is False:
+                fields = layouts[shape] = self._layout_for(*shape)
+            if fields is None:
+                batch.errors.append((line_no, f"Unrecognised frame layout for {node_id!r}"))
+                continue
+            line_numbers, node_ids, payloads = groups.setdefault(fields, ([], [], []))
+            line_numbers.append(line_no)
+            node_ids.append(node_id)
+            payloads.append(rest)
+
+        # One numeric conversion per layout instead of one per field per frame.
+        for fields, (line_numbers, node_ids, payloads) in groups.items():
+            # Depending on the numpy version an unparsable field either raises or ends the result early.
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', DeprecationWarning)
+                    values = np.fromstring('|'.join(payloads), dtype=np.float64, sep='|')
+            except ValueError:
+                values = None
+            if values is None or values.size != len(payloads) * len(fields):
+                self._decode_one_by_one(batch, fields, line_numbers, node_ids, payloads)
+                continue
+            batch.add(node_ids, fields, values.reshape(len(payloads), len(fields)), line_numbers)
+
+        return batch
+
+    def decode_binary(self, body: bytes) -> FrameBatch:
+        batch = FrameBatch()
+        if len(body) % BINARY_RECORD.itemsize:
+            batch.errors.append((0, f"Body length {len(body)} is not a multiple of {BINARY_RECORD.itemsize}-byte records"))
+            return batch
+
+        records = np.frombuffer(body, dtype=BINARY_RECORD)
+        if len(records) == 0:
+            return batch
+
+        node_ids = [n.decode('ascii', errors='replace').rstrip('\x00') for n in records['node_id'].tolist()]
+        values = np.column_stack([records[field].astype(np.float64) for field in READING_FIELDS])
+        batch.add(node_ids, READING_FIELDS, values, list(range(1, len(node_ids) + 1)))
+        return batch
+
+    def _layout_for(self, node_id: str, separators: int) -> Optional[Tuple[str, ...]]:
+        if not node_id:
+            return None
+
+        native = NODE_FRAME_LAYOUTS.get(node_type_of(node_id))
+        for layout in ((native,) if native else ()) + (CANONICAL_LAYOUT,):
+            if separators == len(layout):
+                return layout
+            if separators == len(layout) + len(RECEPTION_FIELDS):
+                return layout + RECEPTION_FIELDS
+        return None
+
+    def _decode_one_by_one(self, batch: FrameBatch, fields, line_numbers, node_ids, payloads):
+        good_ids = []
+        good_lines = []
+        good_values = []
+        for line_no, node_id, payload in zip(line_numbers, node_ids, payloads):
+            try:
+                good_values.append([float(v) for v in payload.split('|')])
+                good_ids.append(node_id)
+                good_lines.append(line_no)
+            except ValueError:
+                batch.errors.append((line_no, f"Non-numeric field in frame from {node_id}"))
+        if good_ids:
+            batch.add(good_ids, fields, np.array(good_values, dtype=np.float64), good_lines)
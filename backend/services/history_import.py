@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+
+from database.bulk_loader import BulkLoader, column_chunks, to_datetime_strings
+from database.models import Base, ImportCheckpoint, Node, SensorData
+from services.frame_decoder import FrameDecoder, INTEGER_FIELDS, READING_FIELDS
+from services.node_profiles import node_type_of
+
+logger = logging.getLogger(__name__)
+
+CSV = 'csv'
+SERIAL = 'serial'
+
+IMPORT_COLUMNS = ['node_id', *READING_FIELDS, 'received_time', 'created_at']
+STAGING_TABLE = 'sensor_data_import'
+
+# Camel-case names the gateway uses on the wire and in its own exports.
+CSV_ALIASES = {
+    'nodeId': 'node_id',
+    'soilMoisture': 'soil_moisture',
+    'soilPh': 'soil_ph',
+    'soilTemperature': 'soil_temperature',
+    'lightIntensity': 'light_intensity',
+    'isRaining': 'is_raining',
+    'receivedTime': 'received_time',
+    'gatewayRSSI': 'gateway_rssi',
+    'gatewaySNR': 'gateway_snr',
+    'createdAt': 'created_at'
+}
+
+# Serial monitors only give us a wall clock if the capture tool prefixed each line with one.
+CAPTURE_TIME = r'\[?(?P<time>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\]?\s*(?:->\s*)?'
+SERIAL_FRAME = re.compile(r'^\s*' + CAPTURE_TIME + r'(?P<kind>Data transmitted via LoRa|Received packet): (?P<payload>\S+)\s*$')
+SERIAL_RECEPTION = re.compile(r'^\s*(?:' + CAPTURE_TIME + r')?(?P<field>RSSI|SNR): ?(?P<value>-?\d+(?:\.\d+)?)\s*$')
+FRAME_MARKERS = ('Data transmitted via LoRa: ', 'Received packet: ')
+AWARE_TIME = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+FINGERPRINT_BYTES = 65536
+MAX_REPORTED_ERRORS = 20
+INT32_MAX = 2**31 - 1
+
+class ParsedChunk:
+    __slots__ = ('columns', 'nodes', 'duplicates', 'rejected', 'errors')
+
+    def __init__(self, columns: Dict[str, np.ndarray], nodes: Dict[str, float], duplicates: int, rejected: int, errors: List[Tuple[int, str]]):
+        self.columns = columns
+        self.nodes = nodes
+        self.duplicates = duplicates
+        self.rejected = rejected
+        self.errors = errors
+
+def parse_chunk(kind: str, data: bytes, first_line: int, header: Optional[List[str]], utc_offset_hours: float, dedup_window: float) -> ParsedChunk:
+    text = data.decode('utf-8', errors='replace')
+    if kind == CSV:
+        node_ids, columns, times, received, line_numbers, errors = _parse_csv(text, first_line, header)
+    else:
+        node_ids, columns, times, received, line_numbers, errors = _parse_serial(text, first_line)
+    return _finish(node_ids, columns, times, received, line_numbers, errors, utc_offset_hours, dedup_window)
+
+def _parse_serial(text: str, first_line: int):
+    payloads: List[str] = []
+    times: List[str] = []
+    lines: List[int] = []
+    reception: Dict[str, Dict[int, float]] = {'RSSI': {}, 'SNR': {}}
+    errors: List[Tuple[int, str]] = []
+
+    last_packet = None
+    for line_no, line in enumerate(text.splitlines(), start=first_line):
+        if FRAME_MARKERS[0] not in line and FRAME_MARKERS[1] not in line:
+            # The gateway prints RSSI and SNR on their own lines right after each packet.
+            if last_packet is not None and ('RSSI:' in line or 'SNR:' in line):
+                match = SERIAL_RECEPTION.match(line)
+                if match:
+                    reception[match.group('field')][last_packet] = float(match.group('value'))
+            continue
+
+        match = SERIAL_FRAME.match(line)
+        if match is None:
+            errors.append((line_no, "Frame line has no capture timestamp"))
+            last_packet = None
+            continue
+        last_packet = len(payloads) if match.group('kind') == 'Received packet' else None
+        payloads.append(match.group('payload'))
+        times.append(match.group('time'))
+        lines.append(line_no)
+
+    batch = FrameDecoder().decode_text('\n'.join(payloads).encode())
+    errors.extend((lines[i - 1], message) for i, message in batch.errors)
+
+    index = np.array(batch.line_numbers, dtype=np.int64) - 1
+    columns = batch.to_columns()
+    for field, key in (('gateway_rssi', 'RSSI'), ('gateway_snr', 'SNR')):
+        printed = np.full(len(payloads), np.nan)
+        for i, value in reception[key].items():
+            printed[i] = value
+        columns[field] = np.where(np.isnan(columns[field]), printed[index], columns[field])
+
+    times = np.array(times, dtype=object)[index]
+    return np.array(batch.node_ids, dtype=object), columns, times, None, np.array(lines, dtype=np.int64)[index], errors
+
+def _parse_csv(text: str, first_line: int, header: List[str]):
+    errors: List[Tuple[int, str]] = []
+    rows = []
+    line_numbers = []
+    reader = csv.reader(io.StringIO(text))
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            errors.append((first_line + reader.line_num - 1, f"Expected {len(header)} fields, got {len(row)}"))
+            continue
+        rows.append(row)
+        line_numbers.append(first_line + reader.line_num - 1)
+
+    cells = dict(zip(header, zip(*rows))) if rows else {name: () for name in header}
+    n = len(rows)
+
+    columns = {}
+    for field in READING_FIELDS:
+        if field not in cells:
+            columns[field] = np.full(n, np.nan)
+            continue
+        try:
+            # Clean exports convert in one C call; anything else takes the tolerant path below.
+            columns[field] = np.array(cells[field], dtype=np.float64)
+            continue
+        except ValueError:
+            pass
+        raw = pd.Series(cells[field], dtype=object).str.strip()
+        if field == 'is_raining':
+            raw = raw.str.lower().replace({'true': '1', 'false': '0'})
+        values = np.array(pd.to_numeric(raw, errors='coerce'), dtype=np.float64)
+        unparsable = np.isnan(values) & ~raw.str.lower().isin(['', 'nan', 'null', 'none']).to_numpy()
+        # Marked infinite so _finish rejects them along with genuinely non-finite values.
+        values[unparsable] = np.inf
+        columns[field] = values
+
+    time_field = 'created_at' if 'created_at' in cells else 'received_time'
+    times = np.array(cells.get(time_field, [''] * n), dtype=object)
+    received = np.array(cells['received_time'], dtype=object) if 'received_time' in cells else None
+    node_ids = np.array([v.strip() for v in cells.get('node_id', [''] * n)], dtype=object)
+    return node_ids, columns, times, received, np.array(line_numbers, dtype=np.int64), errors
+
+def _finish(node_ids, columns, times, received, line_numbers, errors, utc_offset_hours: float, dedup_window: float) -> ParsedChunk:
+    n = len(node_ids)
+    malformed = len(errors)
+    stamps = pd.Series(times, dtype=object).str.strip()
+    parsed = pd.to_datetime(stamps, format='ISO8601', errors='coerce', utc=True)
+    epoch = parsed.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+    epoch[parsed.isna().to_numpy()] = np.nan
+    # Times without a zone are local to wherever the log was captured.
+    naive = ~stamps.str.contains(AWARE_TIME, regex=True, na=False).to_numpy()
+    epoch[naive] -= utc_offset_hours * 3600
+
+    checks = [
+        (np.isnan(epoch), "Missing or unparsable capture time"),
+        (np.array([not 0 < len(node_id) <= 50 for node_id in node_ids], dtype=bool), "Invalid node id")
+    ]
+    for field in READING_FIELDS:
+        values = columns[field]
+        bad = np.isinf(values)
+        if field in INTEGER_FIELDS:
+            bad |= np.abs(np.nan_to_num(values)) > INT32_MAX
+        checks.append((bad, f"Invalid {field}"))
+
+    rejected = np.zeros(n, dtype=bool)
+    for bad, message in checks:
+        fresh = bad & ~rejected
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.extend((int(line_numbers[i]), message) for i in np.flatnonzero(fresh)[:MAX_REPORTED_ERRORS].tolist())
+        rejected |= bad
+
+    keep = np.flatnonzero(~rejected)
+    unique = _drop_duplicates(node_ids[keep], columns['timestamp'][keep], epoch[keep], columns['gateway_rssi'][keep], dedup_window)
+    keep = keep[unique]
+
+    output = {'node_id': node_ids[keep]}
+    for field in READING_FIELDS:
+        values = columns[field][keep]
+        if field == 'is_raining':
+            output[field] = np.nan_to_num(values) != 0
+        elif field in INTEGER_FIELDS:
+            output[field] = _integer_column(values)
+        else:
+            output[field] = values
+
+    created = to_datetime_strings(epoch[keep]).astype(object)
+    output['created_at'] = created
+    output['received_time'] = created if received is None else np.where(received[keep] == '', created, received[keep])
+    output['dedup_from'] = to_datetime_strings(epoch[keep] - dedup_window).astype(object)
+    output['dedup_to'] = to_datetime_strings(epoch[keep] + dedup_window).astype(object)
+
+    nodes = pd.Series(epoch[keep]).groupby(output['node_id']).max().to_dict() if len(keep) else {}
+    dropped = int(rejected.sum())
+    return ParsedChunk(output, nodes, n - dropped - len(keep), malformed + dropped, errors[:MAX_REPORTED_ERRORS])
+
+def _drop_duplicates(node_ids: np.ndarray, timestamps: np.ndarray, epoch: np.ndarray, rssi: np.ndarray, window: float) -> np.ndarray:
+    # A node log and a gateway log capture the same packet; keep the copy with the best reception.
+    n = len(node_ids)
+    if n == 0:
+        return np.arange(0)
+    _, codes = np.unique(node_ids.astype(str), return_inverse=True)
+    order = np.lexsort((epoch, timestamps, codes))
+    same = np.zeros(n, dtype=bool)
+    same[1:] = (
+        (codes[order][1:] == codes[order][:-1])
+        & (timestamps[order][1:] == timestamps[order][:-1])
+        & (np.diff(epoch[order]) <= window)
+    )
+    cluster = np.cumsum(~same)
+    quality = np.where(np.isnan(rssi), -np.inf, rssi)[order]
+    best = np.lexsort((-quality, cluster))
+    first = np.ones(n, dtype=bool)
+    first[1:] = cluster[best][1:] != cluster[best][:-1]
+    return np.sort(order[best[first]])
+
+def _integer_column(values: np.ndarray) -> np.ndarray:
+    column = np.full(len(values), None, dtype=object)
+    present = ~np.isnan(values)
+    column[present] = np.rint(values[present]).astype(np.int64).tolist()
+    return column
+
+class HistoryImporter:
+    def __init__(
+        self,
+        engine,
+        workers: Optional[int] = None,
+        chunk_bytes: int = 8 * 1024 * 1024,
+        dedup_window: float = 30.0,
+        utc_offset_hours: float = 0.0
+    ):
+        self.engine = engine
+        self.loader = BulkLoader(engine)
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.chunk_bytes = chunk_bytes
+        self.dedup_window = dedup_window
+        self.utc_offset_hours = utc_offset_hours
+        self.known_nodes = set()
+        self.last_seen: Dict[str, float] = {}
+        self.totals = {'files': 0, 'skipped_files': 0, 'loaded': 0, 'duplicates': 0, 'rejected': 0}
+
+    def prepare(self):
+        Base.metadata.create_all(bind=self.engine, tables=[Node.__table__, SensorData.__table__, ImportCheckpoint.__table__])
+        # create_all does not add indexes to a table that already exists; the duplicate check needs this one.
+        for index in SensorData.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        with Session(self.engine) as db:
+            self.known_nodes = set(db.scalars(select(Node.node_id)))
+
+    def import_paths(self, paths: List[str], kind: Optional[str] = None) -> dict:
+        self.prepare()
+        started = time.perf_counter()
+        names = list(IMPORT_COLUMNS)
+        staged = names + ['dedup_from', 'dedup_to']
+
+        with self.engine.connect() as conn, ProcessPoolExecutor(self.workers) as pool:
+            cursor = conn.connection.cursor()
+            pending = deque()
+            try:
+                with self.loader.load_pragmas(cursor):
+                    # Created after the pragmas: changing SQLite's temp_store drops existing temp tables.
+                    conn.exec_driver_sql(
+                        f"CREATE TEMP TABLE {STAGING_TABLE} AS "
+                        f"SELECT {', '.join(names)}, created_at AS dedup_from, created_at AS dedup_to FROM sensor_data WHERE 1 = 0"
+                    )
+                    conn.commit()
+                    for task in self._tasks(paths, kind):
+                        fingerprint, source, end_offset, end_line, args = task
+                        pending.append((fingerprint, source, end_offset, end_line, pool.submit(parse_chunk, *args)))
+                        # Parsing runs ahead in the pool while this process loads the previous chunks in order.
+                        while len(pending) > self.workers * 2:
+                            self._load(conn, cursor, names, staged, *pending.popleft())
+                    while pending:
+                        self._load(conn, cursor, names, staged, *pending.popleft())
+            finally:
+                for *_, future in pending:
+                    future.cancel()
+            self._update_last_seen(conn)
+
+        elapsed = time.perf_counter() - started
+        return {**self.totals, 'seconds': round(elapsed, 1), 'rows_per_second': round(self.totals['loaded'] / max(elapsed, 1e-9), 1)}
+
+    def _tasks(self, paths: List[str], kind: Optional[str]) -> Iterator[tuple]:
+        for path in paths:
+            file_kind = kind or (CSV if path.lower().endswith('.csv') else SERIAL)
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                head = f.read(FINGERPRINT_BYTES)
+                fingerprint = hashlib.sha256(head).hexdigest()
+                f.seek(0)
+
+                header = None
+                data_start = 0
+                if file_kind == CSV:
+                    header_line = f.readline()
+                    header = [CSV_ALIASES.get(name.strip(), name.strip()) for name in next(csv.reader([header_line.decode('utf-8-sig')]), [])]
+                    data_start = len(header_line)
+                    if 'node_id' not in header:
+                        logger.error(f"Skipping {path}: CSV header has no node_id column")
+                        continue
+
+                offset, line = self._checkpoint(fingerprint, path, data_start, 1 if file_kind == SERIAL else 2)
+                if offset >= size:
+                    logger.info(f"Skipping {path}: already imported")
+                    self.totals['skipped_files'] += 1
+                    continue
+                if offset > data_start:
+                    logger.info(f"Resuming {path} at byte {offset} (line {line})")
+
+                self.totals['files'] += 1
+                f.seek(offset)
+                for data in self._blocks(f, file_kind):
+                    end_offset = offset + len(data)
+                    end_line = line + data.count(b'\n')
+                    yield fingerprint, path, end_offset, end_line, (
+                        file_kind, data, line, header, self.utc_offset_hours, self.dedup_window
+                    )
+                    offset, line = end_offset, end_line
+
+    def _blocks(self, f, kind: str) -> Iterator[bytes]:
+        while True:
+            data = f.read(self.chunk_bytes)
+            if not data:
+                return
+            data += f.readline()
+            if kind == SERIAL:
+                # Keep a packet's trailing RSSI/SNR lines in the same chunk as the packet.
+                while True:
+                    position = f.tell()
+                    follow = f.readline()
+                    if follow and (b'RSSI:' in follow or b'SNR:' in follow):
+                        data += follow
+                        continue
+                    f.seek(position)
+                    break
+            yield data
+
+    def _checkpoint(self, fingerprint: str, source: str, data_start: int, first_line: int) -> Tuple[int, int]:
+        with Session(self.engine) as db:
+            checkpoint = db.scalars(select(ImportCheckpoint).where(ImportCheckpoint.fingerprint == fingerprint)).first()
+            if checkpoint is None:
+                db.add(ImportCheckpoint(
+                    fingerprint=fingerprint, source=source, byte_offset=data_start, line_offset=first_line,
+                    rows_loaded=0, rows_duplicate=0, rows_rejected=0
+                ))
+                db.commit()
+                return data_start, first_line
+            return checkpoint.byte_offset, checkpoint.line_offset
+
+    def _load(self, conn, cursor, names: List[str], staged: List[str], fingerprint: str, source: str, end_offset: int, end_line: int, future):
+        chunk: ParsedChunk = future.result()
+        for line_no, message in chunk.errors:
+            logger.warning(f"{source}:{line_no}: {message}")
+
+        loaded = 0
+        staged_rows = len(chunk.columns['node_id'])
+        with Session(bind=conn) as db:
+            connection = db.connection()
+            new_nodes = [node_id for node_id in chunk.nodes if node_id not in self.known_nodes]
+            if new_nodes:
+                db.add_all([
+                    Node(
+                        node_id=node_id, node_type=node_type_of(node_id) or 'unknown',
+                        last_seen=datetime.utcfromtimestamp(chunk.nodes[node_id])
+                    )
+                    for node_id in new_nodes
+                ])
+                db.flush()
+
+            if staged_rows:
+                for rows in column_chunks(chunk.columns, staged, staged_rows):
+                    self.loader.write_chunk(cursor, STAGING_TABLE, staged, rows)
+                columns = ', '.join(names)
+                # One set-based anti-join per chunk skips readings already stored by live ingest or an earlier import.
+                result = connection.exec_driver_sql(
+                    f"INSERT INTO sensor_data ({columns}) SELECT {columns} FROM {STAGING_TABLE} s "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM sensor_data d WHERE d.node_id = s.node_id "
+                    f"AND d.timestamp = s.timestamp AND d.created_at BETWEEN s.dedup_from AND s.dedup_to)"
+                )
+                loaded = result.rowcount
+                connection.exec_driver_sql(f"DELETE FROM {STAGING_TABLE}")
+
+            duplicates = chunk.duplicates + staged_rows - loaded
+            # The checkpoint commits with the rows, so a resumed import never loads a chunk twice.
+            db.execute(
+                update(ImportCheckpoint)
+                .where(ImportCheckpoint.fingerprint == fingerprint)
+                .values(
+                    source=source,
+                    byte_offset=end_offset,
+                    line_offset=end_line,
+                    rows_loaded=ImportCheckpoint.rows_loaded + loaded,
+                    rows_duplicate=ImportCheckpoint.rows_duplicate + duplicates,
+                    rows_rejected=ImportCheckpoint.rows_rejected + chunk.rejected,
+                    updated_at=datetime.utcnow()
+                )
+            )
+            db.commit()
+
+        self.known_nodes.update(chunk.nodes)
+        for node_id, seen in chunk.nodes.items():
+            if seen > self.last_seen.get(node_id, 0):
+                self.last_seen[node_id] = seen
+        self.totals['loaded'] += loaded
+        self.totals['duplicates'] += duplicates
+        self.totals['rejected'] += chunk.rejected
+        logger.info(f"{source}: byte {end_offset}, {loaded} loaded, {duplicates} duplicates, {chunk.rejected} rejected")
+
+    def _update_last_seen(self, conn):
+        with Session(bind=conn) as db:
+            for node_id, seen in self.last_seen.items():
+                seen = datetime.utcfromtimestamp(seen)
+                db.execute(
+                    update(Node)
+                    .where(Node.node_id == node_id, Node.last_seen.is_(None) | (Node.last_seen < seen))
+                    .values(last_seen=seen)
+                )
+            db.commit()
+
+def expand_paths(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(path)
+    return sorted(files)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import historical readings from CSV exports and node/gateway serial logs")
+    parser.add_argument('paths', nargs='+', help="Files or directories to import")
+    parser.add_argument('--db', default=os.getenv("DATABASE_URL", "sqlite:///./agricultural_monitoring.db"))
+    parser.add_argument('--format', choices=[CSV, SERIAL], default=None, help="Defaults to csv for *.csv files and serial otherwise")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes; defaults to one less than the CPU count")
+    parser.add_argument('--chunk-mb', type=float, default=8.0)
+    parser.add_argument('--dedup-window', type=float, default=30.0, help="Seconds within which the same node/device timestamp is a duplicate")
+    parser.add_argument('--utc-offset', type=float, default=0.0, help="Hours to subtract from capture times that have no time zone")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    importer = HistoryImporter(
+        create_engine(args.db),
+        workers=args.workers,
+        chunk_bytes=int(args.chunk_mb * 1024 * 1024),
+        dedup_window=args.dedup_window,
+        utc_offset_hours=args.utc_offset
+    )
+    totals = importer.import_paths(expand_paths(args.paths), args.format)
+    print(
+        f"Imported {totals['loaded']} readings from {totals['files']} files in {totals['seconds']}s "
+        f"({totals['rows_per_second']:.0f} rows/s); {totals['duplicates']} duplicates and "
+        f"{totals['rejected']} invalid rows skipped, {totals['skipped_files']} files already imported"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+import threading
+import numpy as np
+import logging
+
+from database.models import Node, SensorData, WeatherForecast
+from services.sensor_arrays import load_sensor_arrays, group_sorted, to_epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+CRITICAL_SOIL_MOISTURE = 300
+WARNING_SOIL_MOISTURE = 400
+
+class SoilMoistureForecaster:
+    def __init__(
+        self,
+        history_hours: int = 72,
+        horizon_hours: int = 168,
+        recharge_jump: float = 60.0,
+        units_per_mm_rain: float = 8.0,
+        min_samples: int = 6,
+        min_refresh_seconds: float = 300.0
+    ):
+        self.history_hours = history_hours
+        self.horizon_hours = horizon_hours
+        self.recharge_jump = recharge_jump
+        self.units_per_mm_rain = units_per_mm_rain
+        self.min_samples = min_samples
+        self.min_refresh_seconds = min_refresh_seconds
+
+        self._cache: Dict[str, dict] = {}
+        self._stamp = None
+        self._computed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def get_forecasts(self, db: Session) -> Dict[str, dict]:
+        stamp = (
+            db.query(func.max(SensorData.id)).scalar(),
+            db.query(func.max(WeatherForecast.id)).scalar()
+        )
+        now = datetime.utcnow()
+
+        with self._lock:
+            fresh = self._computed_at and (now - self._computed_at).total_seconds() < self.min_refresh_seconds
+            if self._stamp == stamp or (fresh and self._cache):
+                return self._cache
+
+            self._cache = self.compute(db, now)
+            self._stamp = stamp
+            self._computed_at = now
+            return self._cache
+
+    def get_node_forecast(self, db: Session, node_id: str) -> Optional[dict]:
+        return self.get_forecasts(db).get(node_id)
+
+    def compute(self, db: Session, now: Optional[datetime] = None) -> Dict[str, dict]:
+        now = now or datetime.utcnow()
+        node_col, times, values = load_sensor_arrays(
+            db, ['soil_moisture'], since=now - timedelta(hours=self.history_hours)
+        )
+        if len(times) == 0:
+            return {}
+
+        nodes, codes, order = group_sorted(node_col, times)
+        times = times[order]
+        moisture = values[order, 0]
+        valid = ~np.isnan(moisture)
+        codes, times, moisture = codes[valid], times[valid], moisture[valid]
+        if len(times) == 0:
+            return {}
+
+        n_groups = len(nodes)
+        now_epoch = to_epoch_seconds([now])[0]
+        hours = (times - now_epoch) / 3600.0
+
+        # Fit only the current drying segment: rows after the last irrigation/rain recharge jump.
+        index = np.arange(len(moisture))
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        jump = np.r_[True, (codes[1:] != codes[:-1]) | (np.diff(moisture) > self.recharge_jump)]
+        segment_start = np.maximum.accumulate(np.where(jump, index, 0))
+        last_in_group = np.r_[starts[1:], len(moisture)] - 1
+        in_segment = segment_start == segment_start[last_in_group][codes]
+
+        w = in_segment.astype(np.float64)
+        n = np.bincount(codes, weights=w, minlength=n_groups)
+        sx = np.bincount(codes, weights=w * hours, minlength=n_groups)
+        sy = np.bincount(codes, weights=w * moisture, minlength=n_groups)
+        sxx = np.bincount(codes, weights=w * hours * hours, minlength=n_groups)
+        sxy = np.bincount(codes, weights=w * hours * moisture, minlength=n_groups)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denom = n * sxx - sx * sx
+            slope = np.where((n >= 2) & (denom > 1e-9), (n * sxy - sx * sy) / denom, 0.0)
+            intercept = (sy - slope * sx) / n
+
+        drying_rate = np.minimum(slope, 0.0)
+        current = np.clip(intercept, 0, 1023)
+        last_reading = moisture[last_in_group]
+        samples = np.bincount(codes, minlength=n_groups)
+
+        et_factor, recharge = self._weather_matrix(db, nodes, now)
+        hourly = drying_rate[:, None] * et_factor + recharge
+        trajectory = current[:, None] + np.cumsum(hourly, axis=1)
+
+        hours_to_warning = self._first_crossing(current, trajectory, WARNING_SOIL_MOISTURE)
+        hours_to_critical = self._first_crossing(current, trajectory, CRITICAL_SOIL_MOISTURE)
+
+        forecasts = {}
+        for g, node_id in enumerate(nodes):
+            if n[g] < 2 or samples[g] < self.min_samples:
+                continue
+            critical_at = None
+            if hours_to_critical[g] is not None:
+                critical_at = (now + timedelta(hours=hours_to_critical[g])).isoformat()
+            forecasts[node_id] = {
+                'node_id': node_id,
+                'current_soil_moisture': round(float(current[g]), 1),
+                'last_reading': round(float(last_reading[g]), 1),
+                'drying_rate_per_hour': round(float(drying_rate[g]), 3),
+                'segment_samples': int(n[g]),
+                'hours_to_warning': hours_to_warning[g],
+                'hours_to_critical': hours_to_critical[g],
+                'predicted_critical_at': critical_at,
+                'horizon_hours': self.horizon_hours,
+                'computed_at': now.isoformat()
+            }
+
+        logger.info(f"Soil moisture forecast computed for {len(forecasts)} nodes")
+        return forecasts
+
+    def _weather_matrix(self, db: Session, nodes: np.ndarray, now: datetime):
+        n_nodes = len(nodes)
+        et_factor = np.ones((n_nodes, self.horizon_hours))
+        recharge = np.zeros((n_nodes, self.horizon_hours))
+
+        locations = dict(db.query(Node.node_id, Node.location).filter(Node.node_id.in_(list(nodes))).all())
+        wanted = {loc for loc in locations.values() if loc}
+        if not wanted:
+            return et_factor, recharge
+
+        forecasts = db.query(
+            WeatherForecast.location,
+            WeatherForecast.date,
+            WeatherForecast.temperature_max,
+            WeatherForecast.precipitation_amount
+        ).filter(
+            WeatherForecast.location.in_(wanted),
+            WeatherForecast.date >= now - timedelta(days=1),
+            WeatherForecast.date <= now + timedelta(hours=self.horizon_hours)
+        ).order_by(WeatherForecast.created_at).all()
+
+        # Later rows overwrite earlier ones, so each (location, day) keeps its newest forecast.
+        by_location: Dict[str, Dict[int, tuple]] = {}
+        for location, date, temperature_max, precipitation in forecasts:
+            day = (date.date() - now.date()).days
+            by_location.setdefault(location, {})[day] = (temperature_max, precipitation)
+
+        n_days = (self.horizon_hours + 23) // 24
+        location_rows = {}
+        for location, days in by_location.items():
+            et = np.ones(n_days)
+            rain = np.zeros(n_days)
+            for day, (temperature_max, precipitation) in days.items():
+                if 0 <= day < n_days:
+                    if temperature_max is not None:
+                        et[day] = np.clip(1 + 0.05 * (temperature_max - 25), 0.5, 2.0)
+                    rain[day] = (precipitation or 0.0) * self.units_per_mm_rain / 24.0
+            location_rows[location] = (
+                np.repeat(et, 24)[:self.horizon_hours],
+                np.repeat(rain, 24)[:self.horizon_hours]
+            )
+
+        for g, node_id in enumerate(nodes):
+            row = location_rows.get(locations.get(node_id))
+            if row:
+                et_factor[g], recharge[g] = row
+
+        return et_factor, recharge
+
+    def _first_crossing(self, current: np.ndarray, trajectory: np.ndarray, threshold: float) -> List[Optional[float]]:
+        below = trajectory <= threshold
+        crossed = below.any(axis=1)
+        first = below.argmax(axis=1) + 1
+        return [
+            0.0 if current[g] <= threshold else float(first[g]) if crossed[g] else None
+            for g in range(len(current))
+        ]
@@ -0,0 +1,410 @@
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+JOB_SECONDS = REGISTRY.histogram(
+    "job_seconds", "Job handler run time", ["job"],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+JOB_OUTCOMES = REGISTRY.counter("jobs_finished_total", "Finished job attempts by outcome", ["job", "outcome"])
+
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=10000",
+]
+
+class Job:
+    __slots__ = ('id', 'name', 'payload', 'priority', 'attempts', 'max_attempts', 'dedup_key')
+
+    def __init__(self, id: int, name: str, payload: dict, priority: int, attempts: int, max_attempts: int, dedup_key: Optional[str]):
+        self.id = id
+        self.name = name
+        self.payload = payload
+        self.priority = priority
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.dedup_key = dedup_key
+
+class JobBroker(ABC):
+    @abstractmethod
+    def enqueue(
+        self, name: str, payload: dict, priority: int = 0, dedup_key: Optional[str] = None,
+        max_attempts: int = 3, visibility_timeout: float = 300.0, delay: float = 0.0
+    ) -> Optional[int]:
+        ...
+
+    def enqueue_many(
+        self, name: str, jobs: List[Tuple[Optional[str], dict]], priority: int = 0,
+        max_attempts: int = 3, visibility_timeout: float = 300.0
+    ) -> int:
+        return sum(
+            self.enqueue(name, payload, priority, dedup_key, max_attempts, visibility_timeout) is not None
+            for dedup_key, payload in jobs
+        )
+
+    @abstractmethod
+    def claim(self, worker_id: str, limit: int = 1) -> List[Job]:
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: int):
+        ...
+
+    @abstractmethod
+    def renew(self, job_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: int, error: str, retry_in: Optional[float]):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    @abstractmethod
+    def purge(self, older_than_seconds: float) -> int:
+        ...
+
+class SQLiteJobBroker(JobBroker):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # The file and schema are created on first use, not when the broker is built at import time.
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            for pragma in SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._init_schema(conn)
+                    self._schema_ready = True
+        return conn
+
+    def _init_schema(self, conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'queued',
+                dedup_key TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                visibility_timeout REAL NOT NULL DEFAULT 300,
+                run_at REAL NOT NULL,
+                lease_until REAL,
+                worker TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )
+        ''')
+        # Claims scan ready jobs by priority; finished jobs drop out of this index entirely.
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS ix_jobs_ready
+            ON jobs (priority DESC, run_at) WHERE status IN ('queued', 'running')
+        ''')
+        # A dedup key is held only while its job is pending, so the same work can be queued again later.
+        conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_jobs_dedup
+            ON jobs (dedup_key) WHERE dedup_key IS NOT NULL AND status = 'queued'
+        ''')
+
+    def enqueue(
+        self, name: str, payload: dict, priority: int = 0, dedup_key: Optional[str] = None,
+        max_attempts: int = 3, visibility_timeout: float = 300.0, delay: float = 0.0
+    ) -> Optional[int]:
+        now = time.time()
+        cursor = self._connection().execute(
+            '''INSERT OR IGNORE INTO jobs
+               (name, payload, priority, dedup_key, max_attempts, visibility_timeout, run_at, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (name, json.dumps(payload), priority, dedup_key, max_attempts, visibility_timeout, now + delay, now)
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def enqueue_many(
+        self, name: str, jobs: List[Tuple[Optional[str], dict]], priority: int = 0,
+        max_attempts: int = 3, visibility_timeout: float = 300.0
+    ) -> int:
+        if not jobs:
+            return 0
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                '''INSERT OR IGNORE INTO jobs
+                   (name, payload, priority, dedup_key, max_attempts, visibility_timeout, run_at, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                [
+                    (name, json.dumps(payload), priority, dedup_key, max_attempts, visibility_timeout, now, now)
+                    for dedup_key, payload in jobs
+                ]
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+            return added
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Job]:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Leases that ran out belong to crashed or stuck workers: retry them, or give up after the last attempt.
+            conn.execute(
+                '''UPDATE jobs SET status = 'failed', finished_at = ?, last_error = 'visibility timeout expired'
+                   WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts''',
+                (now, now)
+            )
+            rows = conn.execute(
+                '''SELECT id, name, payload, priority, attempts, max_attempts, dedup_key FROM jobs
+                   WHERE status IN ('queued', 'running')
+                     AND ((status = 'queued' AND run_at <= ?) OR (status = 'running' AND lease_until < ?))
+                   ORDER BY priority DESC, run_at, id
+                   LIMIT ?''',
+                (now, now, limit)
+            ).fetchall()
+            jobs = []
+            for job_id, name, payload, priority, attempts, max_attempts, dedup_key in rows:
+                conn.execute(
+                    '''UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?,
+                       lease_until = ? + visibility_timeout WHERE id = ?''',
+                    (worker_id, now, job_id)
+                )
+                jobs.append(Job(job_id, name, json.loads(payload), priority, attempts + 1, max_attempts, dedup_key))
+            conn.execute("COMMIT")
+            return jobs
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, job_id: int):
+        self._connection().execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, lease_until = NULL WHERE id = ?",
+            (time.time(), job_id)
+        )
+
+    def renew(self, job_id: int) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET lease_until = ? + visibility_timeout WHERE id = ? AND status = 'running'",
+            (time.time(), job_id)
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: int, error: str, retry_in: Optional[float]):
+        now = time.time()
+        if retry_in is None:
+            self._connection().execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ?, lease_until = NULL WHERE id = ?",
+                (now, error, job_id)
+            )
+            return
+        # If a newer copy already holds the dedup key, the retry takes its place so only one stays pending.
+        self._connection().execute(
+            '''UPDATE OR REPLACE jobs SET status = 'queued', run_at = ?, last_error = ?, lease_until = NULL
+               WHERE id = ?''',
+            (now + retry_in, error, job_id)
+        )
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        by_status = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        pending = conn.execute(
+            '''SELECT name, COUNT(*), MIN(run_at) FROM jobs WHERE status IN ('queued', 'running')
+               GROUP BY name'''
+        ).fetchall()
+        now = time.time()
+        return {
+            'by_status': {status: by_status.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+            'pending_by_job': {
+                name: {'count': count, 'oldest_age_seconds': round(max(0.0, now - oldest), 1)}
+                for name, count, oldest in pending
+            }
+        }
+
+    def purge(self, older_than_seconds: float) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - older_than_seconds,)
+        )
+        return cursor.rowcount
+
+def create_broker(url: str) -> JobBroker:
+    if url.startswith("sqlite:///"):
+        return SQLiteJobBroker(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported job broker URL: {url}")
+
+class _Handler:
+    __slots__ = ('fn', 'priority', 'max_attempts', 'visibility_timeout')
+
+    def __init__(self, fn: Callable, priority: int, max_attempts: int, visibility_timeout: float):
+        self.fn = fn
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+
+class JobQueue:
+    def __init__(
+        self,
+        broker: JobBroker,
+        session_factory: Callable,
+        poll_interval: float = 1.0,
+        backoff_base: float = 5.0,
+        backoff_max: float = 600.0,
+        trace: Optional[Callable[[str], ContextManager]] = None
+    ):
+        self.broker = broker
+        self.session_factory = session_factory
+        # e.g. QueryProfiler.trace, so job queries are attributed like request queries.
+        self.trace = trace
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.handlers: Dict[str, _Handler] = {}
+        self._workers: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def register(self, name: str, fn: Callable, priority: int = 0, max_attempts: int = 3, visibility_timeout: float = 300.0):
+        self.handlers[name] = _Handler(fn, priority, max_attempts, visibility_timeout)
+
+    def enqueue(self, name: str, dedup_key: Optional[str] = None, priority: Optional[int] = None, delay: float = 0.0, **payload) -> Optional[int]:
+        handler = self.handlers[name]
+        job_id = self.broker.enqueue(
+            name, payload,
+            priority=handler.priority if priority is None else priority,
+            dedup_key=dedup_key,
+            max_attempts=handler.max_attempts,
+            visibility_timeout=handler.visibility_timeout,
+            delay=delay
+        )
+        if job_id is not None and delay <= 0:
+            self._wakeup.set()
+        return job_id
+
+    def enqueue_many(self, name: str, jobs: List[Tuple[Optional[str], dict]]) -> int:
+        handler = self.handlers[name]
+        added = self.broker.enqueue_many(
+            name, jobs,
+            priority=handler.priority,
+            max_attempts=handler.max_attempts,
+            visibility_timeout=handler.visibility_timeout
+        )
+        if added:
+            self._wakeup.set()
+        return added
+
+    def start(self, workers: int):
+        self._stop.clear()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, args=(f"{prefix}:{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._workers.append(thread)
+        if workers:
+            logger.info(f"Started {workers} job workers")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._workers:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._workers = []
+
+    def _work(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                jobs = self.broker.claim(worker_id)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} could not claim work: {e}")
+                jobs = []
+
+            if not jobs:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            for job in jobs:
+                self.run_job(job)
+
+    def run_job(self, job: Job):
+        handler = self.handlers.get(job.name)
+        if handler is None:
+            self.broker.fail(job.id, f"No handler registered for {job.name}", None)
+            JOB_OUTCOMES.labels(job.name, "unknown").inc()
+            return
+
+        started = time.perf_counter()
+        db = self.session_factory()
+        # Long handlers such as model training would otherwise outlive their lease and be claimed again.
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._renew_lease, args=(job, handler.visibility_timeout / 3, finished),
+            name=f"job-heartbeat-{job.id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            with self.trace(f"job {job.name}") if self.trace else nullcontext():
+                handler.fn(db, **job.payload)
+            self.broker.complete(job.id)
+            JOB_OUTCOMES.labels(job.name, "done").inc()
+        except Exception as e:
+            db.rollback()
+            if job.attempts < job.max_attempts:
+                retry_in = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1)) * random.uniform(0.5, 1.0)
+                logger.warning(f"Job {job.name}#{job.id} failed (attempt {job.attempts}), retrying in {retry_in:.0f}s: {e}")
+                self.broker.fail(job.id, str(e), retry_in)
+                JOB_OUTCOMES.labels(job.name, "retry").inc()
+            else:
+                logger.error(f"Job {job.name}#{job.id} failed permanently after {job.attempts} attempts: {e}")
+                self.broker.fail(job.id, str(e), None)
+                JOB_OUTCOMES.labels(job.name, "failed").inc()
+        finally:
+            finished.set()
+            heartbeat.join()
+            db.close()
+            JOB_SECONDS.labels(job.name).observe(time.perf_counter() - started)
+
+    def _renew_lease(self, job: Job, interval: float, finished: threading.Event):
+        while not finished.wait(interval):
+            try:
+                self.broker.renew(job.id)
+            except Exception as e:
+                logger.warning(f"Could not renew the lease of job {job.name}#{job.id}: {e}")
+
+    def stats(self) -> dict:
+        return {'workers': len(self._workers), **self.broker.stats()}
@@ -0,0 +1,29 @@
+import argparse
+import logging
+import os
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job queue workers outside the API process")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Importing the app registers the same handlers and services the API process uses.
+    from api.main import job_queue
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    job_queue.start(args.workers)
+    logger.info(f"Job worker process {os.getpid()} running {args.workers} workers")
+    stop.wait()
+    job_queue.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime
+import heapq
+import threading
+import time
+import logging
+
+from database.models import Alert, Node
+from services.node_profiles import report_interval_for
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = 'active'
+LATE = 'late'
+OFFLINE = 'offline'
+
+class NodeLiveness:
+    __slots__ = ('interval', 'last_seen', 'status', 'generation')
+
+    def __init__(self, interval: float, last_seen: float, status: str = ACTIVE):
+        self.interval = interval
+        self.last_seen = last_seen
+        self.status = status
+        self.generation = 0
+
+# (node_id, new status, node, generation the transition was scheduled for)
+Transition = Tuple[str, str, NodeLiveness, int]
+
+class NodeLivenessTracker:
+    def __init__(
+        self,
+        late_after: float = 2.0,
+        offline_after: float = 4.0,
+        alpha: float = 0.2,
+        max_interval_seconds: float = 6 * 3600.0
+    ):
+        self.late_after = late_after
+        self.offline_after = offline_after
+        self.alpha = alpha
+        self.max_interval_seconds = max_interval_seconds
+
+        self._nodes: Dict[str, NodeLiveness] = {}
+        # (deadline, node_id, generation, next status); entries whose generation no longer
+        # matches the node are stale and skipped when popped instead of being removed.
+        self._heap: List[Tuple[float, str, int, str]] = []
+        self._recovered: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def observe(self, node_id: str, at: Optional[float] = None):
+        at = at or time.time()
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is None:
+                node = self._nodes[node_id] = NodeLiveness(report_interval_for(node_id), at)
+            else:
+                gap = at - node.last_seen
+                if gap <= 0:
+                    return
+                # Gaps caused by lost packets would inflate the learned interval, so only
+                # gaps close to the current estimate feed the average.
+                if 0.5 * node.interval <= gap <= 1.5 * node.interval:
+                    node.interval += self.alpha * (gap - node.interval)
+                    node.interval = min(node.interval, self.max_interval_seconds)
+                node.last_seen = at
+                if node.status != ACTIVE:
+                    node.status = ACTIVE
+                    self._recovered.add(node_id)
+
+            node.generation += 1
+            heapq.heappush(self._heap, (at + self.late_after * node.interval, node_id, node.generation, LATE))
+
+    def advance(self, now: Optional[float] = None) -> Tuple[List[Transition], Set[str]]:
+        now = now or time.time()
+        transitions = []
+        with self._lock:
+            recovered, self._recovered = self._recovered, set()
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, node_id, generation, status = heapq.heappop(heap)
+                node = self._nodes.get(node_id)
+                if node is None or node.generation != generation:
+                    continue
+
+                node.status = status
+                transitions.append((node_id, status, node, generation))
+                if status == LATE:
+                    heapq.heappush(heap, (
+                        node.last_seen + self.offline_after * node.interval, node_id, generation, OFFLINE
+                    ))
+
+            # Lazy deletion leaves one stale entry per superseded reading; rebuild once they dominate.
+            if len(heap) > 4 * len(self._nodes) + 1024:
+                self._compact()
+
+        return transitions, recovered
+
+    def _compact(self):
+        live = []
+        for node_id, node in self._nodes.items():
+            if node.status == ACTIVE:
+                live.append((node.last_seen + self.late_after * node.interval, node_id, node.generation, LATE))
+            elif node.status == LATE:
+                live.append((node.last_seen + self.offline_after * node.interval, node_id, node.generation, OFFLINE))
+        heapq.heapify(live)
+        self._heap = live
+
+    def tick(self, db: Session) -> int:
+        transitions, recovered = self.advance()
+        if not transitions and not recovered:
+            return 0
+
+        try:
+            self._persist(db, transitions, recovered)
+        except Exception:
+            self._requeue(transitions, recovered)
+            raise
+        return len(transitions) + len(recovered)
+
+    def _persist(self, db: Session, transitions: List[Transition], recovered: Set[str]):
+        by_status: Dict[str, List[str]] = {ACTIVE: list(recovered)} if recovered else {}
+        alerts = []
+        # A node silent through both deadlines gets one update with its final status.
+        final = {node_id: (status, node) for node_id, status, node, _ in transitions}
+        for node_id, (status, node) in final.items():
+            by_status.setdefault(status, []).append(node_id)
+            if status == OFFLINE:
+                silent_minutes = int((time.time() - node.last_seen) / 60)
+                alerts.append(Alert(
+                    node_id=node_id,
+                    alert_type="node_offline",
+                    message=f"Nod çevrimdışı: {silent_minutes} dakikadır veri alınmadı "
+                            f"(beklenen aralık {node.interval / 60:.0f} dk)",
+                    severity="critical"
+                ))
+
+        try:
+            for status, node_ids in by_status.items():
+                db.query(Node).filter(Node.node_id.in_(node_ids)).update(
+                    {Node.status: status}, synchronize_session=False
+                )
+            if recovered:
+                db.query(Alert).filter(
+                    Alert.node_id.in_(recovered),
+                    Alert.alert_type == "node_offline",
+                    Alert.is_active == True
+                ).update({Alert.is_active: False, Alert.resolved_at: datetime.utcnow()}, synchronize_session=False)
+            if alerts:
+                db.add_all(alerts)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(
+            f"Liveness: {len(by_status.get(LATE, []))} nodes late, "
+            f"{len(by_status.get(OFFLINE, []))} offline, {len(recovered)} back online"
+        )
+
+    def _requeue(self, transitions: List[Transition], recovered: Set[str]):
+        # The update was rolled back, so undo what advance() consumed and let the next tick retry it.
+        with self._lock:
+            self._recovered |= recovered
+            for node_id, status, node, generation in reversed(transitions):
+                # A reading since then already superseded the transition.
+                if node.generation == generation:
+                    node.status = ACTIVE if status == LATE else LATE
+            self._compact()
+
+    def restore(self, db: Session) -> int:
+        rows = db.query(Node.node_id, Node.last_seen, Node.status).all()
+        epoch = datetime(1970, 1, 1)
+
+        with self._lock:
+            for node_id, last_seen, status in rows:
+                if last_seen is None or node_id in self._nodes:
+                    continue
+                node = NodeLiveness(
+                    report_interval_for(node_id),
+                    (last_seen - epoch).total_seconds(),
+                    status if status in (ACTIVE, LATE, OFFLINE) else ACTIVE
+                )
+                node.generation = 1
+                self._nodes[node_id] = node
+            self._compact()
+
+        logger.info(f"Liveness tracker restored {len(rows)} nodes")
+        return len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {ACTIVE: 0, LATE: 0, OFFLINE: 0}
+            for node in self._nodes.values():
+                counts[node.status] += 1
+            return {'tracked_nodes': len(self._nodes), 'heap_entries': len(self._heap), **counts}
@@ -0,0 +1,18 @@
+from typing import Optional
+
+# Report intervals programmed into each node sketch (the delay() at the end of loop()).
+NODE_REPORT_INTERVALS = {
+    'BASE_19007': 600,
+    'CORE_11300': 900,
+    'SENSOR_12005': 300
+}
+DEFAULT_REPORT_INTERVAL = 600
+
+def node_type_of(node_id: str) -> Optional[str]:
+    for node_type in NODE_REPORT_INTERVALS:
+        if node_id.startswith(node_type):
+            return node_type
+    return None
+
+def report_interval_for(node_id: str) -> float:
+    return NODE_REPORT_INTERVALS.get(node_type_of(node_id), DEFAULT_REPORT_INTERVAL)
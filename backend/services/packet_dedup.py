@@ -0,0 +1,186 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import threading
+import time
+import logging
+
+from services.node_profiles import report_interval_for
+
+logger = logging.getLogger(__name__)
+
+NEW = 'new'
+BETTER = 'better'
+DUPLICATE = 'duplicate'
+
+class _Packet:
+    __slots__ = ('first_seen', 'rssi', 'snr', 'received_time', 'row_id', 'stored_rssi', 'copies')
+
+    def __init__(self, first_seen: float, rssi: Optional[int], snr: Optional[float], received_time: Optional[str]):
+        self.first_seen = first_seen
+        self.rssi = rssi
+        self.snr = snr
+        self.received_time = received_time
+        self.row_id = None
+        self.stored_rssi = rssi
+        self.copies = 1
+
+class NodeLinkStats:
+    __slots__ = ('received', 'duplicates', 'lost', 'resets', 'last_timestamp', 'last_seen')
+
+    def __init__(self):
+        self.received = 0
+        self.duplicates = 0
+        self.lost = 0
+        self.resets = 0
+        self.last_timestamp = None
+        self.last_seen = None
+
+    def to_dict(self) -> dict:
+        expected = self.received + self.lost
+        return {
+            'received': self.received,
+            'duplicates': self.duplicates,
+            'estimated_lost': self.lost,
+            'loss_rate': round(self.lost / expected, 4) if expected else 0.0,
+            'resets': self.resets,
+            'last_device_timestamp': self.last_timestamp,
+            'last_seen': datetime.utcfromtimestamp(self.last_seen).isoformat() if self.last_seen else None
+        }
+
+class PacketDeduplicator:
+    def __init__(
+        self,
+        merge_window_seconds: float = 30.0,
+        ttl_seconds: float = 900.0,
+        max_entries: int = 200000,
+        max_nodes: int = 20000
+    ):
+        self.merge_window_seconds = merge_window_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+
+        # Insertion order doubles as arrival order, so expiry only ever pops from the front.
+        self._packets: "OrderedDict[Tuple[str, int], _Packet]" = OrderedDict()
+        self._nodes: "OrderedDict[str, NodeLinkStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def admit(
+        self,
+        node_id: str,
+        device_timestamp: Optional[int],
+        rssi: Optional[int] = None,
+        snr: Optional[float] = None,
+        received_time: Optional[str] = None
+    ) -> Tuple[str, Optional[int]]:
+        now = time.time()
+        with self._lock:
+            stats = self._node_stats(node_id)
+            stats.last_seen = now
+
+            if device_timestamp is None:
+                stats.received += 1
+                return NEW, None
+
+            self._expire(now)
+            key = (node_id, device_timestamp)
+            packet = self._packets.get(key)
+            if packet is None:
+                self._packets[key] = _Packet(now, rssi, snr, received_time)
+                stats.received += 1
+                self._track_sequence(node_id, stats, device_timestamp)
+                return NEW, None
+
+            packet.copies += 1
+            stats.duplicates += 1
+            within_window = now - packet.first_seen <= self.merge_window_seconds
+            if within_window and rssi is not None and (packet.rssi is None or rssi > packet.rssi):
+                packet.rssi, packet.snr, packet.received_time = rssi, snr, received_time
+                if packet.row_id is not None:
+                    packet.stored_rssi = rssi
+                    return BETTER, packet.row_id
+            return DUPLICATE, packet.row_id
+
+    def bind(self, node_id: str, device_timestamp: Optional[int], row_id: int) -> Optional[dict]:
+        if device_timestamp is None:
+            return None
+
+        with self._lock:
+            packet = self._packets.get((node_id, device_timestamp))
+            if packet is None:
+                return None
+            packet.row_id = row_id
+            # A stronger copy arrived while the first one was still being stored.
+            if packet.rssi != packet.stored_rssi:
+                packet.stored_rssi = packet.rssi
+                return self._reception(packet)
+            return None
+
+    def release(self, node_id: str, device_timestamp: Optional[int]):
+        # Forget a packet whose row was never stored, so the sender's retry is admitted as new.
+        if device_timestamp is None:
+            return
+
+        with self._lock:
+            packet = self._packets.get((node_id, device_timestamp))
+            if packet is None or packet.row_id is not None:
+                return
+            del self._packets[(node_id, device_timestamp)]
+            stats = self._nodes.get(node_id)
+            if stats is not None:
+                stats.received -= 1
+                stats.duplicates -= packet.copies - 1
+
+    def _reception(self, packet: _Packet) -> dict:
+        return {
+            'gateway_rssi': packet.rssi,
+            'gateway_snr': packet.snr,
+            'received_time': packet.received_time
+        }
+
+    def _track_sequence(self, node_id: str, stats: NodeLinkStats, device_timestamp: int):
+        last = stats.last_timestamp
+        if last is None:
+            stats.last_timestamp = device_timestamp
+            return
+
+        # Device timestamps are millis() since boot; going backwards means the node restarted.
+        delta = device_timestamp - last
+        if delta < 0:
+            stats.resets += 1
+            stats.last_timestamp = device_timestamp
+            return
+
+        interval_ms = report_interval_for(node_id) * 1000.0
+        if delta > 1.5 * interval_ms:
+            stats.lost += int(round(delta / interval_ms)) - 1
+        stats.last_timestamp = device_timestamp
+
+    def _node_stats(self, node_id: str) -> NodeLinkStats:
+        stats = self._nodes.get(node_id)
+        if stats is None:
+            stats = self._nodes[node_id] = NodeLinkStats()
+            if len(self._nodes) > self.max_nodes:
+                self._nodes.popitem(last=False)
+        else:
+            self._nodes.move_to_end(node_id)
+        return stats
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl_seconds
+        packets = self._packets
+        while packets:
+            key, packet = next(iter(packets.items()))
+            if packet.first_seen >= cutoff and len(packets) <= self.max_entries:
+                break
+            packets.popitem(last=False)
+
+    def node_stats(self, node_id: str) -> Optional[dict]:
+        with self._lock:
+            stats = self._nodes.get(node_id)
+            return stats.to_dict() if stats else None
+
+    def all_stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {node_id: stats.to_dict() for node_id, stats in self._nodes.items()}
@@ -0,0 +1,54 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, Iterable, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import threading
+import logging
+
+from database.models import Recommendation
+
+logger = logging.getLogger(__name__)
+
+class OpenRecommendationIndex:
+    # Recommendations are written by job workers that may run in another process than the API
+    # that completes them, so open ones are read from the database once per batch instead of
+    # being cached here. Only this process's claims that are not committed yet live in memory.
+    def __init__(self, dedup_window: timedelta = timedelta(hours=6)):
+        self.dedup_window = dedup_window
+        self._pending: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def latest_open(self, db: Session, keys: Iterable[Tuple[str, str]], now: datetime) -> Dict[Tuple[str, str], datetime]:
+        keys = set(keys)
+        if not keys:
+            return {}
+
+        rows = db.query(
+            Recommendation.node_id,
+            Recommendation.recommendation_type,
+            func.max(Recommendation.created_at)
+        ).filter(
+            Recommendation.node_id.in_({node_id for node_id, _ in keys}),
+            Recommendation.recommendation_type.in_({recommendation_type for _, recommendation_type in keys}),
+            Recommendation.is_completed == False,
+            Recommendation.created_at >= now - self.dedup_window
+        ).group_by(Recommendation.node_id, Recommendation.recommendation_type).all()
+
+        return {(node_id, recommendation_type): created_at for node_id, recommendation_type, created_at in rows}
+
+    def claim(self, node_id: str, recommendation_type: str, latest: Optional[datetime], now: datetime) -> bool:
+        key = (node_id, recommendation_type)
+        with self._lock:
+            if key in self._pending:
+                return False
+            if latest is not None and now - latest < self.dedup_window:
+                return False
+            self._pending.add(key)
+            return True
+
+    def release(self, node_id: str, recommendation_type: str):
+        with self._lock:
+            self._pending.discard((node_id, recommendation_type))
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,194 @@
+from typing import List, Optional, Sequence, Tuple, Union
+import re
+import numpy as np
+
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'first', 'last', 'count')
+FILL_METHODS = ('linear', 'ffill', 'none')
+
+_INTERVAL_UNITS = {'s': 1, 'm': 60, 'min': 60, 'h': 3600, 'd': 86400}
+
+# Bins per node; a tiny step over a long range would otherwise allocate without bound.
+MAX_BINS = 200000
+
+def parse_interval(interval: str) -> int:
+    match = re.fullmatch(r'\s*(\d+)\s*(s|m|min|h|d)\s*', interval or '')
+    if not match:
+        raise ValueError(f"Invalid interval: {interval!r} (expected e.g. '5m', '1h', '1d')")
+    seconds = int(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError(f"Invalid interval: {interval!r} (must be longer than zero)")
+    return seconds
+
+class TimeGridResampler:
+    def __init__(
+        self,
+        step_seconds: int = 3600,
+        aggregation: Union[str, Sequence[str]] = 'mean',
+        fill: str = 'linear',
+        max_gap_steps: int = 3,
+        max_bins: int = MAX_BINS
+    ):
+        if step_seconds <= 0:
+            raise ValueError(f"Step must be positive, got {step_seconds}")
+        if fill not in FILL_METHODS:
+            raise ValueError(f"Unknown fill method: {fill}")
+        for agg in ([aggregation] if isinstance(aggregation, str) else aggregation):
+            if agg not in AGGREGATIONS:
+                raise ValueError(f"Unknown aggregation: {agg}")
+
+        self.step_seconds = step_seconds
+        self.aggregation = aggregation
+        self.fill = fill
+        self.max_gap_steps = max_gap_steps
+        self.max_bins = max_bins
+
+    def resample(
+        self,
+        times: np.ndarray,
+        values: np.ndarray,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        node_col = np.zeros(len(times), dtype=np.int64)
+        _, grid_times, grid = self.resample_many(node_col, times, values, start, end)
+        if len(grid) == 0:
+            # No rows means no node axis to index into.
+            return grid_times, np.empty((0, grid.shape[2]))
+        return grid_times, grid[0]
+
+    def resample_many(
+        self,
+        node_col: np.ndarray,
+        times: np.ndarray,
+        values: np.ndarray,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        times = np.ascontiguousarray(times, dtype=np.float64)
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        n_columns = values.shape[1]
+        aggregations = self._aggregations(n_columns)
+
+        if len(times) == 0:
+            return (np.empty(0, dtype=node_col.dtype), np.empty(0),
+                    np.empty((0, 0, n_columns)))
+
+        step = float(self.step_seconds)
+        start = np.floor((times.min() if start is None else start) / step) * step
+        end = times.max() if end is None else end
+        n_bins = int((end - start) // step) + 1
+        if n_bins > self.max_bins:
+            raise ValueError(f"Range needs {n_bins} bins of {self.step_seconds}s (limit {self.max_bins}); use a longer interval")
+        grid_times = start + np.arange(n_bins) * step
+
+        nodes, codes = np.unique(node_col, return_inverse=True)
+        n_nodes = len(nodes)
+        offset = times - start
+        bins = (offset * (1.0 / step)).astype(np.int64)
+        inside = (offset >= 0) & (bins < n_bins)
+        if inside.all():
+            key = codes.astype(np.int64) * n_bins + bins
+            columns = np.ascontiguousarray(values.T)
+        else:
+            key = codes[inside].astype(np.int64) * n_bins + bins[inside]
+            times = times[inside]
+            columns = np.ascontiguousarray(values[inside].T)
+
+        size = n_nodes * n_bins
+        grid = np.full((n_columns, size), np.nan)
+
+        order = None
+        for c, agg in enumerate(aggregations):
+            column = columns[c]
+            valid = ~np.isnan(column)
+            all_valid = valid.all()
+            k = key if all_valid else key[valid]
+
+            if agg in ('mean', 'sum', 'count'):
+                counts = np.bincount(k, minlength=size)
+                if agg == 'count':
+                    grid[c] = counts
+                    continue
+                totals = np.bincount(k, weights=column if all_valid else column[valid], minlength=size)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    # Empty cells come out as 0/0 = NaN.
+                    grid[c] = totals / counts if agg == 'mean' else np.where(counts > 0, totals, np.nan)
+                continue
+
+            if order is None:
+                order = np.argsort(key, kind='stable')
+                sorted_key = key[order]
+                same_cell = sorted_key[1:] == sorted_key[:-1]
+                if (same_cell & (np.diff(times[order]) < 0)).any():
+                    order = np.lexsort((times, key))
+                    sorted_key = key[order]
+            sorted_valid = valid[order]
+            k = sorted_key[sorted_valid]
+            v = column[order][sorted_valid]
+            if len(k) == 0:
+                continue
+            boundaries = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+            groups = k[boundaries]
+
+            if agg == 'min':
+                grid[c, groups] = np.minimum.reduceat(v, boundaries)
+            elif agg == 'max':
+                grid[c, groups] = np.maximum.reduceat(v, boundaries)
+            elif agg == 'first':
+                grid[c, groups] = v[boundaries]
+            else:
+                grid[c, groups] = v[np.r_[boundaries[1:], len(v)] - 1]
+
+        plan_mask, plan = None, None
+        for c, agg in enumerate(aggregations):
+            if agg in ('sum', 'count') or self.fill == 'none' or self.max_gap_steps <= 0:
+                continue
+            missing = np.isnan(grid[c])
+            if not missing.any():
+                continue
+            # Columns usually share the same missing cells (dropped packets), so the plan is reused.
+            if plan_mask is None or not np.array_equal(missing, plan_mask):
+                plan_mask, plan = missing, self._fill_plan(missing, n_bins)
+            self._apply_fill(grid[c], plan)
+
+        return nodes, grid_times, grid.reshape(n_columns, n_nodes, n_bins).transpose(1, 2, 0)
+
+    def _aggregations(self, n_columns: int) -> List[str]:
+        if isinstance(self.aggregation, str):
+            return [self.aggregation] * n_columns
+        if len(self.aggregation) != n_columns:
+            raise ValueError("One aggregation per value column is required")
+        return list(self.aggregation)
+
+    def _fill_plan(self, missing: np.ndarray, n_bins: int) -> tuple:
+        # Cells are laid out as consecutive per-node rows of n_bins; fills never cross a row.
+        holes = np.flatnonzero(missing)
+        present = np.flatnonzero(~missing)
+        if len(present) == 0:
+            return holes[:0], holes[:0], holes[:0], None
+
+        position = np.searchsorted(present, holes)
+        hole_prev = np.where(position > 0, present[np.maximum(position - 1, 0)], -1)
+        row_start = holes - holes % n_bins
+        has_prev = hole_prev >= row_start
+
+        if self.fill == 'ffill':
+            fillable = has_prev & (holes - hole_prev <= self.max_gap_steps)
+            return holes[fillable], hole_prev[fillable], None, None
+
+        # Linear interpolation only across gaps no longer than max_gap_steps missing cells.
+        hole_next = np.where(position < len(present), present[np.minimum(position, len(present) - 1)], len(missing))
+        has_next = hole_next < row_start + n_bins
+        fillable = has_prev & has_next & (hole_next - hole_prev - 1 <= self.max_gap_steps)
+
+        holes, left, right = holes[fillable], hole_prev[fillable], hole_next[fillable]
+        return holes, left, right, (holes - left) / (right - left)
+
+    def _apply_fill(self, flat: np.ndarray, plan: tuple):
+        holes, left, right, weight = plan
+        if right is None:
+            flat[holes] = flat[left]
+        else:
+            flat[holes] = flat[left] + (flat[right] - flat[left]) * weight
@@ -0,0 +1,124 @@
+from collections import Counter
+from typing import Optional
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_THREAD_NUMBER = re.compile(r'\d+')
+
+class SamplingProfiler:
+    def __init__(self, max_depth: int = 128, max_seconds: float = 300.0):
+        self.max_depth = max_depth
+        self.max_seconds = max_seconds
+
+        # Read on every request by the middleware, so it is a plain attribute.
+        self.active = False
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.interval = 0.005
+
+        self._requests_left: Optional[int] = None
+        self._deadline = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, seconds: Optional[float] = None, requests: Optional[int] = None, interval_ms: float = 5.0) -> bool:
+        with self._lock:
+            if self.active:
+                return False
+
+            self.samples = Counter()
+            self.sample_count = 0
+            self.interval = max(interval_ms, 0.5) / 1000.0
+            self._requests_left = requests
+            self._deadline = time.monotonic() + min(seconds or self.max_seconds, self.max_seconds)
+            self._stop.clear()
+            self.started_at = time.time()
+            self.stopped_at = None
+            self.active = True
+
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+        logger.info(f"Sampling profiler started (seconds={seconds}, requests={requests}, interval={interval_ms}ms)")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def request_finished(self):
+        with self._lock:
+            if self._requests_left is None:
+                return
+            self._requests_left -= 1
+            if self._requests_left > 0:
+                return
+        self._stop.set()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < self._deadline:
+                names = {t.ident: _THREAD_NUMBER.sub('N', t.name) for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    self.samples[self._collapse(names.get(thread_id, 'thread'), frame)] += 1
+                self.sample_count += 1
+        finally:
+            self.active = False
+            self.stopped_at = time.time()
+            logger.info(f"Sampling profiler stopped after {self.sample_count} samples")
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        stack.append(thread_name)
+        stack.reverse()
+        return ';'.join(stack)
+
+    def collapsed(self) -> str:
+        # Brendan Gregg's folded format: "frame;frame;frame count", one stack per line.
+        samples = list(self.samples.items())
+        samples.sort(key=lambda item: item[1], reverse=True)
+        return ''.join(f"{stack} {count}\n" for stack, count in samples)
+
+    def status(self) -> dict:
+        return {
+            'active': self.active,
+            'samples': self.sample_count,
+            'unique_stacks': len(self.samples),
+            'interval_ms': self.interval * 1000,
+            'requests_left': self._requests_left,
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at
+        }
+
+class SamplingProfilerMiddleware:
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.active or scope["type"] != "http" or scope["path"].startswith("/api/debug/profiler"):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished()
@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+
+from database.models import SensorData
+
+def to_epoch_seconds(values) -> np.ndarray:
+    return np.array(values, dtype='datetime64[us]').astype(np.int64) / 1e6
+
+def load_sensor_arrays(
+    db: Session,
+    columns: List[str],
+    since: Optional[datetime] = None,
+    node_ids: Optional[List[str]] = None,
+    chunk_size: int = 50000
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    query = select(
+        SensorData.node_id,
+        SensorData.created_at,
+        *[getattr(SensorData, column) for column in columns]
+    )
+    if since:
+        query = query.where(SensorData.created_at >= since)
+    if node_ids:
+        query = query.where(SensorData.node_id.in_(node_ids))
+
+    node_parts, time_parts, value_parts = [], [], []
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        node_parts.append(np.array([row[0] for row in partition], dtype=object))
+        time_parts.append(to_epoch_seconds([row[1] for row in partition]))
+        value_parts.append(np.array([row[2:] for row in partition], dtype=np.float64).reshape(-1, len(columns)))
+
+    if not node_parts:
+        return (np.empty(0, dtype=object), np.empty(0, dtype=np.float64),
+                np.empty((0, len(columns)), dtype=np.float64))
+
+    return np.concatenate(node_parts), np.concatenate(time_parts), np.concatenate(value_parts)
+
+def group_sorted(node_col: np.ndarray, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Returns the distinct nodes, a per-row group code and the sort order by (node, time).
+    nodes, codes = np.unique(node_col, return_inverse=True)
+    order = np.lexsort((times, codes))
+    return nodes, codes[order], order
@@ -0,0 +1,149 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from typing import Dict, List, Optional
+from datetime import datetime
+import numpy as np
+import logging
+
+from database.models import SensorData
+
+logger = logging.getLogger(__name__)
+
+TRAINING_COLUMNS = [
+    'temperature', 'humidity', 'soil_moisture', 'soil_ph',
+    'light_intensity', 'pressure', 'rainfall', 'timestamp'
+]
+
+class TrainingDataLoader:
+    def __init__(
+        self,
+        chunk_size: int = 10000,
+        memory_budget_mb: float = 64.0,
+        sampling: str = 'stratified',
+        seed: Optional[int] = 42
+    ):
+        if sampling not in ('stratified', 'reservoir'):
+            raise ValueError(f"Unknown sampling mode: {sampling}")
+
+        self.chunk_size = chunk_size
+        self.memory_budget_mb = memory_budget_mb
+        self.sampling = sampling
+        self.seed = seed
+
+    @property
+    def max_rows(self) -> int:
+        row_bytes = len(TRAINING_COLUMNS) * np.dtype(np.float64).itemsize
+        return max(1, int(self.memory_budget_mb * 1024 * 1024 // row_bytes))
+
+    def load(
+        self,
+        db: Session,
+        node_ids: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        rng = np.random.default_rng(self.seed)
+
+        if self.sampling == 'stratified':
+            strata = node_ids or self._distinct_nodes(db, start, end)
+            if not strata:
+                return self._empty()
+            # Split the budget exactly: the leftover rows go to random nodes, and with more nodes
+            # than rows only a random max_rows of them are sampled at all.
+            strata = list(strata)
+            rng.shuffle(strata)
+            per_node, extra = divmod(self.max_rows, len(strata))
+            reservoirs = {
+                node_id: _Reservoir(per_node + (i < extra))
+                for i, node_id in enumerate(strata) if per_node + (i < extra) > 0
+            }
+        else:
+            reservoir = _Reservoir(self.max_rows)
+
+        rows_seen = 0
+        for node_chunk, values in self._stream_chunks(db, node_ids, start, end):
+            rows_seen += len(values)
+
+            if self.sampling == 'reservoir':
+                reservoir.add(values, rng)
+                continue
+
+            chunk_nodes, inverse = np.unique(node_chunk, return_inverse=True)
+            for i, node_id in enumerate(chunk_nodes):
+                target = reservoirs.get(node_id)
+                if target is not None:
+                    target.add(values[inverse == i], rng)
+
+        if self.sampling == 'reservoir':
+            sample = reservoir.values()
+        else:
+            sample = np.concatenate([r.values() for r in reservoirs.values()])
+
+        logger.info(f"Training data loader sampled {len(sample)} of {rows_seen} rows ({self.sampling})")
+
+        return {column: sample[:, i] for i, column in enumerate(TRAINING_COLUMNS)}
+
+    def _stream_chunks(
+        self,
+        db: Session,
+        node_ids: Optional[List[str]],
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ):
+        columns = [getattr(SensorData, column) for column in TRAINING_COLUMNS]
+        query = self._apply_filters(select(SensorData.node_id, *columns), node_ids, start, end)
+
+        result = db.execute(query.execution_options(yield_per=self.chunk_size))
+        try:
+            for partition in result.partitions():
+                node_chunk = np.array([row[0] for row in partition], dtype=object)
+                values = np.array([row[1:] for row in partition], dtype=np.float64)
+                yield node_chunk, values
+        finally:
+            result.close()
+
+    def _distinct_nodes(
+        self,
+        db: Session,
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> List[str]:
+        query = self._apply_filters(select(func.distinct(SensorData.node_id)), None, start, end)
+        return [row[0] for row in db.execute(query)]
+
+    def _apply_filters(self, query, node_ids, start, end):
+        if node_ids:
+            query = query.where(SensorData.node_id.in_(node_ids))
+        if start:
+            query = query.where(SensorData.created_at >= start)
+        if end:
+            query = query.where(SensorData.created_at < end)
+        return query
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        return {column: np.empty(0, dtype=np.float64) for column in TRAINING_COLUMNS}
+
+# Algorithm R applied block-wise; storage is preallocated so a reservoir never grows past capacity.
+class _Reservoir:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.empty((capacity, len(TRAINING_COLUMNS)), dtype=np.float64)
+        self.seen = 0
+
+    def add(self, block: np.ndarray, rng: np.random.Generator):
+        filled = min(self.seen, self.capacity)
+        take = min(self.capacity - filled, len(block))
+        if take:
+            self.data[filled:filled + take] = block[:take]
+
+        rest = block[take:]
+        if len(rest):
+            positions = self.seen + take + np.arange(len(rest))
+            slots = rng.integers(0, positions + 1)
+            keep = slots < self.capacity
+            self.data[slots[keep]] = rest[keep]
+
+        self.seen += len(block)
+
+    def values(self) -> np.ndarray:
+        return self.data[:min(self.seen, self.capacity)]
@@ -0,0 +1,230 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+import numpy as np
+import logging
+
+from services.sensor_arrays import load_sensor_arrays, group_sorted, to_epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+TREND_METRICS = ['temperature', 'humidity', 'soil_moisture']
+
+DEFAULT_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30)
+}
+
+# Fitted change over the observed span that counts as a trend (same scale as the old first/last delta rule).
+TREND_THRESHOLDS = {
+    'temperature': 2.0,
+    'humidity': 10.0,
+    'soil_moisture': 50.0
+}
+
+class TrendAnalysisEngine:
+    def __init__(
+        self,
+        windows: Optional[Dict[str, timedelta]] = None,
+        metrics: Optional[List[str]] = None,
+        change_point_threshold: float = 1.36,
+        min_points: int = 5,
+        rolling_points: int = 24,
+        rolling_span: int = 3
+    ):
+        self.windows = windows or DEFAULT_WINDOWS
+        self.metrics = metrics or TREND_METRICS
+        self.change_point_threshold = change_point_threshold
+        self.min_points = min_points
+        # Each window is cut into rolling_points equal buckets; the rolling mean at a bucket
+        # covers it and the rolling_span - 1 buckets before it.
+        self.rolling_points = rolling_points
+        self.rolling_span = rolling_span
+
+    def compute(
+        self,
+        db: Session,
+        node_ids: Optional[List[str]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, dict]]:
+        now = now or datetime.utcnow()
+        since = now - max(self.windows.values())
+
+        node_col, times, values = load_sensor_arrays(db, self.metrics, since=since, node_ids=node_ids)
+        results = self.compute_arrays(node_col, times, values, to_epoch_seconds([now])[0])
+
+        logger.info(f"Trend analysis computed for {len(results)} nodes over {len(times)} rows")
+        return results
+
+    def compute_arrays(
+        self,
+        node_col: np.ndarray,
+        times: np.ndarray,
+        values: np.ndarray,
+        now: float
+    ) -> Dict[str, Dict[str, dict]]:
+        if len(times) == 0:
+            return {}
+
+        nodes, codes, order = group_sorted(node_col, times)
+        times = times[order]
+        values = values[order]
+        n_groups = len(nodes)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        days = (times - now) / 86400.0
+
+        results = {node_id: {} for node_id in nodes}
+        for window_name, window in self.windows.items():
+            window_start = now - window.total_seconds()
+            in_window = times >= window_start
+            rows = np.bincount(codes, weights=in_window, minlength=n_groups)
+
+            step = window.total_seconds() / self.rolling_points
+            bucket = np.clip((times - window_start) // step, 0, self.rolling_points - 1).astype(np.int64)
+            bucket_key = codes.astype(np.int64) * self.rolling_points + bucket
+            rolling = {
+                'step_seconds': step,
+                'width_seconds': step * self.rolling_span,
+                'at': [
+                    datetime.utcfromtimestamp(window_start + (i + 1) * step).isoformat()
+                    for i in range(self.rolling_points)
+                ]
+            }
+
+            per_metric = {}
+            for i, metric in enumerate(self.metrics):
+                per_metric[metric] = self._metric_stats(codes, starts, days, times, values[:, i], in_window, n_groups)
+                per_metric[metric]['rolling_mean'] = self._rolling_mean(bucket_key, values[:, i], in_window, n_groups)
+
+            for g, node_id in enumerate(nodes):
+                window_result = {'rows': int(rows[g]), 'rolling': rolling}
+                for metric, stats in per_metric.items():
+                    window_result[metric] = self._node_summary(metric, stats, g)
+                results[node_id][window_name] = window_result
+
+        return results
+
+    def _rolling_mean(self, bucket_key, y, in_window, n_groups) -> np.ndarray:
+        valid = in_window & ~np.isnan(y)
+        size = n_groups * self.rolling_points
+        sums = np.bincount(bucket_key[valid], weights=y[valid], minlength=size).reshape(n_groups, -1)
+        counts = np.bincount(bucket_key[valid], minlength=size).reshape(n_groups, -1)
+
+        # Trailing sums over rolling_span buckets as differences of per-node running totals.
+        cum_sums = np.concatenate([np.zeros((n_groups, 1)), np.cumsum(sums, axis=1)], axis=1)
+        cum_counts = np.concatenate([np.zeros((n_groups, 1)), np.cumsum(counts, axis=1)], axis=1)
+        lower = np.maximum(np.arange(self.rolling_points) - self.rolling_span + 1, 0)
+        rolled_counts = cum_counts[:, 1:] - cum_counts[:, lower]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(rolled_counts > 0, (cum_sums[:, 1:] - cum_sums[:, lower]) / rolled_counts, np.nan)
+
+    def _metric_stats(self, codes, starts, x, times, y, in_window, n_groups) -> dict:
+        valid = in_window & ~np.isnan(y)
+        w = valid.astype(np.float64)
+        yv = np.where(valid, y, 0.0)
+        xv = np.where(valid, x, 0.0)
+
+        n = np.bincount(codes, weights=w, minlength=n_groups)
+        sx = np.bincount(codes, weights=xv, minlength=n_groups)
+        sy = np.bincount(codes, weights=yv, minlength=n_groups)
+        sxx = np.bincount(codes, weights=xv * xv, minlength=n_groups)
+        sxy = np.bincount(codes, weights=xv * yv, minlength=n_groups)
+        syy = np.bincount(codes, weights=yv * yv, minlength=n_groups)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = sy / n
+            denom = n * sxx - sx * sx
+            slope = np.where((n >= 2) & (denom > 1e-12), (n * sxy - sx * sy) / denom, np.nan)
+            std = np.sqrt(np.maximum(syy / n - mean * mean, 0.0))
+
+        # Observed span of valid samples per node; rows are sorted by (node, time).
+        valid_idx = np.flatnonzero(valid)
+        span = np.zeros(n_groups)
+        if len(valid_idx):
+            valid_codes = codes[valid_idx]
+            first = valid_idx[np.unique(valid_codes, return_index=True)[1]]
+            last_rev = np.unique(valid_codes[::-1], return_index=True)[1]
+            last = valid_idx[::-1][last_rev]
+            present = np.unique(valid_codes)
+            span[present] = x[last] - x[first]
+
+        # CUSUM change point: the largest excursion of cumulative deviations from the window mean.
+        centered = np.where(valid, y - np.nan_to_num(mean)[codes], 0.0)
+        cusum = np.cumsum(centered)
+        cusum -= np.r_[0.0, cusum][starts][codes]
+        excursion = np.abs(cusum)
+        peak = np.maximum.reduceat(excursion, starts)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            statistic = peak / (std * np.sqrt(n))
+
+        hits = np.flatnonzero(valid & (excursion == peak[codes]) & (peak[codes] > 0))
+        change_index = np.full(n_groups, -1)
+        if len(hits):
+            hit_groups, first_hit = np.unique(codes[hits], return_index=True)
+            change_index[hit_groups] = hits[first_hit]
+
+        cum_y = np.cumsum(yv)
+        cum_n = np.cumsum(w)
+        base_y = np.r_[0.0, cum_y][starts]
+        base_n = np.r_[0.0, cum_n][starts]
+        shift = np.full(n_groups, np.nan)
+        has_change = change_index >= 0
+        if has_change.any():
+            idx = change_index[has_change]
+            before_n = cum_n[idx] - base_n[has_change]
+            before_y = cum_y[idx] - base_y[has_change]
+            after_n = n[has_change] - before_n
+            after_y = sy[has_change] - before_y
+            with np.errstate(divide='ignore', invalid='ignore'):
+                shift[has_change] = after_y / after_n - before_y / before_n
+
+        return {
+            'count': n,
+            'mean': mean,
+            'slope': slope,
+            'span': span,
+            'statistic': statistic,
+            'change_index': change_index,
+            'shift': shift,
+            'times': times
+        }
+
+    def _node_summary(self, metric: str, stats: dict, g: int) -> dict:
+        count = int(stats['count'][g])
+        slope = stats['slope'][g]
+
+        summary = {
+            'count': count,
+            'mean': _round(stats['mean'][g]),
+            'slope_per_day': _round(slope),
+            'change': None,
+            'trend': None,
+            'change_point': None,
+            'rolling_mean': [_round(value) for value in stats['rolling_mean'][g].tolist()]
+        }
+
+        if count < 2 or np.isnan(slope):
+            return summary
+
+        change = slope * stats['span'][g]
+        threshold = TREND_THRESHOLDS.get(metric, 0.0)
+        summary['change'] = _round(change)
+        summary['trend'] = 'increasing' if change > threshold else 'decreasing' if change < -threshold else 'stable'
+
+        statistic = stats['statistic'][g]
+        index = stats['change_index'][g]
+        if count >= self.min_points and index >= 0 and statistic > self.change_point_threshold:
+            summary['change_point'] = {
+                'at': datetime.utcfromtimestamp(stats['times'][index]).isoformat(),
+                'shift': _round(stats['shift'][g]),
+                'statistic': _round(statistic)
+            }
+
+        return summary
+
+def _round(value, digits: int = 4):
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), digits)
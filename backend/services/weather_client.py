@@ -0,0 +1,93 @@
+from typing import Optional
+import asyncio
+import random
+import time
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class AsyncTokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+class AsyncWeatherClient:
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        max_connections: int = 10,
+        requests_per_minute: float = 60.0,
+        burst: int = 5,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 10.0
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = AsyncTokenBucket(requests_per_minute / 60.0, burst)
+
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    async def fetch_forecast(self, location: str, days: int) -> Optional[dict]:
+        params = {
+            'q': location,
+            'appid': self.api_key,
+            'units': 'metric',
+            'cnt': days * 8
+        }
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                response = await self._client.get(f"{self.base_url}/forecast", params=params)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUS_CODES:
+                    logger.warning(f"Weather API returned status {response.status_code} for {location}")
+                    return None
+                retry_after = response.headers.get('Retry-After')
+                logger.warning(f"Weather API returned status {response.status_code} for {location} (attempt {attempt + 1})")
+            except httpx.HTTPError as e:
+                logger.warning(f"Weather API request failed for {location} (attempt {attempt + 1}): {e}")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        logger.error(f"Weather API gave up on {location} after {self.max_retries + 1} attempts")
+        return None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # Full jitter keeps retries from many locations from lining up.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,92 @@
+from typing import List, Optional
+import asyncio
+import logging
+
+from database.database import SessionLocal
+from database.models import Node
+from services.weather_client import AsyncWeatherClient
+from services.weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+class WeatherPrefetcher:
+    def __init__(
+        self,
+        weather_service: WeatherService,
+        client: Optional[AsyncWeatherClient],
+        days: int = 7,
+        interval_seconds: float = 600.0,
+        concurrency: int = 4
+    ):
+        self.weather_service = weather_service
+        self.client = client
+        self.days = days
+        self.interval_seconds = interval_seconds
+        self.concurrency = concurrency
+
+    async def run(self):
+        while True:
+            try:
+                refreshed = await self.run_once()
+                if refreshed:
+                    logger.info(f"Weather prefetch refreshed {refreshed} locations")
+            except Exception as e:
+                logger.error(f"Weather prefetch failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> int:
+        locations = await asyncio.to_thread(self._known_locations)
+        # Refresh anything that would go stale before the next pass.
+        due = [
+            location for location in locations
+            if self.weather_service.cache.needs_refresh((location, self.days), self.interval_seconds * 2)
+        ]
+        if not due:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(location: str) -> bool:
+            async with semaphore:
+                return await self.refresh_location(location)
+
+        results = await asyncio.gather(*(refresh(location) for location in due))
+        return sum(results)
+
+    async def refresh_location(self, location: str) -> bool:
+        loop = asyncio.get_running_loop()
+
+        def fetch_and_store() -> bool:
+            response = None
+            if self.client and self.client.api_key:
+                response = asyncio.run_coroutine_threadsafe(
+                    self.client.fetch_forecast(location, self.days), loop
+                ).result()
+                if not response:
+                    return False
+            self._store(location, response)
+            return True
+
+        # Shares the request path's single-flight slot, so a prefetch and a cache miss never both
+        # call the upstream; whichever loses the race waits for the other's result.
+        try:
+            stored, leader = await asyncio.to_thread(self.weather_service.fetches.do, location, fetch_and_store)
+        except Exception as e:
+            logger.error(f"Weather prefetch failed for {location}: {e}")
+            return False
+        return leader and stored
+
+    def _store(self, location: str, response: Optional[dict]):
+        db = SessionLocal()
+        try:
+            self.weather_service.store_forecast(db, location, self.days, response)
+        finally:
+            db.close()
+
+    def _known_locations(self) -> List[str]:
+        db = SessionLocal()
+        try:
+            rows = db.query(Node.location).filter(Node.location.isnot(None)).distinct().all()
+            return [location for (location,) in rows if location]
+        finally:
+            db.close()
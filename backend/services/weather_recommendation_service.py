@@ -0,0 +1,53 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List
+import hashlib
+import json
+import threading
+import logging
+
+from database.models import Node
+from api.schemas import WeatherForecastResponse
+from services.ai_service import AIRecommendationService
+from services.weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+class WeatherRecommendationPipeline:
+    def __init__(self, weather_service: WeatherService, ai_service: AIRecommendationService):
+        self.weather_service = weather_service
+        self.ai_service = ai_service
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def on_forecast(self, db: Session, location: str, forecast: List[WeatherForecastResponse]) -> int:
+        recommendations = self.weather_service.get_agricultural_recommendations(forecast)
+        node_ids = [
+            node_id for (node_id,) in
+            db.query(Node.node_id).filter(Node.location == location).order_by(Node.node_id).all()
+        ]
+        if not node_ids:
+            return 0
+
+        # Same advice for the same set of nodes means nothing new to store.
+        fingerprint = hashlib.sha1(json.dumps([recommendations, node_ids], sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            if self._fingerprints.get(location) == fingerprint:
+                return 0
+            self._fingerprints[location] = fingerprint
+
+        if not recommendations:
+            return 0
+
+        items = [(node_id, rec) for node_id in node_ids for rec in recommendations]
+        try:
+            rows = self.ai_service.save_recommendation_batch(db, items)
+        except Exception:
+            with self._lock:
+                self._fingerprints.pop(location, None)
+            raise
+
+        logger.info(
+            f"Weather recommendations for {location}: {len(recommendations)} evaluated once, "
+            f"{len(rows)} stored across {len(node_ids)} nodes"
+        )
+        return len(rows)
@@ -1,36 +1,113 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import case, func, select, text
+from typing import Callable, List, Optional
 from datetime import datetime, timedelta
+import threading
 import requests
 import logging
+import os
 
+from database.database import SessionLocal
 from database.models import WeatherForecast
+from database.upsert import upsert_rows
 from api.schemas import WeatherForecastResponse
+from services.forecast_cache import ForecastCache, SingleFlight, FRESH, STALE
 
 logger = logging.getLogger(__name__)
 
+WEATHER_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "1800"))
+WEATHER_CACHE_STALE_SECONDS = float(os.getenv("WEATHER_CACHE_STALE_SECONDS", str(6 * 3600)))
+
+FORECAST_COLUMNS = [
+    'location', 'date', 'temperature_min', 'temperature_max', 'humidity',
+    'precipitation_probability', 'precipitation_amount', 'wind_speed', 'description', 'created_at'
+]
+
 class WeatherService:
-    def __init__(self):
-        self.api_key = None
-        self.base_url = "http://api.openweathermap.org/data/2.5"
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, cache: Optional[ForecastCache] = None):
+        self.api_key = api_key or os.getenv("WEATHER_API_KEY")
+        self.base_url = base_url or os.getenv("WEATHER_API_BASE_URL", "http://api.openweathermap.org/data/2.5")
+        self.cache = cache or ForecastCache(WEATHER_CACHE_TTL_SECONDS, WEATHER_CACHE_STALE_SECONDS)
+        self.fetches = SingleFlight()
+        self.refreshes = SingleFlight()
+        self.http = requests.Session()
+        self.refresh_listeners: List[Callable[[Session, str, List[WeatherForecastResponse]], None]] = []
+        # When set, stale refreshes are handed to it (e.g. the job queue) instead of a daemon thread.
+        self.refresh_scheduler: Optional[Callable[[str, int], None]] = None
         
     def get_forecast(self, db: Session, location: str, days: int = 7) -> List[WeatherForecastResponse]:
+        key = (location, days)
+        forecast, state = self.cache.lookup(key)
+        if state == FRESH:
+            return forecast
+        if state == STALE:
+            self._refresh_in_background(location, days)
+            return forecast
+        
         try:
-            cached_forecast = self._get_cached_forecast(db, location, days)
-            if cached_forecast:
-                return cached_forecast
-            
-            forecast_data = self._fetch_weather_forecast(location, days)
-            if forecast_data:
-                self._save_forecast(db, location, forecast_data)
-                return self._get_cached_forecast(db, location, days)
-            
-            return []
-            
+            return self._load_forecast(db, location, days)
         except Exception as e:
             logger.error(f"Error getting weather forecast for {location}: {e}")
             return []
     
+    def store_forecast(self, db: Session, location: str, days: int, response: Optional[dict] = None) -> List[WeatherForecastResponse]:
+        if response:
+            forecast_data = self._parse_weather_data(response, location)
+        else:
+            forecast_data = self._generate_mock_forecast(location, days)
+        self._save_forecast(db, location, forecast_data)
+        return self._load_forecast(db, location, days, fetch=False)
+    
+    def _load_forecast(self, db: Session, location: str, days: int, fetch: bool = True) -> List[WeatherForecastResponse]:
+        cached_forecast = self._get_cached_forecast(db, location, days)
+        if not cached_forecast and fetch:
+            # Only one upstream fetch per location at a time; callers that lose the race
+            # wait for it and then read what it stored.
+            self.fetches.do(location, lambda: self._fetch_and_save(db, location, days))
+            cached_forecast = self._get_cached_forecast(db, location, days)
+        
+        if not cached_forecast:
+            return []
+        
+        forecast = [WeatherForecastResponse.model_validate(f) for f in cached_forecast]
+        self.cache.set((location, days), forecast)
+        self._notify_refresh(db, location, forecast)
+        return forecast
+    
+    def _notify_refresh(self, db: Session, location: str, forecast: List[WeatherForecastResponse]):
+        for listener in self.refresh_listeners:
+            try:
+                listener(db, location, forecast)
+            except Exception as e:
+                logger.error(f"Weather refresh listener failed for {location}: {e}")
+    
+    def _fetch_and_save(self, db: Session, location: str, days: int):
+        forecast_data = self._fetch_weather_forecast(location, days)
+        if forecast_data:
+            self._save_forecast(db, location, forecast_data)
+    
+    def _refresh_in_background(self, location: str, days: int):
+        if self.refreshes.in_flight((location, days)):
+            return
+        if self.refresh_scheduler is not None:
+            self.refresh_scheduler(location, days)
+            return
+        threading.Thread(
+            target=self._refresh, args=(location, days), name=f"weather-refresh-{location}", daemon=True
+        ).start()
+    
+    def _refresh(self, location: str, days: int):
+        db = SessionLocal()
+        try:
+            self.refresh_forecast(db, location, days)
+        except Exception as e:
+            logger.error(f"Error refreshing weather forecast for {location}: {e}")
+        finally:
+            db.close()
+    
+    def refresh_forecast(self, db: Session, location: str, days: int):
+        self.refreshes.do((location, days), lambda: self._load_forecast(db, location, days))
+    
     def _fetch_weather_forecast(self, location: str, days: int) -> Optional[List[dict]]:
         try:
             if not self.api_key:
@@ -44,7 +121,7 @@ class WeatherService:
                 'cnt': days * 8
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -81,7 +158,7 @@ class WeatherService:
     
     def _generate_mock_forecast(self, location: str, days: int) -> List[dict]:
         forecast_list = []
-        base_date = datetime.now()
+        base_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         import random
         
@@ -106,17 +183,40 @@ class WeatherService:
     
     def _save_forecast(self, db: Session, location: str, forecast_data: List[dict]):
         try:
+            now = datetime.utcnow()
+            rows = {}
             for forecast in forecast_data:
-                weather_forecast = WeatherForecast(**forecast)
-                db.add(weather_forecast)
+                rows[forecast['date']] = {**forecast, 'created_at': now}
             
+            upsert_rows(
+                db, WeatherForecast, list(rows.values()),
+                index_elements=['location', 'date'],
+                update_columns=[c for c in FORECAST_COLUMNS if c not in ('location', 'date')]
+            )
             db.commit()
-            logger.info(f"Saved {len(forecast_data)} forecast records for {location}")
+            logger.info(f"Saved {len(rows)} forecast records for {location}")
             
         except Exception as e:
             logger.error(f"Error saving forecast data: {e}")
             db.rollback()
     
+    def compact_forecasts(self, db: Session) -> int:
+        # Older databases appended a full forecast set per refresh; keep the newest row per
+        # (location, date) so the unique index can be created on them.
+        keep = select(func.max(WeatherForecast.id)).group_by(WeatherForecast.location, WeatherForecast.date)
+        removed = db.query(WeatherForecast).filter(
+            WeatherForecast.id.notin_(keep)
+        ).delete(synchronize_session=False)
+        db.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_weather_forecast_location_date "
+            "ON weather_forecast (location, date)"
+        ))
+        db.commit()
+        
+        if removed:
+            logger.info(f"Removed {removed} duplicate weather forecast rows")
+        return removed
+    
     def _get_cached_forecast(self, db: Session, location: str, days: int) -> Optional[List[WeatherForecastResponse]]:
         try:
             cutoff_date = datetime.now() - timedelta(hours=6)
@@ -151,7 +251,7 @@ class WeatherService:
                 'title': 'Yüksek Sıcaklık Uyarısı',
                 'description': f'Önümüzdeki {len(high_temp_days)} günde 35°C üzeri sıcaklık bekleniyor. Ek sulama ve gölgelik sağlayın.',
                 'priority': 'high',
-                'recommendation_type': 'weather'
+                'recommendation_type': 'weather_heat'
             })
         
         frost_days = [f for f in next_3_days if f.temperature_min < 5]
@@ -160,7 +260,7 @@ class WeatherService:
                 'title': 'Don Riski',
                 'description': f'Önümüzdeki {len(frost_days)} günde don riski var. Koruyucu önlemler alın.',
                 'priority': 'high',
-                'recommendation_type': 'weather'
+                'recommendation_type': 'weather_frost'
             })
         
         rainy_days = [f for f in next_3_days if f.precipitation_probability > 70]
@@ -169,7 +269,7 @@ class WeatherService:
                 'title': 'Yağmurlu Hava',
                 'description': f'Önümüzdeki {len(rainy_days)} günde yağış bekleniyor. Sulama programını ayarlayın.',
                 'priority': 'medium',
-                'recommendation_type': 'weather'
+                'recommendation_type': 'weather_rain'
             })
         
         high_humidity_days = [f for f in next_3_days if f.humidity > 85]
@@ -178,7 +278,7 @@ class WeatherService:
                 'title': 'Yüksek Nem',
                 'description': 'Yüksek nem oranı mantar hastalıkları riskini artırıyor. Preventif önlemler alın.',
                 'priority': 'medium',
-                'recommendation_type': 'weather'
+                'recommendation_type': 'weather_humidity'
             })
         
         return recommendations
@@ -187,27 +287,31 @@ class WeatherService:
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
             
-            forecasts = db.query(WeatherForecast).filter(
+            stats = db.query(
+                func.count(WeatherForecast.id).label('rows'),
+                func.avg(WeatherForecast.temperature_max).label('avg_temp_max'),
+                func.avg(WeatherForecast.temperature_min).label('avg_temp_min'),
+                func.avg(WeatherForecast.humidity).label('avg_humidity'),
+                func.sum(WeatherForecast.precipitation_amount).label('total_precipitation'),
+                func.sum(case((WeatherForecast.precipitation_amount > 0, 1), else_=0)).label('rainy_days'),
+                func.sum(case((WeatherForecast.temperature_max > 30, 1), else_=0)).label('hot_days'),
+                func.sum(case((WeatherForecast.temperature_min < 5, 1), else_=0)).label('frost_days')
+            ).filter(
                 WeatherForecast.location == location,
                 WeatherForecast.date >= cutoff_date
-            ).all()
+            ).one()
             
-            if not forecasts:
+            if not stats.rows:
                 return {}
             
-            avg_temp_max = sum(f.temperature_max for f in forecasts) / len(forecasts)
-            avg_temp_min = sum(f.temperature_min for f in forecasts) / len(forecasts)
-            avg_humidity = sum(f.humidity for f in forecasts) / len(forecasts)
-            total_precipitation = sum(f.precipitation_amount for f in forecasts)
-            
             patterns = {
-                'average_temperature_max': round(avg_temp_max, 2),
-                'average_temperature_min': round(avg_temp_min, 2),
-                'average_humidity': round(avg_humidity, 2),
-                'total_precipitation': round(total_precipitation, 2),
-                'rainy_days': len([f for f in forecasts if f.precipitation_amount > 0]),
-                'hot_days': len([f for f in forecasts if f.temperature_max > 30]),
-                'frost_days': len([f for f in forecasts if f.temperature_min < 5])
+                'average_temperature_max': round(stats.avg_temp_max or 0, 2),
+                'average_temperature_min': round(stats.avg_temp_min or 0, 2),
+                'average_humidity': round(stats.avg_humidity or 0, 2),
+                'total_precipitation': round(stats.total_precipitation or 0, 2),
+                'rainy_days': int(stats.rainy_days or 0),
+                'hot_days': int(stats.hot_days or 0),
+                'frost_days': int(stats.frost_days or 0)
             }
             
             return patterns
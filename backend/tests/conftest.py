@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The backend runs with its own directory on the path (uvicorn api.main:app from backend/).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# api.main builds its engine, job queue and workers at import time from these.
+TEST_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}")
+os.environ.setdefault("JOB_QUEUE_URL", f"sqlite:///{os.path.join(TEST_DIR, 'job_queue.db')}")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("WEATHER_PREFETCH_SECONDS", "0")
+
+@pytest.fixture(scope="session")
+def main():
+    from api import main
+    from database.database import create_tables
+    create_tables()
+    return main
+
+@pytest.fixture
+def client(main):
+    from fastapi.testclient import TestClient
+    # No context manager: the startup schedulers and workers stay off during tests.
+    return TestClient(main.app)
+
+class StubServer:
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                stub.requests.append((self.command, self.path, body))
+                status, payload = stub.respond(self.command, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(respond):
+        server = StubServer(respond)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
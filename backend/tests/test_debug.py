@@ -0,0 +1,2 @@
+def test_sql_profile_requires_admin_token(client):
+    assert client.get("/api/debug/sql-profile").status_code == 403
@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, text
+
+from services.history_import import CSV, SERIAL, HistoryImporter, parse_chunk
+
+HEADER = ['node_id', 'temperature', 'timestamp', 'created_at']
+
+def test_chunk_with_every_row_rejected_is_empty():
+    chunk = parse_chunk(CSV, b"CORE_11300_001,abc,1,2024-01-01T00:00:00\n", 2, HEADER, 0.0, 30.0)
+
+    assert chunk.rejected == 1
+    assert chunk.errors == [(2, "Invalid temperature")]
+    assert all(len(values) == 0 for values in chunk.columns.values())
+    assert chunk.nodes == {}
+
+def test_serial_chunk_without_capture_timestamps_is_empty():
+    data = b"Data transmitted via LoRa: CORE_11300_001|20|50|400|6.5|100|1013|120|55\n\x00\x01binary"
+    chunk = parse_chunk(SERIAL, data, 1, None, 0.0, 30.0)
+
+    assert chunk.rejected == 1
+    assert len(chunk.columns['node_id']) == 0
+
+def test_import_survives_files_without_valid_rows(tmp_path):
+    (tmp_path / "bad.csv").write_text("node_id,temperature,timestamp,created_at\nCORE_11300_001,abc,1,2024-01-01T00:00:00\n")
+    (tmp_path / "good.csv").write_text(
+        "node_id,temperature,timestamp,created_at\n"
+        "CORE_11300_001,21.5,1,2024-01-01T00:00:00\n"
+        "CORE_11300_001,21.7,2,2024-01-01T00:15:00\n"
+    )
+    (tmp_path / "blob.bin").write_bytes(bytes(range(256)) * 4)
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+
+    totals = HistoryImporter(engine, workers=1).import_paths(
+        [str(tmp_path / name) for name in ("bad.csv", "blob.bin", "good.csv")]
+    )
+
+    assert totals['loaded'] == 2
+    assert totals['rejected'] == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM sensor_data")).scalar() == 2
+
+def test_reimport_skips_duplicates(tmp_path):
+    source = tmp_path / "readings.csv"
+    source.write_text("node_id,temperature,timestamp,created_at\nCORE_11300_001,21.5,1,2024-01-01T00:00:00\n")
+    copy = tmp_path / "copy.csv"
+    copy.write_text("created_at,timestamp,temperature,node_id\n2024-01-01T00:00:05,1,21.5,CORE_11300_001\n")
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+
+    HistoryImporter(engine, workers=1).import_paths([str(source)])
+    totals = HistoryImporter(engine, workers=1).import_paths([str(source), str(copy)])
+
+    assert totals['skipped_files'] == 1
+    assert totals['loaded'] == 0
+    assert totals['duplicates'] == 1
@@ -0,0 +1,87 @@
+import pytest
+
+def reading(node_id: str, timestamp: int) -> dict:
+    return {"node_id": node_id, "temperature": 21.5, "humidity": 55.0, "soil_moisture": 400, "timestamp": timestamp}
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/sensor-data", reading("CORE_11300_101", 5000)),
+    ("/api/sensor-data/batch", {"readings": [reading("CORE_11300_102", 5000)]})
+])
+def test_failed_save_does_not_turn_retry_into_duplicate(main, client, monkeypatch, path, body):
+    def fail(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(main.data_service, "save_sensor_data", fail)
+        patch.setattr(main.data_service, "save_sensor_data_batch", fail)
+        assert client.post(path, json=body).status_code == 500
+
+    response = client.post(path, json=body).json()
+
+    assert response['status'] == "success"
+    assert response.get('received', 1) == 1
+    assert response.get('duplicates', 0) == 0
+
+def raw_frame(node_id: str, timestamp: int) -> str:
+    return f"{node_id}|21.5|55.0|400|6.5|18.0|300.0|1013.0|120.0|0.0|0|{timestamp}"
+
+def test_raw_upload_charges_gateway_once_and_reports_throttled_frames(main, client, monkeypatch):
+    monkeypatch.setattr(main, "admission", main.IngestAdmission(node_burst=2, gateway_burst=3))
+    frames = [raw_frame(f"RAW_NODE_{i}", 7000) for i in range(8)]
+    frames += [raw_frame("RAW_NODE_0", 7001 + i) for i in range(2)]
+    headers = {"content-type": "text/plain", "x-gateway-id": "raw-gateway"}
+
+    response = client.post("/api/sensor-data/raw", content="\n".join(frames), headers=headers).json()
+
+    assert response['received'] == 9
+    assert response['throttled'] == [{"line": 10, "node_id": "RAW_NODE_0"}]
+    assert response['coalesced'] == []
+
+def test_ingest_requests_are_counted_by_status(main, client):
+    from starlette.middleware.base import BaseHTTPMiddleware
+    assert all(middleware.cls is not BaseHTTPMiddleware for middleware in main.app.user_middleware)
+
+    counted = main.INGEST_REQUESTS.labels("/api/sensor-data/batch", 422)
+    before = counted.value
+    assert client.post("/api/sensor-data/batch", json={"readings": "not a list"}).status_code == 422
+    assert counted.value == before + 1
+
+def test_raw_frames_are_stored_column_for_column(main, client):
+    headers = {"content-type": "text/plain", "x-gateway-id": "raw-columns"}
+    response = client.post("/api/sensor-data/raw", content=raw_frame("RAW_COLUMNS_1", 8000), headers=headers).json()
+    assert response['received'] == 1
+
+    db = main.SessionLocal()
+    try:
+        stored = db.query(main.SensorData).filter(main.SensorData.node_id == "RAW_COLUMNS_1").one()
+    finally:
+        db.close()
+    assert (stored.soil_ph, stored.pressure, stored.is_raining, stored.timestamp) == (6.5, 1013.0, False, 8000)
+    assert stored.created_at is not None
+
+    again = client.post("/api/sensor-data/raw", content=raw_frame("RAW_COLUMNS_1", 8000), headers=headers).json()
+    assert (again['received'], again['duplicates']) == (0, 1)
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/sensor-data", reading("CORE_11300_103", 6000)),
+    ("/api/sensor-data/batch", {"readings": [reading("CORE_11300_104", 6000)]})
+])
+def test_failing_background_task_still_releases_admission(main, client, monkeypatch, path, body):
+    def fail(*args):
+        raise RuntimeError("detector broke")
+
+    monkeypatch.setattr(main.anomaly_detector, "observe_reading", fail)
+    monkeypatch.setattr(main, "admission", main.IngestAdmission())
+
+    assert client.post(path, json=body).status_code == 200
+    assert main.admission.stats()['in_flight'] == 0
+
+def test_unknown_ingest_paths_share_one_label(main, client):
+    client.post("/api/sensor-data/made-up-path-1", json={})
+    client.post("/api/sensor-data/made-up-path-2", json={})
+
+    client.post("/api/sensor-data-made-up", json={})
+
+    labels = {values[0] for values in main.INGEST_REQUESTS._children}
+    assert not any("made-up" in label for label in labels)
+    assert {"/api/sensor-data/{node_id}", "other"} <= labels
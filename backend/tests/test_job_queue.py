@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from services.job_queue import JobBroker, SQLiteJobBroker
+
+def test_broker_interface_is_abstract():
+    with pytest.raises(TypeError):
+        JobBroker()
+
+def test_sqlite_broker_creates_its_file_on_first_use(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    broker = SQLiteJobBroker(path)
+    assert not os.path.exists(path)
+
+    assert broker.enqueue("check_alerts", {"sensor_data_id": 1}) is not None
+    assert broker.stats()['by_status']['queued'] == 1
+
+def test_ingest_enqueues_follow_up_jobs(main, client):
+    before = main.job_queue.broker.stats()['pending_by_job'].get('check_alerts', {}).get('count', 0)
+    response = client.post("/api/sensor-data/batch", json={"readings": [
+        {"node_id": "CORE_11300_JOBS", "temperature": 20.0, "humidity": 50.0, "soil_moisture": 300, "timestamp": 9000}
+    ]})
+
+    assert response.status_code == 200
+    assert main.job_queue.broker.stats()['pending_by_job']['check_alerts']['count'] == before + 1
+
+def test_job_queries_are_traced(tmp_path):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+
+    from database.profiler import QueryProfiler
+    from services.job_queue import JobQueue
+
+    engine = create_engine("sqlite://")
+    profiler = QueryProfiler()
+    profiler.install(engine)
+    queue = JobQueue(SQLiteJobBroker(str(tmp_path / "jobs.db")), sessionmaker(bind=engine), trace=profiler.trace)
+    queue.register("ping", lambda db: db.execute(text("SELECT 1")))
+
+    queue.enqueue("ping")
+    for job in queue.broker.claim("test-worker"):
+        queue.run_job(job)
+
+    endpoints = {trace['name']: trace for trace in profiler.summary()['endpoints']}
+    assert endpoints["job ping"]['max_queries'] == 1
+
+@pytest.mark.parametrize("path", ["/metrics", "/api/jobs/stats"])
+def test_broker_stats_run_off_the_event_loop(main, client, monkeypatch, path):
+    import asyncio
+
+    on_loop = []
+    real_stats = main.job_queue.broker.stats
+
+    def stats():
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return real_stats()
+
+    monkeypatch.setattr(main.job_queue.broker, "stats", stats)
+    assert client.get(path).status_code == 200
+    assert on_loop == [False]
+
+def test_long_jobs_keep_their_lease(tmp_path):
+    import time
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from services.job_queue import JobQueue
+
+    queue = JobQueue(SQLiteJobBroker(str(tmp_path / "jobs.db")), sessionmaker(bind=create_engine("sqlite://")))
+    stolen = []
+
+    def slow(db):
+        time.sleep(0.5)
+        stolen.extend(queue.broker.claim("other-worker"))
+
+    queue.register("slow", slow, visibility_timeout=0.3)
+    queue.enqueue("slow")
+    for job in queue.broker.claim("test-worker"):
+        queue.run_job(job)
+
+    assert stolen == []
+    assert queue.broker.stats()['by_status']['done'] == 1
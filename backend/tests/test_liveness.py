@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from database.models import Alert, Node
+from services.liveness_service import LATE, OFFLINE, NodeLivenessTracker
+
+def test_failed_commit_keeps_transitions_for_next_tick(main, monkeypatch):
+    node_id = "CORE_11300_LIVENESS"
+    tracker = NodeLivenessTracker()
+    tracker.observe(node_id, at=time.time() - 7 * 24 * 3600)
+
+    def fail():
+        raise RuntimeError("database is locked")
+
+    db = main.SessionLocal()
+    try:
+        db.add(Node(node_id=node_id, node_type="CORE_11300", status="active"))
+        db.commit()
+
+        with monkeypatch.context() as patch:
+            patch.setattr(db, "commit", fail)
+            with pytest.raises(RuntimeError):
+                tracker.tick(db)
+        assert tracker.stats()[LATE] == 0
+
+        assert tracker.tick(db) == 2
+        assert db.query(Node.status).filter(Node.node_id == node_id).scalar() == OFFLINE
+        assert db.query(Alert).filter(Alert.node_id == node_id, Alert.alert_type == "node_offline").count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,20 @@
+from services.packet_dedup import DUPLICATE, NEW, PacketDeduplicator
+
+def test_release_readmits_unstored_packet():
+    dedup = PacketDeduplicator()
+    assert dedup.admit("CORE_11300_001", 1000)[0] == NEW
+    assert dedup.admit("CORE_11300_001", 1000)[0] == DUPLICATE
+
+    dedup.release("CORE_11300_001", 1000)
+
+    assert dedup.admit("CORE_11300_001", 1000)[0] == NEW
+    assert dedup.node_stats("CORE_11300_001")['received'] == 1
+
+def test_release_keeps_stored_packet():
+    dedup = PacketDeduplicator()
+    dedup.admit("CORE_11300_001", 1000)
+    dedup.bind("CORE_11300_001", 1000, 42)
+
+    dedup.release("CORE_11300_001", 1000)
+
+    assert dedup.admit("CORE_11300_001", 1000) == (DUPLICATE, 42)
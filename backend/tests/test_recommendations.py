@@ -0,0 +1,60 @@
+from database.models import Recommendation
+from services.ai_service import AIRecommendationService
+
+def suggestion(recommendation_type: str) -> dict:
+    return {"recommendation_type": recommendation_type, "title": "Sulama", "description": "Toprak kuru", "confidence": 80.0}
+
+def test_dedup_follows_the_database_across_processes(main):
+    # Two services stand in for the API process and a separate job worker process.
+    api, worker = AIRecommendationService(), AIRecommendationService()
+    node_id = "CORE_11300_RECS"
+    db = main.SessionLocal()
+    try:
+        assert len(worker.save_recommendation_batch(db, [(node_id, suggestion("irrigation"))])) == 1
+        assert api.save_recommendation_batch(db, [(node_id, suggestion("irrigation"))]) == []
+
+        open_id = db.query(Recommendation.id).filter(Recommendation.node_id == node_id).scalar()
+        assert api.complete_recommendation(db, open_id)
+
+        assert len(worker.save_recommendation_batch(db, [(node_id, suggestion("irrigation"))] * 2)) == 1
+        assert db.query(Recommendation).filter(Recommendation.node_id == node_id).count() == 2
+    finally:
+        db.close()
+
+def test_concurrent_training_is_serialized():
+    import threading
+    import time
+
+    service = AIRecommendationService()
+    running, overlaps = [], []
+
+    def train(db, node_ids=None):
+        running.append(True)
+        overlaps.append(len(running))
+        time.sleep(0.1)
+        running.pop()
+        return True
+
+    service._train_models = train
+    threads = [threading.Thread(target=service.train_models, args=(None,)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == [1, 1, 1]
+
+def test_old_single_scaler_model_files_still_load(tmp_path):
+    import joblib
+    from sklearn.preprocessing import StandardScaler
+
+    from ai_model.ai_recommendation_engine import AgriculturalAIEngine
+
+    path = str(tmp_path / "models.pkl")
+    scaler = StandardScaler()
+    joblib.dump({'irrigation_model': None, 'fertilizer_model': None, 'pest_model': None, 'scaler': scaler}, path)
+
+    engine = AgriculturalAIEngine()
+    assert engine.load_models(path)
+    assert set(engine.scalers) == {'irrigation', 'fertilizer', 'pest'}
+    assert all(isinstance(loaded, StandardScaler) for loaded in engine.scalers.values())
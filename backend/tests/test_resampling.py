@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from services.resampling import TimeGridResampler, parse_interval
+
+@pytest.mark.parametrize("interval", ["0m", "0s", " 0 h"])
+def test_zero_interval_is_rejected(interval):
+    with pytest.raises(ValueError):
+        parse_interval(interval)
+
+def test_zero_interval_trends_are_a_bad_request(client):
+    response = client.get("/api/analytics/trends/CORE_11300_1", params={"interval": "0m"})
+    assert response.status_code == 400
+
+def test_bin_count_is_capped():
+    resampler = TimeGridResampler(step_seconds=1, max_bins=1000)
+    with pytest.raises(ValueError):
+        resampler.resample(np.array([0.0, 86400.0]), np.array([1.0, 2.0]))
+
+    times, grid = resampler.resample(np.array([0.0, 999.0]), np.array([1.0, 2.0]))
+    assert len(times) == 1000 and grid[-1] == 2.0
+
+def test_empty_input_resamples_to_empty_grid():
+    times, grid = TimeGridResampler().resample(np.empty(0), np.empty((0, 3)))
+    assert times.shape == (0,) and grid.shape == (0, 3)
+
+def test_resampled_trends_for_node_without_readings(client):
+    response = client.get("/api/analytics/trends/NO_SUCH_NODE", params={"interval": "1h"})
+    assert response.status_code == 200
+    assert response.json()['trends'] == []
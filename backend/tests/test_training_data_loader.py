@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from database.models import SensorData
+from services.training_data_loader import TRAINING_COLUMNS, TrainingDataLoader
+
+ROW_MB = len(TRAINING_COLUMNS) * 8 / (1024 * 1024)
+
+@pytest.mark.parametrize("budget_rows, expected", [(3, 3), (7, 7), (100, 20)])
+def test_stratified_sample_stays_within_budget(main, budget_rows, expected):
+    node_ids = [f"TRAIN_NODE_{i}" for i in range(5)]
+    db = main.SessionLocal()
+    try:
+        if not db.query(SensorData).filter(SensorData.node_id == node_ids[0]).count():
+            db.add_all(
+                SensorData(node_id=node_id, temperature=20.0 + i, humidity=50.0, soil_moisture=300, timestamp=i)
+                for node_id in node_ids for i in range(4)
+            )
+            db.commit()
+
+        loader = TrainingDataLoader(memory_budget_mb=budget_rows * ROW_MB)
+        assert loader.max_rows == budget_rows
+        sample = loader.load(db, node_ids=node_ids)
+    finally:
+        db.close()
+
+    assert len(sample['temperature']) == expected
+    assert not np.isnan(sample['temperature']).any()
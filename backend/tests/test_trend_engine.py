@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+import numpy as np
+
+from services.trend_engine import TrendAnalysisEngine
+
+def test_rolling_mean_follows_trailing_buckets():
+    engine = TrendAnalysisEngine(windows={'24h': timedelta(hours=24)}, metrics=['temperature'],
+                                 rolling_points=6, rolling_span=2)
+    now = 1_000_000.0
+    # Node "a" reports every hour of the window with the hour number as its value; node "b" only twice.
+    times = np.r_[now - 86400 + np.arange(24) * 3600.0, now - 3600.0, now - 1800.0]
+    values = np.r_[np.arange(24.0), 10.0, np.nan][:, None]
+    node_col = np.array(['a'] * 24 + ['b'] * 2)
+
+    results = engine.compute_arrays(node_col, times, values, now)
+
+    window = results['a']['24h']
+    assert window['rolling']['step_seconds'] == 4 * 3600.0
+    assert window['rolling']['width_seconds'] == 8 * 3600.0
+    assert window['temperature']['rolling_mean'] == [1.5, 3.5, 7.5, 11.5, 15.5, 19.5]
+    assert results['b']['24h']['temperature']['rolling_mean'] == [None, None, None, None, None, 10.0]
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from database.models import Base, WeatherForecast
+from database.upsert import upsert_rows
+
+def forecast(day: int, temperature: float) -> dict:
+    return {"location": "Generic", "date": datetime(2026, 10, day), "temperature_max": temperature}
+
+def test_other_dialects_fall_back_to_select_then_update(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(engine.dialect, "name", "mssql")
+
+    with Session(engine) as db:
+        upsert_rows(db, WeatherForecast, [forecast(1, 20.0), forecast(2, 21.0)],
+                    index_elements=["location", "date"], update_columns=["temperature_max"])
+        upsert_rows(db, WeatherForecast, [forecast(2, 25.0), forecast(3, 22.0), forecast(3, 23.0)],
+                    index_elements=["location", "date"], update_columns=["temperature_max"])
+        db.commit()
+
+        stored = db.query(WeatherForecast.date, WeatherForecast.temperature_max).order_by(WeatherForecast.date).all()
+
+    assert [(date.day, temperature) for date, temperature in stored] == [(1, 20.0), (2, 25.0), (3, 23.0)]
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import httpx
+
+from services.weather_service import WeatherService
+
+def openweather_forecast(days: int) -> dict:
+    noon = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    return {'list': [
+        {
+            'dt': int((noon + timedelta(days=day)).timestamp()),
+            'main': {'temp_min': 12.0, 'temp_max': 26.0, 'humidity': 60},
+            'wind': {'speed': 4.0},
+            'weather': [{'description': 'açık'}],
+            'pop': 0.1
+        }
+        for day in range(days)
+    ]}
+
+def slow_upstream(delay: float):
+    def respond(method, path, body):
+        time.sleep(delay)
+        return 200, openweather_forecast(7)
+    return respond
+
+def test_concurrent_misses_share_one_upstream_call(main, stub_server):
+    upstream = stub_server(slow_upstream(0.3))
+    service = WeatherService(api_key="test", base_url=upstream.url)
+
+    def fetch(_):
+        db = main.SessionLocal()
+        try:
+            return service.get_forecast(db, "Stub Concurrent", 7)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(fetch, range(8)))
+
+    assert len(upstream.requests) == 1
+    assert all(len(forecast) == 7 for forecast in results)
+
+def test_fresh_forecast_is_served_from_cache(main, stub_server):
+    upstream = stub_server(slow_upstream(0))
+    service = WeatherService(api_key="test", base_url=upstream.url)
+    db = main.SessionLocal()
+    try:
+        first = service.get_forecast(db, "Stub Cached", 7)
+        second = service.get_forecast(db, "Stub Cached", 7)
+    finally:
+        db.close()
+
+    assert len(upstream.requests) == 1
+    assert second == first
+    assert service.cache.stats()['hits'] == 1
+
+def test_slow_upstream_does_not_block_event_loop(main, stub_server, monkeypatch):
+    upstream = stub_server(slow_upstream(1.0))
+    monkeypatch.setattr(main.weather_service, "api_key", "test")
+    monkeypatch.setattr(main.weather_service, "base_url", upstream.url)
+
+    async def scenario():
+        gaps = []
+        done = asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            ticking = asyncio.create_task(ticker())
+            forecast = await client.get("/api/weather-forecast/Stub%20Slow")
+            health = await client.get("/api/health")
+            done.set()
+            await ticking
+        return forecast, health, max(gaps)
+
+    forecast, health, longest_stall = asyncio.run(scenario())
+
+    assert longest_stall < 0.5
+    assert health.status_code == 200
+    assert forecast.status_code == 200
+    assert len(forecast.json()) == 7
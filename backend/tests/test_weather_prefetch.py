@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from services.weather_client import AsyncWeatherClient
+from services.weather_prefetch import WeatherPrefetcher
+from services.weather_service import WeatherService
+from test_weather_forecast import slow_upstream
+
+@pytest.mark.parametrize("prefetch_first", [True, False])
+def test_prefetch_and_cache_miss_share_one_upstream_call(main, stub_server, prefetch_first):
+    upstream = stub_server(slow_upstream(0.3))
+    service = WeatherService(api_key="test", base_url=upstream.url)
+    location = f"Stub Prefetch {prefetch_first}"
+
+    def get_forecast():
+        db = main.SessionLocal()
+        try:
+            return service.get_forecast(db, location, 7)
+        finally:
+            db.close()
+
+    async def scenario():
+        client = AsyncWeatherClient("test", upstream.url)
+        prefetcher = WeatherPrefetcher(service, client)
+        try:
+            if prefetch_first:
+                prefetch = asyncio.create_task(prefetcher.refresh_location(location))
+                await asyncio.sleep(0.1)
+                forecast = await asyncio.to_thread(get_forecast)
+            else:
+                request = asyncio.create_task(asyncio.to_thread(get_forecast))
+                await asyncio.sleep(0.1)
+                prefetch = asyncio.create_task(prefetcher.refresh_location(location))
+                forecast = await request
+            return await prefetch, forecast
+        finally:
+            await client.aclose()
+
+    refreshed, forecast = asyncio.run(scenario())
+
+    assert len(upstream.requests) == 1
+    assert refreshed == prefetch_first
+    assert len(forecast) == 7
+
+def test_prefetch_stores_forecast_for_later_requests(main, stub_server):
+    upstream = stub_server(slow_upstream(0))
+    service = WeatherService(api_key="test", base_url=upstream.url)
+
+    async def scenario():
+        client = AsyncWeatherClient("test", upstream.url)
+        try:
+            return await WeatherPrefetcher(service, client).refresh_location("Stub Prefetched")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(scenario())
+    db = main.SessionLocal()
+    try:
+        forecast = service.get_forecast(db, "Stub Prefetched", 7)
+    finally:
+        db.close()
+
+    assert len(upstream.requests) == 1
+    assert len(forecast) == 7
@@ -28,7 +28,7 @@ const RecommendationCard = ({ recommendation }) => {
       case 'weather_protection':
         return '🌤️';
       default:
-        return '💡';
+        return type && type.startsWith('weather_') ? '🌤️' : '💡';
     }
   };
 
@@ -0,0 +1,284 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("GATEWAY_DB_PATH", "agricultural_data.db")
+
+# Tuned for an SD-card backed Pi: WAL lets readers run alongside the single writer,
+# NORMAL sync is durable across application crashes and only fsyncs at checkpoints.
+WRITER_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA wal_autocheckpoint=1000",
+]
+
+READER_PRAGMAS = [
+    "PRAGMA query_only=ON",
+    "PRAGMA cache_size=-2000",
+    "PRAGMA busy_timeout=5000",
+]
+
+SENSOR_COLUMNS = [
+    ('node_id', 'nodeId'),
+    ('temperature', 'temperature'),
+    ('humidity', 'humidity'),
+    ('soil_moisture', 'soilMoisture'),
+    ('soil_ph', 'soilPh'),
+    ('soil_temperature', 'soilTemperature'),
+    ('light_intensity', 'lightIntensity'),
+    ('pressure', 'pressure'),
+    ('altitude', 'altitude'),
+    ('rainfall', 'rainfall'),
+    ('is_raining', 'isRaining'),
+    ('timestamp', 'timestamp'),
+    ('received_time', 'receivedTime'),
+    ('gateway_rssi', 'gatewayRSSI'),
+    ('gateway_snr', 'gatewaySNR'),
+]
+
+RETENTION_DAYS = float(os.getenv("GATEWAY_RETENTION_DAYS", "30"))
+
+INSERT_SENSOR_DATA = '''
+    INSERT INTO sensor_data ({})
+    VALUES ({})
+'''.format(
+    ', '.join(column for column, _ in SENSOR_COLUMNS),
+    ', '.join('?' for _ in SENSOR_COLUMNS)
+)
+
+UPSERT_LATEST_READING = '''
+    INSERT INTO latest_reading ({}, created_at)
+    VALUES ({}, CURRENT_TIMESTAMP)
+    ON CONFLICT(node_id) DO UPDATE SET {}, created_at = excluded.created_at
+'''.format(
+    ', '.join(column for column, _ in SENSOR_COLUMNS),
+    ', '.join('?' for _ in SENSOR_COLUMNS),
+    ', '.join(f"{column} = excluded.{column}" for column, _ in SENSOR_COLUMNS if column != 'node_id')
+)
+
+def connect_writer(path: str = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    for pragma in WRITER_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def connect_reader(path: str = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    for pragma in READER_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+class ReadPool:
+    def __init__(self, path: str = DB_PATH, size: int = 4):
+        self.path = path
+        self.size = size
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect_reader(self.path)
+
+        return self._pool.get()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+class BatchWriter:
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        max_batch: int = 200,
+        max_delay: float = 0.05,
+        max_queue: int = 10000,
+        retention_days: float = RETENTION_DAYS,
+        retention_interval: float = 3600.0,
+        spool: Optional[Callable[[sqlite3.Connection, List[Dict[str, Any]]], Any]] = None
+    ):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.spool = spool
+        self.retention_days = retention_days
+        self.retention_interval = retention_interval
+
+        self.written = 0
+        self.dropped = 0
+        self.pruned = 0
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._next_retention = 0.0
+
+    def start(self):
+        self._conn = connect_writer(self.path)
+        self._thread = threading.Thread(target=self._run, name="gateway-db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        # Called from the event loop, so a full queue is reported right away instead of waited on.
+        try:
+            self._queue.put_nowait(data)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Write queue full, dropped reading from {data.get('nodeId')}")
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        self._conn.close()
+
+    def _run(self):
+        while True:
+            self._maybe_apply_retention()
+            try:
+                item = self._queue.get(timeout=self.retention_interval)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[Dict[str, Any]]):
+        try:
+            self._commit(batch)
+            logger.debug(f"Committed {len(batch)} readings")
+        except Exception as e:
+            if len(batch) == 1:
+                self.dropped += 1
+                logger.error(f"Error saving reading from {batch[0].get('nodeId')}: {e}")
+                return
+            # One bad reading should not take the whole batch down with it.
+            logger.warning(f"Error saving batch of {len(batch)} readings, retrying one at a time: {e}")
+            for data in batch:
+                try:
+                    self._commit([data])
+                except Exception as e:
+                    self.dropped += 1
+                    logger.error(f"Error saving reading from {data.get('nodeId')}: {e}")
+
+    def _commit(self, batch: List[Dict[str, Any]]):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.write_batch(self._conn, batch)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self.written += len(batch)
+
+    def write_batch(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        conn.executemany(INSERT_SENSOR_DATA, [
+            tuple(data[field] for _, field in SENSOR_COLUMNS) for data in batch
+        ])
+
+        now = datetime.now()
+        conn.executemany('''
+            INSERT INTO nodes (node_id, last_seen, status)
+            VALUES (?, ?, 'active')
+            ON CONFLICT(node_id) DO UPDATE SET last_seen = excluded.last_seen, status = 'active'
+        ''', [(node_id, now) for node_id in {data['nodeId'] for data in batch}])
+
+        latest = {data['nodeId']: data for data in batch}
+        conn.executemany(UPSERT_LATEST_READING, [
+            tuple(data[field] for _, field in SENSOR_COLUMNS) for data in latest.values()
+        ])
+
+        # Spooled in the same transaction, so a reading is either stored and queued for relay or neither.
+        if self.spool is not None:
+            self.spool(conn, batch)
+
+    def _maybe_apply_retention(self):
+        if self.retention_days <= 0 or time.monotonic() < self._next_retention:
+            return
+        self._next_retention = time.monotonic() + self.retention_interval
+
+        try:
+            self.pruned += apply_retention(self._conn, self.retention_days)
+        except Exception as e:
+            logger.error(f"Error applying retention: {e}")
+
+def apply_retention(conn: sqlite3.Connection, retention_days: float, chunk_size: int = 5000) -> int:
+    # Rows arrive in id order, so everything below the first id inside the window is expired.
+    # Walking the rowid from the low end stops almost immediately once old rows are gone.
+    row = conn.execute('''
+        SELECT id FROM sensor_data
+        WHERE created_at >= datetime('now', ?)
+        ORDER BY id LIMIT 1
+    ''', (f"-{retention_days} days",)).fetchone()
+    if row is None:
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM sensor_data").fetchone()
+    first_kept = row[0]
+
+    removed = 0
+    while True:
+        # Small chunks keep each write transaction short so readings are not held up.
+        deleted = conn.execute('''
+            DELETE FROM sensor_data WHERE id IN (
+                SELECT id FROM sensor_data WHERE id < ? ORDER BY id LIMIT ?
+            )
+        ''', (first_kept, chunk_size)).rowcount
+        removed += deleted
+        if deleted < chunk_size:
+            break
+
+    if removed:
+        logger.info(f"Retention removed {removed} readings older than {retention_days:g} days")
+    return removed
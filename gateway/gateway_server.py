@@ -4,17 +4,23 @@ import json
 import logging
 from datetime import datetime
 from typing import Dict, Any
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import sqlite3
 import uvicorn
 
+from gateway_db import DB_PATH, BatchWriter, ReadPool, connect_writer
+from relay import RELAY_URL, RelayForwarder, spool_readings
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="LoRa Agricultural Gateway Server", version="1.0.0")
 
+relay = RelayForwarder(RELAY_URL, DB_PATH) if RELAY_URL else None
+writer = BatchWriter(DB_PATH, spool=spool_readings if relay else None)
+read_pool = ReadPool(DB_PATH)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,7 +47,7 @@ class SensorData(BaseModel):
     gatewaySNR: float
 
 def init_database():
-    conn = sqlite3.connect('agricultural_data.db')
+    conn = connect_writer(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -77,41 +83,64 @@ def init_database():
         )
     ''')
     
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS latest_reading (
+            node_id TEXT PRIMARY KEY,
+            temperature REAL,
+            humidity REAL,
+            soil_moisture INTEGER,
+            soil_ph REAL,
+            soil_temperature REAL,
+            light_intensity REAL,
+            pressure REAL,
+            altitude REAL,
+            rainfall REAL,
+            is_raining BOOLEAN,
+            timestamp INTEGER,
+            received_time TEXT,
+            gateway_rssi INTEGER,
+            gateway_snr REAL,
+            created_at TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS ix_sensor_data_node_created
+        ON sensor_data (node_id, created_at)
+    ''')
+    
+    # Seeds latest_reading once for databases created before it existed.
+    cursor.execute('''
+        INSERT OR IGNORE INTO latest_reading
+        SELECT node_id, temperature, humidity, soil_moisture, soil_ph, soil_temperature,
+               light_intensity, pressure, altitude, rainfall, is_raining, timestamp,
+               received_time, gateway_rssi, gateway_snr, created_at
+        FROM sensor_data
+        WHERE NOT EXISTS (SELECT 1 FROM latest_reading)
+          AND id IN (SELECT MAX(id) FROM sensor_data GROUP BY node_id)
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS relay_spool (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Readings the backend refused as invalid, kept for inspection instead of being dropped.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS relay_quarantine (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
     conn.commit()
     conn.close()
 
-def save_sensor_data(data: Dict[str, Any]):
-    try:
-        conn = sqlite3.connect('agricultural_data.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO sensor_data 
-            (node_id, temperature, humidity, soil_moisture, soil_ph, soil_temperature,
-             light_intensity, pressure, altitude, rainfall, is_raining, timestamp,
-             received_time, gateway_rssi, gateway_snr)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['nodeId'], data['temperature'], data['humidity'],
-            data['soilMoisture'], data['soilPh'], data['soilTemperature'],
-            data['lightIntensity'], data['pressure'], data['altitude'],
-            data['rainfall'], data['isRaining'], data['timestamp'],
-            data['receivedTime'], data['gatewayRSSI'], data['gatewaySNR']
-        ))
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO nodes (node_id, last_seen, status)
-            VALUES (?, ?, 'active')
-        ''', (data['nodeId'], datetime.now()))
-        
-        conn.commit()
-        conn.close()
-        
-        logger.info(f"Data saved for node {data['nodeId']}")
-        
-    except Exception as e:
-        logger.error(f"Error saving data: {e}")
-
 def get_node_type(node_id: str) -> str:
     if "BASE_19007" in node_id:
         return "Base Station"
@@ -125,12 +154,23 @@ def get_node_type(node_id: str) -> str:
 @app.on_event("startup")
 async def startup_event():
     init_database()
+    writer.start()
+    if relay:
+        relay.start()
     logger.info("Database initialized successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    writer.stop()
+    if relay:
+        relay.stop()
+    read_pool.close()
+
 @app.post("/api/sensor-data")
-async def receive_sensor_data(data: SensorData, background_tasks: BackgroundTasks):
+async def receive_sensor_data(data: SensorData):
     try:
-        background_tasks.add_task(save_sensor_data, data.dict())
+        if not writer.submit(data.dict()):
+            raise HTTPException(status_code=503, detail="Gateway is overloaded, retry later", headers={"Retry-After": "1"})
         
         node_type = get_node_type(data.nodeId)
         
@@ -144,6 +184,8 @@ async def receive_sensor_data(data: SensorData, background_tasks: BackgroundTask
         logger.info(f"Received data from {data.nodeId}")
         return response_data
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing data: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -151,26 +193,25 @@ async def receive_sensor_data(data: SensorData, background_tasks: BackgroundTask
 @app.get("/api/nodes")
 async def get_nodes():
     try:
-        conn = sqlite3.connect('agricultural_data.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT node_id, node_type, location, last_seen, status
-            FROM nodes
-            ORDER BY last_seen DESC
-        ''')
-        
-        nodes = []
-        for row in cursor.fetchall():
-            nodes.append({
-                "nodeId": row[0],
-                "nodeType": get_node_type(row[0]) if not row[1] else row[1],
-                "location": row[2],
-                "lastSeen": row[3],
-                "status": row[4]
-            })
-        
-        conn.close()
+        with read_pool.connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+                SELECT node_id, node_type, location, last_seen, status
+                FROM nodes
+                ORDER BY last_seen DESC
+            ''')
+        
+            nodes = []
+            for row in cursor.fetchall():
+                nodes.append({
+                    "nodeId": row[0],
+                    "nodeType": get_node_type(row[0]) if not row[1] else row[1],
+                    "location": row[2],
+                    "lastSeen": row[3],
+                    "status": row[4]
+                })
+        
         return {"nodes": nodes}
         
     except Exception as e:
@@ -180,23 +221,22 @@ async def get_nodes():
 @app.get("/api/sensor-data/{node_id}")
 async def get_node_data(node_id: str, limit: int = 100):
     try:
-        conn = sqlite3.connect('agricultural_data.db')
-        cursor = conn.cursor()
+        with read_pool.connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT * FROM sensor_data
-            WHERE node_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        ''', (node_id, limit))
+            cursor.execute('''
+                SELECT * FROM sensor_data
+                WHERE node_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (node_id, limit))
         
-        columns = [description[0] for description in cursor.description]
-        data = []
+            columns = [description[0] for description in cursor.description]
+            data = []
         
-        for row in cursor.fetchall():
-            data.append(dict(zip(columns, row)))
+            for row in cursor.fetchall():
+                data.append(dict(zip(columns, row)))
         
-        conn.close()
         return {"data": data}
         
     except Exception as e:
@@ -206,35 +246,37 @@ async def get_node_data(node_id: str, limit: int = 100):
 @app.get("/api/latest-data")
 async def get_latest_data():
     try:
-        conn = sqlite3.connect('agricultural_data.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT node_id, temperature, humidity, soil_moisture, soil_ph,
-                   soil_temperature, light_intensity, pressure, rainfall,
-                   is_raining, created_at
-            FROM sensor_data s1
-            WHERE created_at = (
-                SELECT MAX(created_at)
-                FROM sensor_data s2
-                WHERE s2.node_id = s1.node_id
-            )
-            ORDER BY created_at DESC
-        ''')
-        
-        columns = [description[0] for description in cursor.description]
-        data = []
-        
-        for row in cursor.fetchall():
-            data.append(dict(zip(columns, row)))
-        
-        conn.close()
+        with read_pool.connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+                SELECT node_id, temperature, humidity, soil_moisture, soil_ph,
+                       soil_temperature, light_intensity, pressure, rainfall,
+                       is_raining, created_at
+                FROM latest_reading
+                ORDER BY created_at DESC
+            ''')
+        
+            columns = [description[0] for description in cursor.description]
+            data = []
+        
+            for row in cursor.fetchall():
+                data.append(dict(zip(columns, row)))
+        
         return {"data": data}
         
     except Exception as e:
         logger.error(f"Error fetching latest data: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/api/relay/status")
+async def get_relay_status():
+    if not relay:
+        return {"enabled": False}
+    
+    with read_pool.connection() as conn:
+        return {"enabled": True, **relay.status(conn)}
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from gateway_db import DB_PATH, SENSOR_COLUMNS, connect_writer
+
+logger = logging.getLogger(__name__)
+
+RELAY_URL = os.getenv("GATEWAY_RELAY_URL")
+RELAY_BATCH_SIZE = int(os.getenv("GATEWAY_RELAY_BATCH_SIZE", "200"))
+SPOOL_MAX_ROWS = int(os.getenv("GATEWAY_SPOOL_MAX_ROWS", "500000"))
+RELAY_POISON_ATTEMPTS = int(os.getenv("GATEWAY_RELAY_POISON_ATTEMPTS", "5"))
+
+# Timeouts and rate limits are worth retrying; other client errors mean the batch itself is bad.
+RETRY_STATUS_CODES = {408, 429}
+# The backend is down or overloaded; any other 5xx may be caused by the batch itself.
+UNAVAILABLE_STATUS_CODES = {502, 503, 504}
+
+def to_backend_reading(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: data.get(field) for column, field in SENSOR_COLUMNS}
+
+def spool_readings(conn: sqlite3.Connection, batch: List[Dict[str, Any]], max_rows: int = SPOOL_MAX_ROWS) -> int:
+    conn.executemany(
+        "INSERT INTO relay_spool (payload) VALUES (?)",
+        [(json.dumps(to_backend_reading(data)),) for data in batch]
+    )
+
+    # Spool ids only ever get deleted from the low end, so this trims the oldest rows
+    # once a long outage pushes the spool past its size limit.
+    trimmed = conn.execute(
+        "DELETE FROM relay_spool WHERE id <= (SELECT MAX(id) FROM relay_spool) - ?",
+        (max_rows,)
+    ).rowcount
+    if trimmed > 0:
+        logger.warning(f"Relay spool full, discarded {trimmed} oldest readings")
+    return max(trimmed, 0)
+
+class RelayForwarder:
+    def __init__(
+        self,
+        backend_url: str,
+        db_path: str = DB_PATH,
+        batch_size: int = RELAY_BATCH_SIZE,
+        poll_interval: float = 2.0,
+        timeout: float = 10.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        poison_attempts: int = RELAY_POISON_ATTEMPTS
+    ):
+        self.endpoint = backend_url.rstrip('/') + "/api/sensor-data/batch"
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poison_attempts = poison_attempts
+
+        self.forwarded = 0
+        self.rejected = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        # Spool id at the head of the batch the backend keeps failing on, and how many times in a row it did.
+        self._failing_head: Optional[int] = None
+        self._failing_attempts = 0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gateway-relay", daemon=True)
+        self._thread.start()
+        logger.info(f"Relay forwarding to {self.endpoint}")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def spool_depth(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COUNT(*) FROM relay_spool").fetchone()[0]
+
+    def _run(self):
+        conn = None
+        while not self._stop.is_set():
+            try:
+                if conn is None:
+                    conn = connect_writer(self.db_path)
+                rows = conn.execute(
+                    "SELECT id, payload FROM relay_spool ORDER BY id LIMIT ?", (self.batch_size,)
+                ).fetchall()
+                if not rows:
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                if not self._deliver(conn, rows):
+                    self.failures += 1
+                    self._stop.wait(self._backoff())
+                    continue
+                self.failures = 0
+            except Exception as e:
+                # A locked database or an unexpected error must not end forwarding; the spool keeps the rows.
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Relay forwarder error, retrying: {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                self._stop.wait(self._backoff())
+        if conn is not None:
+            conn.close()
+
+    def _deliver(self, conn: sqlite3.Connection, rows: List[tuple], isolate: bool = False) -> bool:
+        outcome = self._post([json.loads(payload) for _, payload in rows])
+        if outcome == 'failed':
+            if not isolate and self._count_failure(rows[0][0]) < self.poison_attempts:
+                return False
+            # A batch that keeps failing (e.g. a reading for a node the backend's foreign key refuses)
+            # would block the spool forever, so it is split like a rejected one.
+            if not isolate:
+                logger.error(f"Backend failed the same {len(rows)} relayed readings {self._failing_attempts} times, isolating them")
+            outcome = 'rejected'
+            isolate = True
+        if outcome == 'retry':
+            return False
+
+        if outcome == 'rejected' and len(rows) > 1:
+            # Split until the readings the backend refuses are isolated; the rest still get through.
+            middle = len(rows) // 2
+            return self._deliver(conn, rows[:middle], isolate) and self._deliver(conn, rows[middle:], isolate)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if outcome == 'rejected':
+                conn.execute(
+                    "INSERT INTO relay_quarantine (payload, error) VALUES (?, ?)", (rows[0][1], self.last_error)
+                )
+            # Rows are read from the low end in id order, so this range is exactly the batch.
+            conn.execute("DELETE FROM relay_spool WHERE id BETWEEN ? AND ?", (rows[0][0], rows[-1][0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if outcome == 'sent':
+            self.forwarded += len(rows)
+        else:
+            self.rejected += len(rows)
+        return True
+
+    def _count_failure(self, head: int) -> int:
+        if head != self._failing_head:
+            self._failing_head = head
+            self._failing_attempts = 0
+        self._failing_attempts += 1
+        return self._failing_attempts
+
+    def _post(self, readings: List[Dict[str, Any]]) -> str:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps({"readings": readings}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+            return 'sent'
+        except urllib.error.HTTPError as e:
+            self.last_error = f"HTTP {e.code}"
+            if 400 <= e.code < 500 and e.code not in RETRY_STATUS_CODES:
+                logger.error(f"Backend rejected {len(readings)} relayed readings with HTTP {e.code}")
+                return 'rejected'
+            logger.warning(f"Backend returned HTTP {e.code}, will retry")
+            if e.code >= 500 and e.code not in UNAVAILABLE_STATUS_CODES:
+                return 'failed'
+            return 'retry'
+        except (urllib.error.URLError, OSError) as e:
+            self.last_error = str(e)
+            logger.warning(f"Backend unreachable ({e}), will retry")
+            return 'retry'
+
+    def _backoff(self) -> float:
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** min(self.failures, 16))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def status(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "spooled": self.spool_depth(conn),
+            "forwarded": self.forwarded,
+            "rejected": self.rejected,
+            "quarantined": conn.execute("SELECT COUNT(*) FROM relay_quarantine").fetchone()[0],
+            "consecutiveFailures": self.failures,
+            "lastError": self.last_error
+        }
@@ -0,0 +1,26 @@
+import time
+
+from gateway_db import BatchWriter, connect_writer
+from test_relay import reading
+
+def test_submit_reports_full_queue_without_waiting(db_path):
+    writer = BatchWriter(db_path, max_queue=1)
+    assert writer.submit(reading("node-1"))
+
+    started = time.monotonic()
+    assert not writer.submit(reading("node-2"))
+    assert time.monotonic() - started < 0.1
+    assert writer.dropped == 1
+
+def test_bad_reading_does_not_lose_the_batch(db_path):
+    writer = BatchWriter(db_path, max_delay=0.5)
+    writer.start()
+    for node_id in ["node-1", None, "node-2"]:
+        assert writer.submit(reading(node_id))
+    writer.stop()
+
+    conn = connect_writer(db_path)
+    stored = [row[0] for row in conn.execute("SELECT node_id FROM sensor_data ORDER BY id")]
+    conn.close()
+    assert stored == ["node-1", "node-2"]
+    assert writer.written == 2 and writer.dropped == 1
@@ -0,0 +1,89 @@
+import time
+
+from gateway_db import connect_writer
+from relay import RelayForwarder, spool_readings
+
+def reading(node_id, temperature=21.5):
+    return {
+        "nodeId": node_id, "temperature": temperature, "humidity": 55.0, "soilMoisture": 40,
+        "soilPh": 6.5, "soilTemperature": 18.0, "lightIntensity": 300.0, "pressure": 1013.0,
+        "altitude": 120.0, "rainfall": 0.0, "isRaining": False, "timestamp": 1000,
+        "receivedTime": "2026-10-19T12:00:00", "gatewayRSSI": -80, "gatewaySNR": 7.5
+    }
+
+def spool(path, batch):
+    conn = connect_writer(path)
+    spool_readings(conn, batch)
+    conn.close()
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def rejects_bad_readings(method, path, body):
+    if any(r["node_id"] == "bad" for r in body["readings"]):
+        return 422, {"detail": "invalid reading"}
+    return 200, {"status": "success"}
+
+def test_rejected_reading_is_quarantined_and_rest_forwarded(db_path, stub_server):
+    backend = stub_server(rejects_bad_readings)
+    spool(db_path, [reading(f"node-{i}") for i in range(5)] + [reading("bad")] + [reading("node-9")])
+
+    relay = RelayForwarder(backend.url, db_path, poll_interval=0.05)
+    relay.start()
+    try:
+        assert wait_for(lambda: relay.forwarded + relay.rejected == 7)
+    finally:
+        relay.stop()
+
+    forwarded = {r["node_id"] for _, _, body in backend.requests if body for r in body["readings"]}
+    conn = connect_writer(db_path)
+    quarantined = conn.execute("SELECT payload FROM relay_quarantine").fetchall()
+    assert relay.forwarded == 6 and relay.rejected == 1
+    assert len(quarantined) == 1 and '"bad"' in quarantined[0][0]
+    assert relay.status(conn)["spooled"] == 0
+    assert "node-9" in forwarded
+    conn.close()
+
+def test_batch_that_keeps_failing_is_split_and_quarantined(db_path, stub_server):
+    # Like an unknown node tripping the backend's foreign key: the whole batch gets a 500.
+    backend = stub_server(
+        lambda method, path, body: (500, {"detail": "Internal server error"})
+        if any(r["node_id"] == "ghost" for r in body["readings"]) else (200, {"status": "success"})
+    )
+    spool(db_path, [reading(f"node-{i}") for i in range(5)] + [reading("ghost")] + [reading("node-9")])
+
+    relay = RelayForwarder(backend.url, db_path, poll_interval=0.05, backoff_base=0.01, poison_attempts=3)
+    relay.start()
+    try:
+        assert wait_for(lambda: relay.forwarded + relay.rejected == 7)
+    finally:
+        relay.stop()
+
+    conn = connect_writer(db_path)
+    quarantined = conn.execute("SELECT payload, error FROM relay_quarantine").fetchall()
+    assert relay.forwarded == 6 and relay.rejected == 1
+    assert len(quarantined) == 1 and '"ghost"' in quarantined[0][0] and quarantined[0][1] == "HTTP 500"
+    assert relay.status(conn)["spooled"] == 0
+    conn.close()
+
+def test_forwarder_keeps_running_after_an_error(db_path, stub_server):
+    backend = stub_server(lambda method, path, body: (200, {"status": "success"}))
+    conn = connect_writer(db_path)
+    conn.execute("ALTER TABLE relay_spool RENAME TO relay_spool_pending")
+
+    relay = RelayForwarder(backend.url, db_path, poll_interval=0.05, backoff_base=0.05)
+    relay.start()
+    try:
+        assert wait_for(lambda: relay.failures > 0)
+        conn.execute("ALTER TABLE relay_spool_pending RENAME TO relay_spool")
+        spool(db_path, [reading("node-1")])
+        assert wait_for(lambda: relay.forwarded == 1)
+    finally:
+        relay.stop()
+        conn.close()
+    assert relay.failures == 0